@@ -0,0 +1,61 @@
+from flask import Response, request
+from flask_restx import Namespace, Resource
+from flask_jwt_extended import jwt_required
+from utils.events import event_bus, zpool_event_follower, format_sse, EventBusFull, EVENTS_HEARTBEAT
+from utils.logger import get_logger
+
+events_api = Namespace('events', description='스토리지 상태 변경 이벤트 (SSE)')
+logger = get_logger("events")
+
+def _stream(sub, client_ip):
+    try:
+        yield 'retry: 3000\n\n'
+        while True:
+            events, dropped = event_bus.next_events(sub, EVENTS_HEARTBEAT)
+            # 대기열이 넘쳐 이벤트를 잃었으면 목록을 다시 조회하도록 알림
+            if dropped:
+                yield format_sse({'type': 'stream.dropped', 'data': {'count': dropped}})
+            for event in events:
+                yield format_sse(event)
+            if not events and not dropped:
+                yield ': keepalive\n\n'
+    finally:
+        event_bus.unsubscribe(sub)
+        logger.info(f"이벤트 구독 종료 - IP: {client_ip}")
+
+# 이벤트 스트림 (text/event-stream)
+@events_api.route('')
+class EventStream(Resource):
+    @events_api.doc(description='상태 변경 이벤트 스트림 (Server-Sent Events)', params={
+        'types': '이벤트 종류 접두어 필터, 쉼표 구분 (예: pool,vdev,dataset,snapshot,share)',
+        'last_event_id': '재연결 시 마지막으로 받은 이벤트 ID (Last-Event-ID 헤더와 같음)'
+    })
+    @jwt_required()
+    def get(self):
+        types = [t.strip() for t in request.args.get('types', '').split(',') if t.strip()]
+        last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+        try:
+            last_event_id = int(last_event_id) if last_event_id else None
+        except ValueError:
+            return {'error': 'last_event_id 는 숫자여야 합니다.'}, 400
+        try:
+            sub = event_bus.subscribe(types, last_event_id)
+        except EventBusFull as e:
+            logger.warning(f"이벤트 구독 거부 - IP: {request.remote_addr}, {str(e)}")
+            return {'error': str(e)}, 503
+        logger.info(f"이벤트 구독 시작 - IP: {request.remote_addr}, 종류: {types or '전체'}, 마지막 ID: {last_event_id}")
+        response = Response(_stream(sub, request.remote_addr), mimetype='text/event-stream', headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        })
+        # 스트림을 한 번도 읽지 않고 닫혀도 구독 해제
+        response.call_on_close(lambda: event_bus.unsubscribe(sub))
+        return response
+
+# 이벤트 버스/zpool events 추적 상태
+@events_api.route('/stats')
+class EventStats(Resource):
+    @events_api.doc(description='이벤트 구독자 수, 발행/버린 이벤트 수, zpool events 추적 상태')
+    @jwt_required()
+    def get(self):
+        return {'bus': event_bus.stats(), 'zpool_events': zpool_event_follower.status()}
@@ -0,0 +1,48 @@
+import math
+from flask import request
+from flask_restx import Namespace, Resource
+from flask_jwt_extended import jwt_required
+from utils.jobs import job_manager, JOB_FINISHED, JOBS_WAIT_MAX
+from utils.logger import get_logger
+
+jobs_api = Namespace('jobs', description='작업(풀/ZFS 생성·삭제, 롤백) 조회 API')
+logger = get_logger("jobs")
+
+# 작업 목록
+@jobs_api.route('')
+class JobList(Resource):
+    @jobs_api.doc(description='작업 목록 조회 (최신순)', params={
+        'status': '상태 필터: pending, running, succeeded, failed, interrupted',
+        'limit': '최대 개수 (default: 50, 최대 500)'
+    })
+    @jwt_required()
+    def get(self):
+        status = request.args.get('status')
+        if status and status not in ('pending', 'running') + JOB_FINISHED:
+            return {'error': f'알 수 없는 작업 상태입니다: {status}'}, 400
+        try:
+            limit = min(max(int(request.args.get('limit', 50)), 1), 500)
+        except ValueError:
+            return {'error': 'limit 은 숫자여야 합니다.'}, 400
+        jobs = job_manager.list(status, limit)
+        return {'jobs': jobs, 'count': len(jobs), 'executor': job_manager.stats()}
+
+# 작업 상태 (wait 지정 시 완료되거나 시간이 지날 때까지 대기 후 응답)
+@jobs_api.route('/<job_id>')
+class JobDetail(Resource):
+    @jobs_api.doc(description='작업 상태/출력 조회', params={
+        'wait': f'작업이 끝날 때까지 기다릴 최대 시간(초) (default: 0, 최대 {JOBS_WAIT_MAX})'
+    })
+    @jwt_required()
+    def get(self, job_id):
+        try:
+            wait = float(request.args.get('wait', 0))
+        except ValueError:
+            return {'error': 'wait 은 숫자여야 합니다.'}, 400
+        if not math.isfinite(wait):
+            return {'error': 'wait 은 유한한 숫자여야 합니다.'}, 400
+        wait = min(max(wait, 0), JOBS_WAIT_MAX)
+        job = job_manager.wait(job_id, wait) if wait else job_manager.get(job_id)
+        if not job:
+            return {'error': f'해당 작업을 찾을 수 없습니다: {job_id}'}, 404
+        return job
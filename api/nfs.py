@@ -2,28 +2,29 @@ from flask import request, jsonify
 from flask_restx import Namespace, Resource, fields
 from flask_jwt_extended import jwt_required
 import subprocess, os
+from utils.zfs_inventory import zfs_inventory
+from utils.nfsd_metrics import nfsd_metrics
+from utils.nfsd_threads import (
+    get_thread_count, set_thread_count, persist_thread_count, read_pool_stats, nfsd_autoscaler
+)
+from utils.exports import ExportsFile, exports_lock, export_share, unexport_share, reload_exports, exports_state
+from utils.command_runner import run_command
+from utils.events import publish_event
 from utils.logger import get_logger
 
 nfs_api = Namespace('nfs', description='NFS 관리')
 logger = get_logger("nfs")
 
 def is_zfs_exists(zfs_name: str) -> bool:
-    result = subprocess.run(['zfs', 'list', '-H', '-o', 'name'], capture_output=True, text=True)
-    exists = zfs_name in result.stdout.split()
+    exists = zfs_inventory.exists(zfs_name)
     logger.debug(f"is_zfs_exists: {zfs_name} 존재여부={exists}")
     return exists
 
 def is_already_shared(zfs_name: str, client_ip: str) -> bool:
-    try:
-        with open('/etc/exports', 'r') as f:
-            for line in f:
-                if zfs_name in line and client_ip in line:
-                    logger.debug(f"is_already_shared: 이미 공유된 대상 발견 {zfs_name} -> {client_ip}")
-                    return True
-        return False
-    except FileNotFoundError:
-        logger.warning("/etc/exports 파일을 찾을 수 없습니다.")
-        return False
+    shared = (f'/{zfs_name}', client_ip) in ExportsFile.load().index
+    if shared:
+        logger.debug(f"is_already_shared: 이미 공유된 대상 발견 {zfs_name} -> {client_ip}")
+    return shared
 
 # Model 정의
 nfs_share_model = nfs_api.model('NFSShare', {
@@ -37,6 +38,29 @@ nfs_control_model = nfs_api.model('NFSControl', {
     'client_ip': fields.String(required=True, description='클라이언트 IP 주소')
 })
 
+nfs_bulk_item_model = nfs_api.model('NFSBulkItem', {
+    'action': fields.String(required=True, description='share 또는 unshare'),
+    'zfs_name': fields.String(required=True, description='ZFS 파일시스템 이름 (ex: poolname/filesystem)'),
+    'client_ip': fields.String(required=True, description='클라이언트 IP 주소'),
+    'options': fields.String(required=False, description='NFS 공유 옵션 - share 에만 사용 (default: rw,sync,no_root_squash)'),
+})
+
+nfs_bulk_model = nfs_api.model('NFSBulk', {
+    'items': fields.List(fields.Nested(nfs_bulk_item_model), required=True, description='공유 등록/삭제 목록'),
+})
+
+nfs_threads_model = nfs_api.model('NFSThreads', {
+    'threads': fields.Integer(required=True, description='nfsd 스레드 수'),
+    'persist': fields.Boolean(required=False, description='nfs.conf 에 저장하여 재시작 후에도 유지 (default: true)'),
+})
+
+nfs_autoscale_model = nfs_api.model('NFSThreadsAutoscale', {
+    'enabled': fields.Boolean(required=False, description='자동 조정 사용 여부'),
+    'min_threads': fields.Integer(required=False, description='최소 스레드 수'),
+    'max_threads': fields.Integer(required=False, description='최대 스레드 수'),
+    'step': fields.Integer(required=False, description='한 번에 늘리거나 줄이는 스레드 수'),
+})
+
 nfs_list_model = nfs_api.model('NFSList', {
     'zfs_name': fields.String(required=True, description='ZFS 파일시스템 이름 (ex: poolname/filesystem)')
 })
@@ -49,10 +73,8 @@ class NFSStatus(Resource):
     def get(self):
         try:
             logger.info("NFS 활성화 상태 조회 요청")
-            result = subprocess.run(
+            result = run_command(
                 ['systemctl', '-l', 'status', 'nfs-server'],
-                capture_output=True,
-                encoding='utf-8',
                 check=True
             )
             # 출력에서 활성화 상태 추출
@@ -73,6 +95,102 @@ class NFSStatus(Resource):
                 'detail': e.stderr or str(e)
             }, 500
 
+# nfsd 부하 통계 (초당 요청/전송량, 연산별 처리량, 스레드 포화도)
+@nfs_api.route('/metrics')
+class NFSMetrics(Resource):
+    @nfs_api.doc(description='nfsd 통계 조회', params={
+        'window': '집계 구간(초), 쉼표로 여러 개 지정 가능 (default: 60,300,900)'
+    })
+    @jwt_required()
+    def get(self):
+        try:
+            windows = [int(w) for w in request.args['window'].split(',')] if request.args.get('window') else None
+        except ValueError:
+            return {'error': 'window는 정수(초) 목록이어야 합니다.'}, 400
+        if windows and any(w <= 0 for w in windows):
+            return {'error': 'window는 0보다 커야 합니다.'}, 400
+        return nfsd_metrics.report(windows)
+
+# nfsd 스레드 수 조회 / 변경
+@nfs_api.route('/threads')
+class NFSThreads(Resource):
+    @nfs_api.doc(description='nfsd 스레드 수 조회')
+    @jwt_required()
+    def get(self):
+        try:
+            return {
+                'threads': get_thread_count(),
+                'pool_stats': read_pool_stats(),
+                'autoscale': nfsd_autoscaler.status()
+            }
+        except FileNotFoundError:
+            return {'error': 'nfsd가 실행 중이 아닙니다.'}, 409
+        except Exception as e:
+            logger.error(f"nfsd 스레드 수 조회 중 예외 발생: {str(e)}", exc_info=True)
+            return {'error': '서버 내부 오류가 발생했습니다.'}, 500
+
+    @nfs_api.doc(description='nfsd 스레드 수 변경')
+    @jwt_required()
+    @nfs_api.expect(nfs_threads_model)
+    def post(self):
+        data = request.get_json(silent=True) or {}
+        threads = data.get('threads')
+        persist = data.get('persist', True)
+        logger.info(f"nfsd 스레드 수 변경 요청: {threads}, 저장: {persist}")
+        if not isinstance(threads, int) or isinstance(threads, bool):
+            return {'error': 'threads는 정수여야 합니다.'}, 400
+        try:
+            previous = get_thread_count()
+            set_thread_count(threads)
+            if persist:
+                persist_thread_count(threads)
+            return {
+                'message': f'nfsd 스레드 수가 {previous}에서 {threads}(으)로 변경되었습니다.',
+                'threads': threads,
+                'persisted': bool(persist),
+                # 자동 조정이 켜져 있으면 이후 범위 안에서 다시 조정될 수 있음
+                'autoscale_enabled': nfsd_autoscaler.enabled
+            }
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        except FileNotFoundError:
+            return {'error': 'nfsd가 실행 중이 아닙니다.'}, 409
+        except Exception as e:
+            logger.error(f"nfsd 스레드 수 변경 중 예외 발생: {str(e)}", exc_info=True)
+            return {'error': '서버 내부 오류가 발생했습니다.'}, 500
+
+# nfsd 스레드 자동 조정 설정
+@nfs_api.route('/threads/autoscale')
+class NFSThreadsAutoscale(Resource):
+    @nfs_api.doc(description='nfsd 스레드 자동 조정 상태 조회')
+    @jwt_required()
+    def get(self):
+        return nfsd_autoscaler.status()
+
+    @nfs_api.doc(description='nfsd 스레드 자동 조정 설정')
+    @jwt_required()
+    @nfs_api.expect(nfs_autoscale_model)
+    def post(self):
+        data = request.get_json(silent=True) or {}
+        logger.info(f"nfsd 스레드 자동 조정 설정 요청: {data}")
+        for key in ('min_threads', 'max_threads', 'step'):
+            value = data.get(key)
+            if value is not None and (not isinstance(value, int) or isinstance(value, bool)):
+                return {'error': f'{key}는 정수여야 합니다.'}, 400
+        try:
+            nfsd_autoscaler.configure(
+                enabled=data.get('enabled'),
+                min_threads=data.get('min_threads'),
+                max_threads=data.get('max_threads'),
+                step=data.get('step')
+            )
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        except RuntimeError as e:
+            logger.warning(f"nfsd 스레드 자동 조정 시작 실패 - {str(e)}")
+            return {'error': str(e)}, 409
+        return nfsd_autoscaler.status()
+
 # NFS 전체 활성화
 @nfs_api.route('/enable')
 class NFSEnable(Resource):
@@ -81,7 +199,7 @@ class NFSEnable(Resource):
     def get(self):
         try:
             logger.info("NFS 활성화 요청")
-            subprocess.run(['systemctl', 'enable', '--now', 'nfs-server'], check=True)
+            run_command(['systemctl', 'enable', '--now', 'nfs-server'], check=True)
             logger.info("NFS 서버 활성화 성공")
             return {'message': 'NFS 서버가 활성화되었습니다.'}
         except subprocess.CalledProcessError as e:
@@ -98,7 +216,7 @@ class NFSDisable(Resource):
     @jwt_required()
     def get(self):
         try:
-            subprocess.run(['systemctl', 'disable', '--now', 'nfs-server'], check=True)
+            run_command(['systemctl', 'disable', '--now', 'nfs-server'], check=True)
             return {'message': 'NFS 서버가 비활성화되었습니다.'}
         except subprocess.CalledProcessError as e:
             return {
@@ -128,18 +246,24 @@ class NFSShare(Resource):
             logger.warning(f"공유 등록 실패 - 존재하지 않는 ZFS 파일시스템: {zfs_name}")
             return {'error': f'존재하지 않는 ZFS 파일시스템입니다: {zfs_name}'}, 404
 
-        if is_already_shared(zfs_name, client_ip):
-            logger.warning(f"공유 등록 실패 - 이미 공유된 대상: {zfs_name} -> {client_ip}")
-            return {'error': f'이미 공유된 대상입니다: {zfs_name} -> {client_ip}'}, 409
-
         try:
-            # exportfs 설정
-            export_line = f"/{zfs_name} {client_ip}({options})\n"
-            with open('/etc/exports', 'a') as f:
-                f.write(export_line)
-
-            subprocess.run(['exportfs', '-ra'], check=True)
-
+            with exports_lock:
+                exports = ExportsFile.load()
+                path = f'/{zfs_name}'
+                if (path, client_ip) in exports.index:
+                    logger.warning(f"공유 등록 실패 - 이미 공유된 대상: {zfs_name} -> {client_ip}")
+                    return {'error': f'이미 공유된 대상입니다: {zfs_name} -> {client_ip}'}, 409
+
+                exports.add(path, client_ip, options)
+                exports.save()
+                # 전체 재적용(exportfs -ra) 대신 해당 클라이언트만 export
+                try:
+                    export_share(path, client_ip, exports.effective_options(path, client_ip))
+                except subprocess.CalledProcessError:
+                    exports.restore()
+                    raise
+
+            publish_event('share.changed', action='share', path=path, client=client_ip, options=options)
             logger.info(f"NFS 공유 등록 성공: {zfs_name} -> {client_ip}")
             return {'message': f'{zfs_name}가 {client_ip}에 공유되었습니다.'}
         except subprocess.CalledProcessError as e:
@@ -152,6 +276,83 @@ class NFSShare(Resource):
             logger.error(f"NFS 공유 등록 중 예외 발생: {str(e)}", exc_info=True)
             return {'error': '서버 내부 오류가 발생했습니다.'}, 500
 
+# 공유 대상 일괄 등록/삭제 (전체 성공 또는 전체 취소)
+@nfs_api.route('/share/bulk')
+class NFSShareBulk(Resource):
+    @nfs_api.doc(description='공유 대상 일괄 등록/삭제')
+    @jwt_required()
+    @nfs_api.expect(nfs_bulk_model)
+    def post(self):
+        data = request.get_json(silent=True) or {}
+        items = data.get('items')
+        if not isinstance(items, list) or not items:
+            return {'error': 'items는 비어있지 않은 리스트여야 합니다.'}, 400
+        logger.info(f"NFS 공유 일괄 변경 요청 - {len(items)}건")
+
+        try:
+            with exports_lock:
+                exports = ExportsFile.load()
+                results, failed = [], False
+                for item in items:
+                    item = item if isinstance(item, dict) else {}
+                    action = item.get('action')
+                    zfs_name = item.get('zfs_name')
+                    client_ip = item.get('client_ip')
+                    result = {'action': action, 'zfs_name': zfs_name, 'client_ip': client_ip}
+                    path = f'/{zfs_name}'
+                    # 검증과 동시에 모델에 적용 - 같은 요청 안의 앞선 항목도 반영된 상태로 검사됨
+                    if action not in ('share', 'unshare') or not zfs_name or not client_ip:
+                        result.update(status='invalid', error='action(share/unshare), zfs_name, client_ip는 필수 항목입니다.')
+                    elif action == 'share' and not is_zfs_exists(zfs_name):
+                        result.update(status='not_found', error=f'존재하지 않는 ZFS 파일시스템입니다: {zfs_name}')
+                    elif action == 'share' and (path, client_ip) in exports.index:
+                        result.update(status='conflict', error=f'이미 공유된 대상입니다: {zfs_name} -> {client_ip}')
+                    elif action == 'unshare' and (path, client_ip) not in exports.index:
+                        result.update(status='not_found', error='공유 대상이 존재하지 않습니다.')
+                    elif action == 'share':
+                        result['options'] = item.get('options') or 'rw,sync,no_root_squash'
+                        exports.add(path, client_ip, result['options'])
+                        result['status'] = 'ok'
+                    else:
+                        exports.remove(path, client_ip)
+                        result['status'] = 'ok'
+                    failed = failed or result['status'] != 'ok'
+                    results.append(result)
+
+                if failed:
+                    logger.warning(f"NFS 공유 일괄 변경 실패 - 검증 오류 {sum(r['status'] != 'ok' for r in results)}건, 변경 없음")
+                    for result in results:
+                        if result['status'] == 'ok':
+                            result['status'] = 'skipped'
+                    return {'error': '유효하지 않은 항목이 있어 아무것도 변경하지 않았습니다.', 'results': results}, 400
+
+                # 파일 한 번 쓰기 + exportfs 한 번 실행
+                exports.save()
+                try:
+                    reload_exports()
+                except subprocess.CalledProcessError as e:
+                    logger.error(f"NFS 공유 일괄 변경 실패 - exportfs 오류, 원복 진행: {e.stderr or str(e)}")
+                    exports.restore()
+                    try:
+                        reload_exports()
+                    except subprocess.CalledProcessError as restore_error:
+                        logger.error(f"NFS 공유 원복 후 exportfs 재적용 실패: {restore_error.stderr or str(restore_error)}")
+                    for result in results:
+                        result['status'] = 'rolled_back'
+                    return {
+                        'message': '공유 대상 일괄 변경에 실패하여 원복하였습니다.',
+                        'stderr': e.stderr,
+                        'results': results
+                    }, 500
+
+            publish_event('share.changed', action='bulk', changes=[
+                {'action': r['action'], 'path': f"/{r['zfs_name']}", 'client': r['client_ip']} for r in results])
+            logger.info(f"NFS 공유 일괄 변경 성공 - {len(results)}건")
+            return {'message': f'{len(results)}건의 공유 변경이 적용되었습니다.', 'results': results}
+        except Exception as e:
+            logger.error(f"NFS 공유 일괄 변경 중 예외 발생: {str(e)}", exc_info=True)
+            return {'error': '서버 내부 오류가 발생했습니다.'}, 500
+
 # 공유 목록 조회
 @nfs_api.route('/share/list')
 class SharedList(Resource):
@@ -160,26 +361,8 @@ class SharedList(Resource):
     def get(self):
         try:
             logger.info("모든 NFS 공유 목록 조회 요청")
-            result = subprocess.run(['exportfs', '-v'], capture_output=True, encoding='utf-8', check=True)
-            lines = [line for line in result.stdout.strip().split('\n') if line.strip()]
-            shares = []
-            for line in lines:
-                if '(' in line and ')' in line:
-                    # 공유 디렉토리 경로 추출
-                    share = line.split()
-                    path = share[0]
-                    
-                    # client(ip)와 옵션 추출
-                    client_part = ' '.join(share[1:])
-                    client, options_str = client_part.split('(')
-                    client = client.strip()
-                    options = options_str.strip(')').split(',')
-                    
-                    shares.append({
-                        'path': path,
-                        'client': client,
-                        'options': options
-                    })
+            # 캐시된 exportfs -v 상태 사용 (API 변경 또는 /etc/exports 변경 시 갱신)
+            shares = exports_state.shares()
             logger.info(f"NFS 공유 목록 조회 성공, 총 {len(shares)}개 항목")
             return {
                 'shares': shares,
@@ -212,30 +395,7 @@ class ShareDetail(Resource):
             return {'error': f'존재하지 않는 ZFS 파일시스템입니다: {zfs_name}'}, 404
 
         try:
-            result = subprocess.run(['exportfs', '-v'], capture_output=True, encoding='utf-8', check=True)
-            lines = result.stdout.strip().split('\n')
-            shares = []
-
-            expected_path = f'/{zfs_name}'
-
-            for line in lines:
-                if '(' in line and ')' in line:
-                    share = line.split()
-                    path = share[0]
-
-                    if path != expected_path:
-                        continue 
-
-                    client_part = ' '.join(share[1:])
-                    client, options_str = client_part.split('(')
-                    client = client.strip()
-                    options = options_str.strip(')').split(',')
-
-                    shares.append({
-                        'path': path,
-                        'client': client,
-                        'options': options
-                    })
+            shares = exports_state.get(f'/{zfs_name}')
             logger.info(f"특정 ZFS 공유 목록 조회 성공: {zfs_name}, 총 {len(shares)}개 항목")
             return {
                 'zfs_name': zfs_name,
@@ -271,27 +431,23 @@ class NFSUnshare(Resource):
                 logger.warning("공유 삭제 실패 - zfs_name 또는 client_ip 누락")
                 return {'error': 'zfs_name과 client_ip는 필수 항목입니다.'}, 400
 
-            with open('/etc/exports', 'r') as f:
-                lines = f.readlines()
-
-            new_lines = []
-            removed = False
-            search_str = f"/{zfs_name} {client_ip}"
-            for line in lines:
-                if search_str in line:
-                    removed = True
-                    logger.debug(f"NFS 공유 삭제 대상 발견 및 제거: {line.strip()}")
-                    continue
-                new_lines.append(line)
-
-            if not removed:
-                logger.warning(f"공유 삭제 실패 - 공유 대상이 존재하지 않음: {search_str}")
-                return {'error': '공유 대상이 존재하지 않습니다.'}, 404
-
-            with open('/etc/exports', 'w') as f:
-                f.writelines(new_lines)
-            subprocess.run(['exportfs', '-ra'], check=True)
-
+            with exports_lock:
+                exports = ExportsFile.load()
+                path = f'/{zfs_name}'
+                options = exports.get(path, client_ip)
+                if options is None:
+                    logger.warning(f"공유 삭제 실패 - 공유 대상이 존재하지 않음: {path} {client_ip}")
+                    return {'error': '공유 대상이 존재하지 않습니다.'}, 404
+
+                exports.remove(path, client_ip)
+                exports.save()
+                try:
+                    unexport_share(path, client_ip)
+                except subprocess.CalledProcessError:
+                    exports.restore()
+                    raise
+
+            publish_event('share.changed', action='unshare', path=path, client=client_ip)
             logger.info(f"NFS 공유 삭제 성공: {zfs_name} -> {client_ip}")
             return {'message': f'{zfs_name}에 대한 {client_ip} 공유가 삭제되었습니다.'}
 
@@ -1,19 +1,78 @@
-from flask import request
+from flask import request, Response, stream_with_context, send_file
 from flask_restx import Namespace, Resource, fields
 from flask_jwt_extended import jwt_required
 from utils.zpool_utils import is_pool_name_exists
-import subprocess, re
+from utils.zfs_inventory import zfs_inventory
+from utils.snapshot_utils import (
+    iter_snapshots, sort_position, encode_cursor, decode_cursor, default_snapshot_name,
+    take_snapshots, iter_diff, SnapshotCommandError, SNAPSHOT_SORT_KEYS, SNAPSHOT_NAME_PATTERN,
+    DIFF_CHANGE_TYPES
+)
+from utils.retention import validate_policy, apply_retention
+from utils.snapshot_scheduler import snapshot_scheduler
+from utils.replication import ReplicationJob, replication_manager
+from utils.snapshot_files import (
+    list_snapshot_directory, resolve_snapshot_path, restore_from_snapshot, SnapshotPathError
+)
+import subprocess, os, re, json, time
 from datetime import datetime
+from utils.command_runner import run_command
+from utils.jobs import job_manager, async_requested, job_accepted
+from utils.events import publish_event
 from utils.logger import get_logger
 
 snapshot_api = Namespace('snapshot', description='스냅샷 관련 API')
 logger = get_logger("snapshot")
 
+# 스냅샷 목록 기본/최대 페이지 크기
+SNAPSHOT_PAGE_SIZE = 1000
+SNAPSHOT_PAGE_MAX = 10000
+
 create_snapshot_model = snapshot_api.model('CreateSnapshot', {
     'pool_name': fields.String(required=True, description='Zpoool 이름'),
     'zfs_name' : fields.String(required=True, description='Zfs 이름'),
 })
 
+bulk_snapshot_model = snapshot_api.model('BulkCreateSnapshot', {
+    'datasets': fields.List(fields.String, required=False, description='스냅샷을 생성할 ZFS 전체 이름 목록 (예: ["pool/zfs1", "pool/zfs2"])'),
+    'recursive_root': fields.String(required=False, description='하위 ZFS까지 재귀적으로 스냅샷을 생성할 최상위 ZFS (datasets 대신 사용)'),
+    'snapshot_name': fields.String(required=False, description='스냅샷 이름 (default: 현재 시각, 예: 240524-153000)'),
+})
+
+retention_model = snapshot_api.model('SnapshotRetention', {
+    'dataset': fields.String(required=True, description='보존 정책을 적용할 ZFS 전체 이름 (예: pool/zfs)'),
+    'recursive': fields.Boolean(required=False, description='하위 ZFS에도 각각 적용 여부 (default: false)'),
+    'policy': fields.Raw(required=True, description='보존 개수 (예: {"keep_last": 3, "hourly": 24, "daily": 7, "weekly": 4, "monthly": 12})'),
+    'prefix': fields.String(required=False, description='정책을 적용할 스냅샷 이름 접두어 (나머지 스냅샷은 보존)'),
+    'dry_run': fields.Boolean(required=False, description='삭제 없이 삭제 대상과 회수 가능 용량만 확인 (default: true)'),
+})
+
+schedule_model = snapshot_api.model('SnapshotSchedule', {
+    'dataset': fields.String(required=True, description='스냅샷을 생성할 ZFS 전체 이름 (예: pool/zfs)'),
+    'cron': fields.String(required=True, description='cron 형식 실행 주기 "분 시 일 월 요일" (예: "0 * * * *")'),
+    'recursive': fields.Boolean(required=False, description='하위 ZFS 포함 재귀 스냅샷 여부 (default: false)'),
+    'prefix': fields.String(required=False, description='스냅샷 이름 접두어 (default: auto-)'),
+    'retention': fields.Raw(required=False, description='스냅샷 생성 후 적용할 보존 정책 (예: {"hourly": 24, "daily": 7})'),
+    'enabled': fields.Boolean(required=False, description='활성화 여부 (default: true)'),
+})
+
+replication_model = snapshot_api.model('SnapshotReplication', {
+    'snapshot': fields.String(required=True, description='전송할 스냅샷 전체 이름 (예: pool/zfs@240524-153000)'),
+    'base_snapshot': fields.String(required=False, description='증분 전송 기준 스냅샷 (zfs send -i, 예: pool/zfs@240523-153000)'),
+    'target': fields.String(required=True, description='수신 대상 ZFS 전체 이름 (예: backup/zfs)'),
+    'compressed': fields.Boolean(required=False, description='압축 블록 그대로 전송 (zfs send -c, default: true)'),
+    'large_blocks': fields.Boolean(required=False, description='대용량 블록 전송 (zfs send -L, default: true)'),
+    'force': fields.Boolean(required=False, description='대상 강제 롤백 후 수신 (zfs recv -F, default: false)'),
+    'resume': fields.Boolean(required=False, description='대상에 receive_resume_token 이 있으면 먼저 이어받은 뒤 요청한 스냅샷까지 계속 전송 (default: true)'),
+})
+
+snapshot_restore_model = snapshot_api.model('RestoreSnapshotFile', {
+    'snapshot': fields.String(required=True, description='스냅샷 전체 이름 (예: pool/zfs@240524-153000)'),
+    'path': fields.String(required=True, description='복원할 파일/디렉토리의 마운트 지점 기준 상대 경로 (예: docs/report.txt)'),
+    'target_path': fields.String(required=False, description='복원 위치 (마운트 지점 기준 상대 경로, default: path와 동일)'),
+    'overwrite': fields.Boolean(required=False, description='대상이 이미 있으면 덮어쓰기 (default: false)'),
+})
+
 snapshot_rollback_model = snapshot_api.model('RollbackSnapshot', {
     'snapshot_name': fields.String(required=True, description='롤백할 스냅샷 전체 이름 (예: pool/zfs@20240524-153000)'),
 })
@@ -22,6 +81,11 @@ snapshot_delete_model = snapshot_api.model('DeleteSnapshot', {
     'snapshot_name': fields.String(required=True, description='삭제할 스냅샷 전체 이름 (예: pool/zfs@20240524-153000)'),
 })
 
+# 특정 ZFS의 스냅샷 이름 목록 (하위 데이터셋 제외)
+def list_dataset_snapshots(zfs_full_name):
+    result = run_command(['zfs', 'list', '-H', '-t', 'snapshot', '-o', 'name', '-d', '1', zfs_full_name])
+    return result.stdout.split()
+
 # 스냅샷 생성
 @snapshot_api.route('/create')
 class CreateSnapshot(Resource):
@@ -34,8 +98,7 @@ class CreateSnapshot(Resource):
         pool_name = data.get('pool_name')
         zfs_name = data.get('zfs_name')
         full_name = f'{pool_name}/{zfs_name}'
-        timestamp = datetime.now().strftime('%y%m%d-%H%M%S')
-        snapshot_name = f'{full_name}@{timestamp}'
+        snapshot_name = f'{full_name}@{default_snapshot_name()}'
         
         try:
             # 존재하는 pool인지 확인
@@ -43,12 +106,13 @@ class CreateSnapshot(Resource):
                 logger.warning(f"존재하지 않는 pool 요청: {pool_name}")
                 return {'error': f'해당 pool을 찾을 수 없습니다. : {pool_name}'}
             # 존재하는 zfs인지 확인
-            check = subprocess.run(['zfs', 'list', full_name], capture_output=True, text=True)
-            if check.returncode != 0:
-                logger.warning(f"존재하지 않는 ZFS 요청: {full_name}, stderr: {check.stderr.strip()}")
-                return {'error': f'해당 ZFS를 찾을 수 없습니다. : {full_name}', 'stderr':check.stderr}, 400
+            if not zfs_inventory.exists(full_name):
+                logger.warning(f"존재하지 않는 ZFS 요청: {full_name}")
+                return {'error': f'해당 ZFS를 찾을 수 없습니다. : {full_name}'}, 400
 
-            result = subprocess.run(['zfs', 'snapshot', snapshot_name], check=True)
+            result = run_command(['zfs', 'snapshot', snapshot_name], check=True)
+            zfs_inventory.mark_stale(full_name)
+            publish_event('snapshot.created', pool=pool_name, name=snapshot_name)
             logger.info(f"스냅샷 생성 성공: {snapshot_name}")
             return {
                 'message': f'Snapshot 생성 완료: {snapshot_name}',
@@ -67,35 +131,163 @@ class CreateSnapshot(Resource):
             logger.error(f"스냅샷 생성 중 예외 발생: {str(e)}", exc_info=True)
             return {'error': '서버 내부 오류가 발생했습니다.'}, 500
 
+# 여러 ZFS 스냅샷 일괄 생성
+# pool 별로 zfs snapshot 을 한 번만 실행하므로 같은 pool 의 스냅샷은 원자적으로 같은 시점에 생성됨
+@snapshot_api.route('/create/bulk')
+class BulkCreateSnapshot(Resource):
+    @snapshot_api.doc(description='여러 ZFS 스냅샷 일괄(원자적) 생성')
+    @jwt_required()
+    @snapshot_api.expect(bulk_snapshot_model)
+    def post(self):
+        started = time.perf_counter()
+        data = request.get_json(silent=True) or {}
+        datasets = data.get('datasets') or []
+        recursive_root = data.get('recursive_root')
+        snap_name = data.get('snapshot_name') or default_snapshot_name()
+        logger.info(f"스냅샷 일괄 생성 요청 - 대상: {recursive_root or datasets}, 이름: {snap_name}")
+
+        if bool(datasets) == bool(recursive_root):
+            logger.warning("스냅샷 일괄 생성 실패 - datasets 또는 recursive_root 중 하나만 지정해야 함")
+            return {'error': 'datasets 또는 recursive_root 중 하나만 지정해야 합니다.'}, 400
+        if not isinstance(datasets, list):
+            return {'error': 'datasets는 리스트 형식이어야 합니다.'}, 400
+        if not SNAPSHOT_NAME_PATTERN.match(snap_name):
+            logger.warning(f"스냅샷 일괄 생성 실패 - 잘못된 스냅샷 이름: {snap_name}")
+            return {'error': f'스냅샷 이름 형식이 잘못되었습니다: {snap_name}'}, 400
+
+        try:
+            if recursive_root:
+                if not zfs_inventory.exists(recursive_root):
+                    logger.warning(f"스냅샷 일괄 생성 실패 - 존재하지 않는 ZFS: {recursive_root}")
+                    return {'error': f'해당 ZFS를 찾을 수 없습니다. : {recursive_root}'}, 404
+                targets = [n for n in zfs_inventory.datasets(recursive_root.split('/')[0])
+                           if n == recursive_root or n.startswith(f'{recursive_root}/')]
+            else:
+                # 중복 제거 (순서 유지) 후 인벤토리에서 한 번에 검증
+                targets = list(dict.fromkeys(datasets))
+                missing = [n for n in targets if not zfs_inventory.exists(n)]
+                if missing:
+                    logger.warning(f"스냅샷 일괄 생성 실패 - 존재하지 않는 ZFS: {missing}")
+                    return {
+                        'error': '존재하지 않는 ZFS가 포함되어 있어 스냅샷을 생성하지 않았습니다.',
+                        'results': [
+                            {'dataset': n, 'status': 'not_found' if n in missing else 'skipped'}
+                            for n in targets
+                        ]
+                    }, 404
+
+            # zfs snapshot 은 같은 pool 안에서만 원자적으로 처리되므로 pool 별로 한 번씩 실행
+            groups = {}
+            for name in ([recursive_root] if recursive_root else targets):
+                groups.setdefault(name.split('/')[0], []).append(name)
+            statuses, stderr, command_ms, returncode = {}, '', 0, 0
+            for pool_name, names in groups.items():
+                result, elapsed = take_snapshots(names, snap_name, recursive=bool(recursive_root))
+                command_ms += elapsed
+                stderr += result.stderr
+                returncode = returncode or result.returncode
+                statuses[pool_name] = 'created' if result.returncode == 0 else 'failed'
+
+            for name in targets:
+                zfs_inventory.mark_stale(name)
+                if statuses[name.split('/')[0]] == 'created':
+                    publish_event('snapshot.created', pool=name.split('/')[0], name=f'{name}@{snap_name}')
+            response = {
+                'snapshot_name': snap_name,
+                'results': [
+                    {'dataset': n, 'snapshot': f'{n}@{snap_name}', 'status': statuses[n.split('/')[0]]}
+                    for n in targets
+                ],
+                'count': len(targets),
+                'pools': len(groups),
+                'command_ms': round(command_ms, 2),
+                'elapsed_ms': round((time.perf_counter() - started) * 1000, 2),
+                'stderr': stderr,
+                'returncode': returncode
+            }
+            if returncode != 0:
+                logger.error(f"스냅샷 일괄 생성 실패: {snap_name}, stderr: {stderr}")
+                response['error'] = '스냅샷 일괄 생성 실패 (실패한 pool의 스냅샷은 하나도 생성되지 않았습니다)'
+                return response, 500
+            logger.info(f"스냅샷 일괄 생성 성공: {len(targets)}개, 이름: {snap_name}, 소요 시간: {response['elapsed_ms']}ms")
+            return response, 201
+        except Exception as e:
+            logger.error(f"스냅샷 일괄 생성 중 예외 발생: {str(e)}", exc_info=True)
+            return {'error': '서버 내부 오류가 발생했습니다.'}, 500
+
 # 스냅샷 목록 조회
+# zfs 출력을 한 줄씩 읽어 페이지 단위(JSON) 또는 NDJSON 스트림으로 반환
 @snapshot_api.route('/list')
 class ListSnapshots(Resource):
-    @snapshot_api.doc(description='스냅샷 목록 조회')
+    @snapshot_api.doc(description='스냅샷 목록 조회', params={
+        'dataset': '조회할 ZFS 이름 (예: pool/zfs)',
+        'pool': '조회할 pool 이름 (dataset 미지정 시 pool 전체)',
+        'recursive': 'dataset 하위 ZFS 스냅샷 포함 여부 (default: false)',
+        'sort': '정렬 기준: creation, used, name (default: creation)',
+        'order': '정렬 순서: asc, desc (default: asc, name은 asc만 지원)',
+        'limit': f'페이지 크기 (default: {SNAPSHOT_PAGE_SIZE}, 최대: {SNAPSHOT_PAGE_MAX})',
+        'cursor': '이전 응답의 next_cursor 값',
+        'format': '응답 형식: json, ndjson (default: json)'
+    })
     @jwt_required()
     def get(self):
-        logger.info("스냅샷 목록 조회 요청 시작")
+        logger.info(f"스냅샷 목록 조회 요청 시작: {dict(request.args)}")
+        args = request.args
+        dataset = args.get('dataset')
+        pool = args.get('pool')
+        recursive = args.get('recursive', 'false').lower() == 'true'
+        sort = args.get('sort', 'creation')
+        order = args.get('order', 'asc')
+        output = args.get('format', 'json')
+
+        if sort not in SNAPSHOT_SORT_KEYS or order not in ('asc', 'desc') or (sort == 'name' and order == 'desc'):
+            return {'error': f'지원하지 않는 정렬 옵션입니다: sort={sort}, order={order}'}, 400
+        if output not in ('json', 'ndjson'):
+            return {'error': f'지원하지 않는 응답 형식입니다: {output}'}, 400
         try:
-            result = subprocess.run(['zfs', 'list', '-t', 'snapshot', '-H', '-o', 'name,used,creation'],
-                                    capture_output=True, text=True, check=True)
+            default_limit = SNAPSHOT_PAGE_SIZE if output == 'json' else 0
+            limit = int(args.get('limit', default_limit))
+            if limit < 0 or limit > SNAPSHOT_PAGE_MAX or (output == 'json' and limit == 0):
+                raise ValueError
+        except ValueError:
+            return {'error': f'limit은 1 ~ {SNAPSHOT_PAGE_MAX} 사이의 정수여야 합니다.'}, 400
+        try:
+            after = decode_cursor(args['cursor'], sort) if args.get('cursor') else None
+        except ValueError as e:
+            return {'error': str(e)}, 400
+
+        if dataset and not zfs_inventory.exists(dataset):
+            logger.warning(f"존재하지 않는 ZFS 스냅샷 목록 요청: {dataset}")
+            return {'error': f'해당 ZFS를 찾을 수 없습니다. : {dataset}'}, 404
+        if not dataset and pool and not is_pool_name_exists(pool):
+            logger.warning(f"존재하지 않는 pool 스냅샷 목록 요청: {pool}")
+            return {'error': f'해당 pool을 찾을 수 없습니다. : {pool}'}, 404
 
-            lines = result.stdout.strip().split('\n')
+        rows = iter_snapshots(dataset, pool, recursive, sort, order, after)
+        if output == 'ndjson':
+            return Response(stream_with_context(_ndjson_snapshots(rows, limit, sort, order)),
+                            mimetype='application/x-ndjson')
+
+        try:
             snapshots = []
-            for line in lines:
-                parts = line.split('\t')
-                if len(parts) == 3:
-                    snapshots.append({
-                        'name': parts[0],
-                        'used': parts[1],
-                        'creation': parts[2]
-                    })
+            next_cursor = None
+            last = None
+            for row in rows:
+                if len(snapshots) == limit:
+                    # 다음 페이지가 존재함 - 마지막 항목 위치를 cursor로 사용
+                    next_cursor = encode_cursor(sort_position(last, sort, order))
+                    break
+                snapshots.append(_snapshot_item(row))
+                last = row
+            rows.close()
             logger.info(f"스냅샷 목록 조회 성공: {len(snapshots)}개")
             return {
                 'snapshots': snapshots,
-                'stderr': result.stderr,
-                'returncode': result.returncode
+                'count': len(snapshots),
+                'next_cursor': next_cursor
             }
-        except subprocess.CalledProcessError as e:
-            logger.error(f"스냅샷 목록 조회 실패: stderr: {e.stderr}", exc_info=True)
+        except SnapshotCommandError as e:
+            logger.error(f"스냅샷 목록 조회 실패: stderr: {e.stderr}")
             return {
                 'error': '스냅샷 목록 조회 실패',
                 'stderr': e.stderr,
@@ -105,10 +297,396 @@ class ListSnapshots(Resource):
             logger.error(f"스냅샷 목록 조회 중 예외 발생: {str(e)}", exc_info=True)
             return {'error': '서버 내부 오류가 발생했습니다.'}, 500
 
+def _snapshot_item(row):
+    return {
+        'name': row['name'],
+        'used': row['used'],
+        'creation': row['creation'],
+        'creation_time': datetime.fromtimestamp(row['creation']).isoformat()
+    }
+
+# NDJSON 스트림 - 클라이언트가 읽는 속도에 맞춰 zfs 출력을 읽음
+# limit 도달 시 마지막 줄에 {"next_cursor": ...} 를 추가
+def _ndjson_snapshots(rows, limit, sort, order):
+    count = 0
+    try:
+        for row in rows:
+            if limit and count == limit:
+                yield json.dumps({'next_cursor': encode_cursor(sort_position(last, sort, order))}) + '\n'
+                break
+            yield json.dumps(_snapshot_item(row), ensure_ascii=False) + '\n'
+            last = row
+            count += 1
+    except SnapshotCommandError as e:
+        logger.error(f"스냅샷 목록 스트리밍 실패: stderr: {e.stderr}")
+        yield json.dumps({'error': '스냅샷 목록 조회 실패', 'stderr': e.stderr, 'returncode': e.returncode}, ensure_ascii=False) + '\n'
+    finally:
+        rows.close()
+        logger.info(f"스냅샷 목록 스트리밍 종료: {count}개")
+
+# 스냅샷 보존 정책 적용
+# 삭제 대상은 first%last 범위와 쉼표 묶음으로 변환해 적은 횟수의 zfs destroy 로 처리
+@snapshot_api.route('/retention')
+class SnapshotRetention(Resource):
+    @snapshot_api.doc(description='스냅샷 보존 정책 적용 (keep-N hourly/daily/weekly/monthly)')
+    @jwt_required()
+    @snapshot_api.expect(retention_model)
+    def post(self):
+        data = request.get_json(silent=True) or {}
+        dataset = data.get('dataset')
+        recursive = bool(data.get('recursive', False))
+        prefix = data.get('prefix') or ''
+        dry_run = data.get('dry_run', True) is not False
+        logger.info(f"스냅샷 보존 정책 적용 요청 - ZFS: {dataset}, 재귀: {recursive}, 정책: {data.get('policy')}, dry_run: {dry_run}")
+
+        if not dataset:
+            return {'error': 'dataset은 필수 항목입니다.'}, 400
+        try:
+            policy = validate_policy(data.get('policy'))
+        except ValueError as e:
+            logger.warning(f"스냅샷 보존 정책 적용 실패 - 잘못된 정책: {str(e)}")
+            return {'error': str(e)}, 400
+        if not zfs_inventory.exists(dataset):
+            logger.warning(f"스냅샷 보존 정책 적용 실패 - 존재하지 않는 ZFS: {dataset}")
+            return {'error': f'해당 ZFS를 찾을 수 없습니다. : {dataset}'}, 404
+
+        try:
+            started = time.perf_counter()
+            targets = [dataset]
+            if recursive:
+                targets += [n for n in zfs_inventory.datasets(dataset.split('/')[0]) if n.startswith(f'{dataset}/')]
+            results = []
+            for name in targets:
+                results.append(apply_retention(name, policy, prefix, dry_run))
+                if not dry_run:
+                    zfs_inventory.mark_stale(name)
+            success = all(r['success'] for r in results)
+            response = {
+                'results': results,
+                'dry_run': dry_run,
+                'pruned': sum(len(r['pruned']) for r in results),
+                'commands': sum(len(r['commands']) for r in results),
+                'reclaimable_bytes': sum(r['reclaimable_bytes'] for r in results) if dry_run else None,
+                'reclaimable_exact': all(r['reclaimable_exact'] for r in results) if dry_run else None,
+                'elapsed_ms': round((time.perf_counter() - started) * 1000, 2)
+            }
+            logger.info(f"스냅샷 보존 정책 적용 완료 - 삭제 대상: {response['pruned']}개, 명령: {response['commands']}회, 성공: {success}")
+            return response, 200 if success else 500
+        except SnapshotCommandError as e:
+            logger.error(f"스냅샷 보존 정책 적용 실패 - 스냅샷 목록 조회 오류: {e.stderr}")
+            return {'error': '스냅샷 목록 조회 실패', 'stderr': e.stderr, 'returncode': e.returncode}, 500
+        except Exception as e:
+            logger.error(f"스냅샷 보존 정책 적용 중 예외 발생: {str(e)}", exc_info=True)
+            return {'error': '서버 내부 오류가 발생했습니다.'}, 500
+
+# 스냅샷 예약 작업 목록 조회 / 등록
+@snapshot_api.route('/schedule')
+class SnapshotScheduleList(Resource):
+    @snapshot_api.doc(description='스냅샷 예약 작업 목록 조회')
+    @jwt_required()
+    def get(self):
+        jobs = snapshot_scheduler.list_jobs()
+        logger.info(f"스냅샷 예약 작업 목록 조회 성공: {len(jobs)}개")
+        return {'jobs': jobs, 'count': len(jobs)}
+
+    @snapshot_api.doc(description='스냅샷 예약 작업 등록')
+    @jwt_required()
+    @snapshot_api.expect(schedule_model)
+    def post(self):
+        data = request.get_json(silent=True) or {}
+        dataset = data.get('dataset')
+        cron = data.get('cron')
+        logger.info(f"스냅샷 예약 작업 등록 요청 - ZFS: {dataset}, cron: {cron}")
+
+        if not dataset or not cron:
+            return {'error': 'dataset과 cron은 필수 항목입니다.'}, 400
+        if not zfs_inventory.exists(dataset):
+            logger.warning(f"스냅샷 예약 작업 등록 실패 - 존재하지 않는 ZFS: {dataset}")
+            return {'error': f'해당 ZFS를 찾을 수 없습니다. : {dataset}'}, 404
+        try:
+            job = snapshot_scheduler.add_job(
+                dataset, cron,
+                recursive=data.get('recursive', False),
+                prefix=data.get('prefix', 'auto-'),
+                retention=data.get('retention'),
+                enabled=data.get('enabled', True)
+            )
+            return job, 201
+        except ValueError as e:
+            logger.warning(f"스냅샷 예약 작업 등록 실패 - {str(e)}")
+            return {'error': str(e)}, 400
+        except Exception as e:
+            logger.error(f"스냅샷 예약 작업 등록 중 예외 발생: {str(e)}", exc_info=True)
+            return {'error': '서버 내부 오류가 발생했습니다.'}, 500
+
+# 스냅샷 예약 작업 실행 이력 및 지연 통계
+@snapshot_api.route('/schedule/history')
+class SnapshotScheduleHistory(Resource):
+    @snapshot_api.doc(description='스냅샷 예약 작업 실행 이력 조회', params={
+        'job_id': '작업 ID (미지정 시 전체)',
+        'limit': '최대 반환 개수 (default: 100)'
+    })
+    @jwt_required()
+    def get(self):
+        try:
+            limit = int(request.args.get('limit', 100))
+        except ValueError:
+            return {'error': 'limit은 정수여야 합니다.'}, 400
+        return snapshot_scheduler.history(request.args.get('job_id'), limit)
+
+# 스냅샷 예약 작업 상세 조회 / 삭제
+@snapshot_api.route('/schedule/<job_id>')
+class SnapshotScheduleDetail(Resource):
+    @snapshot_api.doc(description='스냅샷 예약 작업 상세 조회')
+    @jwt_required()
+    def get(self, job_id):
+        job = snapshot_scheduler.get_job(job_id)
+        if not job:
+            return {'error': f'해당 예약 작업을 찾을 수 없습니다: {job_id}'}, 404
+        return job
+
+    @snapshot_api.doc(description='스냅샷 예약 작업 삭제')
+    @jwt_required()
+    def delete(self, job_id):
+        if not snapshot_scheduler.remove_job(job_id):
+            logger.warning(f"스냅샷 예약 작업 삭제 실패 - 존재하지 않는 작업: {job_id}")
+            return {'error': f'해당 예약 작업을 찾을 수 없습니다: {job_id}'}, 404
+        return {'message': f'예약 작업 {job_id} 삭제 완료'}
+
+# 스냅샷 복제 (zfs send | zfs recv)
+@snapshot_api.route('/replicate')
+class SnapshotReplicationList(Resource):
+    @snapshot_api.doc(description='스냅샷 복제 작업 목록 조회')
+    @jwt_required()
+    def get(self):
+        jobs = replication_manager.list()
+        return {'jobs': jobs, 'count': len(jobs)}
+
+    @snapshot_api.doc(description='스냅샷 복제 시작 (증분 전송 및 이어받기 지원)')
+    @jwt_required()
+    @snapshot_api.expect(replication_model)
+    def post(self):
+        data = request.get_json(silent=True) or {}
+        snapshot_name = data.get('snapshot')
+        base_snapshot = data.get('base_snapshot')
+        target = data.get('target')
+        logger.info(f"스냅샷 복제 요청 - 스냅샷: {snapshot_name}, 기준: {base_snapshot}, 대상: {target}")
+
+        if not snapshot_name or not target:
+            return {'error': 'snapshot과 target은 필수 항목입니다.'}, 400
+        for name in filter(None, (snapshot_name, base_snapshot)):
+            if not re.match(r'^([\w\-./]+)@([\w\-.:]+)$', name):
+                return {'error': f'스냅샷 이름 형식이 잘못되었습니다: {name}'}, 400
+        source = snapshot_name.split('@')[0]
+        if base_snapshot and base_snapshot.split('@')[0] != source:
+            return {'error': '기준 스냅샷은 전송할 스냅샷과 같은 ZFS의 스냅샷이어야 합니다.'}, 400
+        if not zfs_inventory.exists(source):
+            return {'error': f'해당 ZFS를 찾을 수 없습니다. : {source}'}, 404
+        snapshot_names = list_dataset_snapshots(source)
+        missing = [n for n in filter(None, (snapshot_name, base_snapshot)) if n not in snapshot_names]
+        if missing:
+            logger.warning(f"스냅샷 복제 실패 - 존재하지 않는 스냅샷: {missing}")
+            return {'error': f'해당 스냅샷이 존재하지 않습니다: {missing}'}, 404
+        # 수신 대상의 상위 ZFS(또는 pool)는 존재해야 함
+        parent = target.rsplit('/', 1)[0] if '/' in target else None
+        if not parent or not zfs_inventory.exists(parent):
+            return {'error': f'수신 대상의 상위 ZFS를 찾을 수 없습니다. : {parent or target}'}, 400
+
+        try:
+            job = replication_manager.submit(ReplicationJob(
+                snapshot_name, target, base=base_snapshot,
+                compressed=data.get('compressed', True),
+                large_blocks=data.get('large_blocks', True),
+                force=data.get('force', False),
+                resume=data.get('resume', True)
+            ))
+            logger.info(f"스냅샷 복제 작업 등록 - 작업: {job.id}")
+            return job.to_dict(), 202
+        except ValueError as e:
+            return {'error': str(e)}, 409
+        except Exception as e:
+            logger.error(f"스냅샷 복제 요청 중 예외 발생: {str(e)}", exc_info=True)
+            return {'error': '서버 내부 오류가 발생했습니다.'}, 500
+
+# 스냅샷 복제 작업 상태 (전송량, 속도, ETA, 재개 토큰)
+@snapshot_api.route('/replicate/<job_id>')
+class SnapshotReplicationDetail(Resource):
+    @snapshot_api.doc(description='스냅샷 복제 작업 상태 조회')
+    @jwt_required()
+    def get(self, job_id):
+        job = replication_manager.get(job_id)
+        if not job:
+            return {'error': f'해당 복제 작업을 찾을 수 없습니다: {job_id}'}, 404
+        return job
+
+# 스냅샷 간(또는 스냅샷과 현재 상태) 변경 내역 스트리밍
+# zfs diff 출력을 NDJSON 으로 한 줄씩 전달하므로 변경 파일 수와 관계없이 메모리 사용량이 일정함
+@snapshot_api.route('/diff')
+class SnapshotDiff(Resource):
+    @snapshot_api.doc(description='스냅샷 변경 내역 조회 (NDJSON 스트림)', params={
+        'from': '기준 스냅샷 (예: pool/zfs@240524-153000, dataset 지정 시 240524-153000)',
+        'to': '비교 스냅샷 (미지정 시 현재 파일시스템)',
+        'dataset': 'from/to 에 스냅샷 이름만 쓸 때의 ZFS 이름 (예: pool/zfs)',
+        'path_prefix': '경로 접두어 필터 (상대 경로는 마운트 지점 기준)',
+        'types': '변경 유형 필터, 쉼표 구분: M(수정), +(생성), -(삭제), R(이름 변경)',
+        'limit': '최대 반환 항목 수 (default: 제한 없음)'
+    })
+    @jwt_required()
+    def get(self):
+        args = request.args
+        dataset = args.get('dataset')
+        from_snapshot = args.get('from')
+        to = args.get('to')
+        logger.info(f"스냅샷 변경 내역 조회 요청: {dict(args)}")
+
+        if not from_snapshot:
+            return {'error': 'from은 필수 항목입니다.'}, 400
+        # CreateSnapshot 과 같은 pool/zfs@이름 규칙, 이름만 주어지면 dataset 기준으로 확장
+        if '@' not in from_snapshot and dataset:
+            from_snapshot = f'{dataset}@{from_snapshot}'
+        if to and '@' not in to and dataset:
+            to = f'{dataset}@{to}'
+        match = re.match(r'^([\w\-./]+)@([\w\-.:]+)$', from_snapshot)
+        if not match:
+            return {'error': '스냅샷 이름 형식이 잘못되었습니다. 예: pool/zfs@20240609-153000'}, 400
+        source = match.group(1)
+        if to and to.split('@')[0] != source:
+            return {'error': '비교 대상은 같은 ZFS의 스냅샷이어야 합니다.'}, 400
+
+        types = set(filter(None, args.get('types', '').replace(' ', '+').split(',')))
+        if types - set(DIFF_CHANGE_TYPES):
+            return {'error': f'알 수 없는 변경 유형입니다: {sorted(types - set(DIFF_CHANGE_TYPES))}'}, 400
+        try:
+            limit = int(args.get('limit', 0))
+        except ValueError:
+            return {'error': 'limit은 정수여야 합니다.'}, 400
+
+        dataset_info = zfs_inventory.get(source)
+        if not dataset_info:
+            return {'error': f'해당 ZFS를 찾을 수 없습니다. : {source}'}, 404
+        snapshot_names = list_dataset_snapshots(source)
+        missing = [n for n in filter(None, (from_snapshot, to)) if '@' in n and n not in snapshot_names]
+        if missing:
+            return {'error': f'해당 스냅샷이 존재하지 않습니다: {missing}'}, 404
+
+        path_prefix = args.get('path_prefix')
+        if path_prefix and not path_prefix.startswith('/'):
+            path_prefix = f"{dataset_info['mountpoint'].rstrip('/')}/{path_prefix}"
+
+        rows = iter_diff(from_snapshot, to or source, path_prefix, types or None)
+        return Response(stream_with_context(_ndjson_diff(rows, limit)), mimetype='application/x-ndjson')
+
+def _ndjson_diff(rows, limit):
+    count = 0
+    try:
+        for row in rows:
+            yield json.dumps(row, ensure_ascii=False) + '\n'
+            count += 1
+            if limit and count >= limit:
+                break
+    except SnapshotCommandError as e:
+        logger.error(f"스냅샷 변경 내역 스트리밍 실패: stderr: {e.stderr}")
+        yield json.dumps({'error': '스냅샷 변경 내역 조회 실패', 'stderr': e.stderr, 'returncode': e.returncode}, ensure_ascii=False) + '\n'
+    finally:
+        rows.close()
+        logger.info(f"스냅샷 변경 내역 스트리밍 종료: {count}개")
+
+# 스냅샷 이름 형식 확인 (pool/zfs@이름)
+def _is_snapshot_name(name):
+    return bool(name) and re.match(r'^([\w\-./]+)@([\w\-.:]+)$', name) is not None
+
+# 스냅샷 내부 디렉토리 탐색 (<mountpoint>/.zfs/snapshot/<이름>/)
+@snapshot_api.route('/browse')
+class SnapshotBrowse(Resource):
+    @snapshot_api.doc(description='스냅샷 내부 디렉토리 목록 조회', params={
+        'snapshot': '스냅샷 전체 이름 (예: pool/zfs@240524-153000)',
+        'path': '마운트 지점 기준 상대 경로 (default: 최상위)',
+        'offset': '시작 위치 (default: 0)',
+        'limit': '최대 반환 개수 (default: 1000)'
+    })
+    @jwt_required()
+    def get(self):
+        snapshot_name = request.args.get('snapshot')
+        path = request.args.get('path', '')
+        if not _is_snapshot_name(snapshot_name):
+            return {'error': '스냅샷 이름 형식이 잘못되었습니다. 예: pool/zfs@20240609-153000'}, 400
+        try:
+            offset = int(request.args.get('offset', 0))
+            limit = int(request.args.get('limit', 1000))
+        except ValueError:
+            return {'error': 'offset, limit은 정수여야 합니다.'}, 400
+        try:
+            entries = list_snapshot_directory(snapshot_name, path)
+            return {
+                'snapshot': snapshot_name,
+                'path': path,
+                'entries': list(entries[offset:offset + limit]),
+                'total': len(entries)
+            }
+        except SnapshotPathError as e:
+            logger.warning(f"스냅샷 디렉토리 조회 실패 - 스냅샷: {snapshot_name}, 경로: {path}, 오류: {str(e)}")
+            return {'error': str(e)}, e.status
+        except Exception as e:
+            logger.error(f"스냅샷 디렉토리 조회 중 예외 발생: {str(e)}", exc_info=True)
+            return {'error': '서버 내부 오류가 발생했습니다.'}, 500
+
+# 스냅샷 파일 다운로드 - Range 요청 지원, 본문은 wsgi.file_wrapper(sendfile)로 전송
+@snapshot_api.route('/download')
+class SnapshotDownload(Resource):
+    @snapshot_api.doc(description='스냅샷 파일 다운로드 (Range 요청 지원)', params={
+        'snapshot': '스냅샷 전체 이름 (예: pool/zfs@240524-153000)',
+        'path': '마운트 지점 기준 파일 상대 경로'
+    })
+    @jwt_required()
+    def get(self):
+        snapshot_name = request.args.get('snapshot')
+        path = request.args.get('path', '')
+        if not _is_snapshot_name(snapshot_name):
+            return {'error': '스냅샷 이름 형식이 잘못되었습니다. 예: pool/zfs@20240609-153000'}, 400
+        try:
+            file_path = resolve_snapshot_path(snapshot_name, path)
+            if not os.path.isfile(file_path):
+                return {'error': f'파일이 아닙니다: {path}'}, 400
+            logger.info(f"스냅샷 파일 다운로드 - 스냅샷: {snapshot_name}, 경로: {path}, Range: {request.headers.get('Range')}")
+            return send_file(file_path, as_attachment=True, conditional=True)
+        except SnapshotPathError as e:
+            logger.warning(f"스냅샷 파일 다운로드 실패 - 스냅샷: {snapshot_name}, 경로: {path}, 오류: {str(e)}")
+            return {'error': str(e)}, e.status
+        except Exception as e:
+            logger.error(f"스냅샷 파일 다운로드 중 예외 발생: {str(e)}", exc_info=True)
+            return {'error': '서버 내부 오류가 발생했습니다.'}, 500
+
+# 스냅샷의 파일/디렉토리만 현재 파일시스템으로 복원 (롤백 없이 다른 데이터와 이후 스냅샷 유지)
+@snapshot_api.route('/restore')
+class SnapshotRestore(Resource):
+    @snapshot_api.doc(description='스냅샷 파일/디렉토리 복원')
+    @jwt_required()
+    @snapshot_api.expect(snapshot_restore_model)
+    def post(self):
+        data = request.get_json(silent=True) or {}
+        snapshot_name = data.get('snapshot')
+        path = data.get('path')
+        logger.info(f"스냅샷 파일 복원 요청 - 스냅샷: {snapshot_name}, 경로: {path}, 대상: {data.get('target_path')}")
+
+        if not _is_snapshot_name(snapshot_name) or not path:
+            return {'error': 'snapshot(pool/zfs@이름)과 path는 필수 항목입니다.'}, 400
+        try:
+            started = time.perf_counter()
+            result = restore_from_snapshot(snapshot_name, path, data.get('target_path'), bool(data.get('overwrite')))
+            zfs_inventory.mark_stale(snapshot_name.split('@')[0])
+            result['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 2)
+            return result, 200
+        except SnapshotPathError as e:
+            logger.warning(f"스냅샷 파일 복원 실패 - 스냅샷: {snapshot_name}, 경로: {path}, 오류: {str(e)}")
+            return {'error': str(e)}, e.status
+        except Exception as e:
+            logger.error(f"스냅샷 파일 복원 중 예외 발생: {str(e)}", exc_info=True)
+            return {'error': '서버 내부 오류가 발생했습니다.'}, 500
+
 # 스냅샷 롤백
 @snapshot_api.route('/rollback')
 class RollbackSnapshot(Resource):
-    @snapshot_api.doc(description='스냅샷 롤백')
+    @snapshot_api.doc(description='스냅샷 롤백', params={'async': '작업 등록 후 바로 202 응답 (true | false, default: false)'})
     @jwt_required()
     @snapshot_api.expect(snapshot_rollback_model)
     def post(self):
@@ -132,29 +710,27 @@ class RollbackSnapshot(Resource):
                 return {'error': f'해당 pool을 찾을 수 없습니다: {pool_name}'}, 400
 
             # zfs 존재 여부 확인
-            check = subprocess.run(['zfs', 'list', zfs_full_name], capture_output=True, text=True)
-            if check.returncode != 0:
+            if not zfs_inventory.exists(zfs_full_name):
                 logger.warning(f"존재하지 않는 ZFS 롤백 요청: {zfs_full_name}")
                 return {'error': f'ZFS 파일시스템이 존재하지 않습니다: {zfs_full_name}'}, 400
 
-            # 스냅샷 존재 여부 확인
-            snapshot_check = subprocess.run(
-                ['zfs', 'list', '-t', 'snapshot', '-H', '-o', 'name'],
-                capture_output=True, text=True
-            )
-            snapshot_names = snapshot_check.stdout.strip().split('\n')
+            # 스냅샷 존재 여부 확인 (해당 ZFS의 스냅샷만 조회)
+            snapshot_names = list_dataset_snapshots(zfs_full_name)
             if snapshot_name not in snapshot_names:
-                # 해당 ZFS의 스냅샷 목록 필터링
-                related = [s for s in snapshot_names if s.startswith(f'{zfs_full_name}@')]
                 logger.warning(f"존재하지 않는 스냅샷 롤백 요청: {snapshot_name}")
                 return {
                     'error': f'해당 스냅샷이 존재하지 않습니다: {snapshot_name}',
-                    '해당 ZFS의 스냅샷 목록': related
+                    '해당 ZFS의 스냅샷 목록': snapshot_names
                 }, 404
             
             # 롤백
-            result = subprocess.run(['zfs', 'rollback', '-r', snapshot_name],
-                                    capture_output=True, text=True, check=True)
+            job = job_manager.submit('zfs.rollback', pool_name, snapshot_name, ['zfs', 'rollback', '-r', snapshot_name],
+                                     on_success=lambda: zfs_inventory.mark_stale(zfs_full_name),
+                                     event=('dataset.rolled_back', {'pool': pool_name, 'name': snapshot_name}))
+            if async_requested():
+                logger.info(f"스냅샷 롤백 작업 등록 - 스냅샷: {snapshot_name}, 작업: {job['id']}")
+                return job_accepted(job)
+            result = job_manager.result(job['id'])
             logger.info(f"스냅샷 롤백 성공: {snapshot_name}")
             return {
                 'message': f'롤백 완료: {snapshot_name}',
@@ -199,32 +775,26 @@ class DeleteSnapshot(Resource):
                 return {'error': f'해당 pool을 찾을 수 없습니다: {pool_name}'}, 400
 
             # zfs 존재 여부 확인
-            check = subprocess.run(['zfs', 'list', zfs_full_name], capture_output=True, text=True)
-            if check.returncode != 0:
+            if not zfs_inventory.exists(zfs_full_name):
                 logger.warning(f"존재하지 않는 ZFS 삭제 요청: {zfs_full_name}")
                 return {'error': f'ZFS 파일시스템이 존재하지 않습니다: {zfs_full_name}'}, 400
 
-            # 스냅샷 존재 여부 확인
-            snapshot_check = subprocess.run(
-                ['zfs', 'list', '-t', 'snapshot', '-H', '-o', 'name'],
-                capture_output=True, text=True
-            )
-            snapshot_names = snapshot_check.stdout.strip().split('\n')
+            # 스냅샷 존재 여부 확인 (해당 ZFS의 스냅샷만 조회)
+            snapshot_names = list_dataset_snapshots(zfs_full_name)
             if snapshot_name not in snapshot_names:
-                related = [s for s in snapshot_names if s.startswith(f'{zfs_full_name}@')]
                 logger.warning(f"존재하지 않는 스냅샷 삭제 요청: {snapshot_name}")
                 return {
                     'error': f'해당 스냅샷이 존재하지 않습니다: {snapshot_name}',
-                    '해당 ZFS의 스냅샷 목록': related
+                    '해당 ZFS의 스냅샷 목록': snapshot_names
                 }, 404
 
             # 삭제
-            result = subprocess.run(
+            result = run_command(
                 ['zfs', 'destroy', snapshot_name],
-                capture_output=True,
-                text=True,
                 check=True
             )
+            zfs_inventory.mark_stale(zfs_full_name)
+            publish_event('snapshot.destroyed', pool=pool_name, name=snapshot_name)
             logger.info(f"스냅샷 삭제 성공: {snapshot_name}")
             return {
                 'message': f'Snapshot {snapshot_name} deleted successfully',
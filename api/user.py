@@ -5,11 +5,10 @@ from flask_jwt_extended import (
     create_access_token, create_refresh_token,
     jwt_required, get_jwt_identity, get_jwt
 )
-from utils.blocklist import BLOCKLIST
-from utils.jwt_utils import (
-    load_users, save_users, authenticate_user, is_ip_allowed
-)
-import datetime
+from utils.blocklist import add_to_blocklist, BlocklistFull
+from utils.login_guard import login_guard, LoginBusyError
+from utils.user_store import user_store
+import datetime, math
 from werkzeug.security import generate_password_hash
 from utils.logger import get_logger
 
@@ -48,11 +47,20 @@ class UserLogin(Resource):
 
             logger.info(f"로그인 시도 - 사용자: {username}, IP: {client_ip}")
 
-            if not is_ip_allowed(client_ip):
-                logger.info(f"접근 차단 - 허용되지 않은 IP: {client_ip}")
-                return {'error': '접근이 허용되지 않은 IP입니다.'}, 403
+            throttled = login_guard.throttle(client_ip, username)
+            if throttled:
+                reason, retry_after = throttled
+                logger.warning(f"로그인 제한 - 사용자: {username}, IP: {client_ip}, 기준: {reason}")
+                return {'error': '로그인 시도가 너무 많습니다. 잠시 후 다시 시도하세요.'}, 429, \
+                       {'Retry-After': str(math.ceil(retry_after))}
+
+            try:
+                authenticated = login_guard.verify(username, password)
+            except LoginBusyError:
+                logger.warning(f"로그인 제한 - 사용자: {username}, IP: {client_ip}, 해시 검증 대기열 가득 참")
+                return {'error': '로그인 요청이 많아 처리할 수 없습니다. 잠시 후 다시 시도하세요.'}, 429, {'Retry-After': '1'}
 
-            if not authenticate_user(username, password):
+            if not authenticated:
                 logger.info(f"로그인 실패 - 사용자: {username}, 잘못된 아이디 또는 비밀번호")
                 return {'error': '잘못된 사용자 이름 또는 비밀번호입니다.'}, 401
 
@@ -71,6 +79,14 @@ class UserLogin(Resource):
             logger.error(f"로그인 처리 중 예외 발생: {e}", exc_info=True)
             return {'error': '서버 내부 오류가 발생했습니다.'}, 500
 
+# 로그인 처리 통계 (해시 검증 시간, 제한 횟수)
+@user_api.route('/login/stats')
+class UserLoginStats(Resource):
+    @user_api.doc(description='로그인 처리 통계 조회')
+    @jwt_required()
+    def get(self):
+        return login_guard.stats()
+
 # 로그아웃
 @user_api.route('/logout')
 class UserLogout(Resource):
@@ -78,12 +94,18 @@ class UserLogout(Resource):
     @jwt_required()
     def post(self):
         try:
-            jti = get_jwt()['jti']
+            claims = get_jwt()
+            jti = claims['jti']
             username = get_jwt_identity()
-            add_to_blocklist(jti)
+            # 토큰 만료 시각까지만 보관
+            add_to_blocklist(jti, claims.get('exp'))
             logger.info(f"로그아웃 - 사용자: {username}, 토큰 JTI: {jti}")
             return {'message': '로그아웃 완료'}, 200
 
+        except BlocklistFull as e:
+            # 토큰을 폐기하지 못했으므로 로그아웃 실패로 응답 (토큰은 만료 시각까지 유효)
+            logger.error(f"로그아웃 실패 - {str(e)}")
+            return {'error': '토큰을 폐기하지 못했습니다. 잠시 후 다시 시도하세요.'}, 503
         except Exception as e:
             logger.error(f"로그아웃 처리 중 예외 발생: {e}", exc_info=True)
             return {'error': '서버 내부 오류가 발생했습니다.'}, 500
@@ -129,16 +151,11 @@ class UserRegister(Resource):
 
             logger.info(f"사용자 등록 시도 - 사용자: {username}")
 
-            users = load_users()
-            if username in users:
+            # 존재 여부 확인과 추가를 저장소 잠금 안에서 한 번에 처리
+            if not user_store.add(username, {'password': generate_password_hash(password)}):
                 logger.info(f"사용자 등록 실패 - 이미 존재하는 ID: {username}")
                 return {'error': '이미 존재하는 사용자 ID입니다.'}, 400
 
-            users[username] = {
-                'password': generate_password_hash(password)
-            }
-            save_users(users)
-
             logger.info(f"사용자 등록 성공 - 사용자: {username}")
             return {'message': f'사용자 {username} 등록 완료'}, 201
 
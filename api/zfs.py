@@ -1,8 +1,12 @@
 from flask import request
 from flask_restx import Namespace, Resource, fields
 from flask_jwt_extended import jwt_required
-import subprocess
+import subprocess, re
 from utils.zpool_utils import is_pool_name_exists
+from utils.zfs_inventory import zfs_inventory
+from utils.command_runner import run_command
+from utils.jobs import job_manager, async_requested, job_accepted
+from utils.events import publish_event
 from utils.logger import get_logger
 
 zfs_api = Namespace('zfs', description='ZFS 관련 API')
@@ -31,7 +35,7 @@ class ZFS_list(Resource):
         logger.info("zfs 전체 조회 요청")
         try: 
             columns = ['NAME', 'USED', 'AVAIL', 'REFER', 'MOUNTPOINT']
-            result = subprocess.run(['zfs', 'list', '-H', '-o', 'name,used,avail,refer,mountpoint'], capture_output=True, encoding='utf-8')
+            result = run_command(['zfs', 'list', '-H', '-o', 'name,used,avail,refer,mountpoint'])
             lines = result.stdout.strip().split('\n')
 
             zfs_list = []
@@ -72,10 +76,9 @@ class ZFS_Status(Resource):
                 logger.warning(f"zfs 속성 조회 실패: 존재하지 않는 pool {pool_name}")
                 return {'error': f'해당 pool을 찾을 수 없습니다. : {pool_name}'}
             # 존재하는 zfs인지 확인
-            check = subprocess.run(['zfs', 'list', full_name], capture_output=True, text=True)
-            if check.returncode != 0:
-                logger.warning(f"zfs 속성 조회 실패: 존재하지 않는 ZFS {full_name}, stderr: {check.stderr}")
-                return {'error': f'해당 ZFS를 찾을 수 없습니다. : {full_name}', 'stderr':check.stderr}, 400
+            if not zfs_inventory.exists(full_name):
+                logger.warning(f"zfs 속성 조회 실패: 존재하지 않는 ZFS {full_name}")
+                return {'error': f'해당 ZFS를 찾을 수 없습니다. : {full_name}'}, 400
             
             key_props = [
                 "type", "creation", "used", "available", "referenced", "mounted", "mountpoint",
@@ -84,7 +87,7 @@ class ZFS_Status(Resource):
 
             cmd = ["zfs", "get", ",".join(key_props), full_name]
         
-            result = subprocess.run(cmd, capture_output=True, text=True)
+            result = run_command(cmd)
 
             lines = result.stdout.strip().split("\n")
             # 첫 줄은 헤더이므로 제외하고 파싱
@@ -116,7 +119,7 @@ class ZFSCreate(Resource):
         data = request.json
         pool_name = data.get('pool_name')
         zfs_name = data.get('zfs_name')
-        full_name = f"{pool}/{zfs}"
+        full_name = f"{pool_name}/{zfs_name}"
 
         # zfs 이름 규칙
         # 허용 문자 : 영문자, 숫자, -, _, .
@@ -132,40 +135,43 @@ class ZFSCreate(Resource):
                 logger.warning(f"zfs 생성 실패: 존재하지 않는 pool {pool_name}")
                 return {'error': f'해당 pool을 찾을 수 없습니다. : {pool_name}'}
             # 중복 여부 확인
-            check = subprocess.run(['zfs', 'list', full_name], capture_output=True, text=True)
-            if check.returncode == 0:
+            if zfs_inventory.exists(full_name):
                 logger.warning(f"zfs 생성 실패: 이미 존재하는 ZFS {full_name}")
                 return {'error': f'ZFS {full_name}은(는) 이미 존재합니다.'}, 400
             
             # 1. 파일시스템 생성
-            subprocess.run(['zfs', 'create', full_name], check=True)
+            run_command(['zfs', 'create', full_name], check=True)
 
             # 2. 권한 설정 (기본값: 775)
             mount_path = f"/{full_name}"
-            subprocess.run(['chmod', '775', mount_path], check=True)
+            run_command(['chmod', '775', mount_path], check=True)
 
             # 3. 속성 설정 (있을 때만)
             if data.get('quota'):
-                subprocess.run(['zfs', 'set', f"quota={data['quota']}G", full_name], check=True)
+                run_command(['zfs', 'set', f"quota={data['quota']}G", full_name], check=True)
             if data.get('compression'):
-                subprocess.run(['zfs', 'set', f"compression={data['compression']}", full_name], check=True)
+                run_command(['zfs', 'set', f"compression={data['compression']}", full_name], check=True)
             if data.get('readonly'):
-                subprocess.run(['zfs', 'set', f"readonly={data['readonly']}", full_name], check=True)
+                run_command(['zfs', 'set', f"readonly={data['readonly']}", full_name], check=True)
             if data.get('mountpoint'):
-                subprocess.run(['zfs', 'set', f"mountpoint={data['mountpoint']}", full_name], check=True)
+                run_command(['zfs', 'set', f"mountpoint={data['mountpoint']}", full_name], check=True)
+            zfs_inventory.reload_dataset(full_name)
+            publish_event('dataset.created', pool=pool_name, name=full_name)
             logger.info(f"zfs 생성 성공: {full_name}")
             return {
                 'message': f'{full_name} 생성 및 설정이 완료되었습니다.'
                 }, 201
 
         except subprocess.CalledProcessError as e:
+            # 생성 후 속성 설정 단계에서 실패한 경우에도 인벤토리에 반영
+            zfs_inventory.reload_dataset(full_name)
             logger.error(f"zfs 생성 중 오류 발생: {str(e)}")
             return {'error': f'ZFS 생성 중 오류가 발생했습니다: {str(e)}'}, 500
 
 # zfs 삭제
 @zfs_api.route('/delete/<pool_name>/<zfs_name>')
 class DeleteZFS(Resource):
-    @zfs_api.doc(description='zfs 삭제')
+    @zfs_api.doc(description='zfs 삭제', params={'async': '작업 등록 후 바로 202 응답 (true | false, default: false)'})
     @jwt_required()
     def delete(self, pool_name, zfs_name):
         full_name = f'{pool_name}/{zfs_name}'
@@ -176,17 +182,17 @@ class DeleteZFS(Resource):
                 logger.warning(f"zfs 삭제 실패: 존재하지 않는 pool {pool_name}")
                 return {'error': f'해당 pool을 찾을 수 없습니다. : {pool_name}'}
             # 존재하는 zfs인지 확인
-            check = subprocess.run(['zfs', 'list', full_name], capture_output=True, text=True)
-            if check.returncode != 0:
-                logger.warning(f"zfs 삭제 실패: 존재하지 않는 ZFS {full_name}, stderr: {check.stderr}")
-                return {'error': f'해당 ZFS를 찾을 수 없습니다. : {full_name}', 'stderr':check.stderr}, 400
-
-            result = subprocess.run(
-                ['zfs', 'destroy', full_name],
-                capture_output=True,
-                encoding='utf-8',
-                check=True
-            )
+            if not zfs_inventory.exists(full_name):
+                logger.warning(f"zfs 삭제 실패: 존재하지 않는 ZFS {full_name}")
+                return {'error': f'해당 ZFS를 찾을 수 없습니다. : {full_name}'}, 400
+
+            job = job_manager.submit('zfs.destroy', pool_name, full_name, ['zfs', 'destroy', full_name],
+                                     on_success=lambda: zfs_inventory.remove(full_name),
+                                     event=('dataset.destroyed', {'pool': pool_name, 'name': full_name}))
+            if async_requested():
+                logger.info(f"zfs 삭제 작업 등록 - ZFS: {full_name}, 작업: {job['id']}")
+                return job_accepted(job)
+            result = job_manager.result(job['id'])
             logger.info(f"zfs 삭제 성공: {full_name}")
             return {
                 'message': f'ZFS {full_name}가 삭제되었습니다.',
@@ -1,8 +1,15 @@
 from flask import jsonify, request
 from flask_restx import Namespace, Resource, fields
 from flask_jwt_extended import jwt_required
-import subprocess, os, re
-from utils.zpool_utils import is_device_in_use, is_pool_name_exists, get_smart_health
+import subprocess, math, os, re, time
+from concurrent.futures import wait
+from utils.zpool_utils import (
+    is_device_in_use, is_pool_name_exists, get_in_use_devices, list_physical_disks
+)
+from utils.smart_cache import smart_cache, SMART_REFRESH_WAIT_MAX
+from utils.zfs_inventory import zfs_inventory
+from utils.command_runner import run_command
+from utils.jobs import job_manager, async_requested, job_accepted
 from utils.logger import get_logger
 
 zpool_api = Namespace('zpool', description='Zpool 관련 API')
@@ -14,6 +21,16 @@ zpool_create_model = zpool_api.model('CreateZpool', {
     'devices': fields.List(fields.String, required=True, description='디바이스 목록'),
     'spares': fields.List(fields.String, required=False, description='핫 스페어 디바이스 목록')
 })
+
+smart_refresh_model = zpool_api.model('SmartRefresh', {
+    'devices': fields.List(fields.String, required=False, description='갱신할 디바이스 목록 (미지정 시 전체 디스크)'),
+    'wait': fields.Boolean(required=False, description='갱신 완료까지 대기 여부 (default: false)'),
+    'timeout': fields.Integer(required=False, description=f'대기 시간(초) (default: 30, 최대 {SMART_REFRESH_WAIT_MAX})')
+})
+
+# 단계별 소요 시간(ms)
+def _elapsed_ms(started):
+    return round((time.perf_counter() - started) * 1000, 2)
     
 # 물리 디스크 목록
 # @zpool_bp.route('/disks', methods=['GET'])
@@ -25,37 +42,36 @@ class DiskList(Resource):
     def get(self):
         try: 
             logger.info(f"물리 디스크 목록 조회 요청")
-            # 루트가 마운트된 디스크명 추출
-            os_disk = ''
-            result = subprocess.run("findmnt -n -o SOURCE /boot", shell=True, capture_output=True, text=True)
-            match = re.findall(r'/dev/([a-z]+)', result.stdout.strip())
-            if match:
-                os_disk = match[0]
-            logger.info(f"OS Disk: {os_disk}")
-
-            # 이름, 사이즈(GB), 모델명, 타입 출력
-            lsblk_result = subprocess.run("lsblk -dn -o NAME,SIZE,MODEL,TYPE -P", shell=True, capture_output=True, encoding='utf-8')
-            lines = lsblk_result.stdout.strip().split('\n')
-
-            disks = []
-            for line in lines:
-                attrs = dict(re.findall(r'(\w+)="(.*?)"', line))
-                if fields.get('TYPE') != 'disk':
-                    continue
-                if attrs.get('NAME') == os_disk:
-                    continue
-                dev_path = f"/dev/{attrs['NAME']}"
-                disks.append({
-                    'name': attrs['NAME'],
-                    'path': dev_path,
-                    'size': fields.get('SIZE'),
-                    'model': fields.get('MODEL'),
-                    'in_use': is_device_in_use(dev_path),
-                    'health': get_smart_health(dev_path)
-                })
-            logger.info(f"물리 디스크 목록 조회 성공, 총 {len(disks)}개 디스크 발견")
+            timings = {}
+            started = time.perf_counter()
+            disks, lsblk_result = list_physical_disks()
+            timings['lsblk'] = _elapsed_ms(started)
+
+            # zpool status -P 는 한 번만 실행
+            stage = time.perf_counter()
+            in_use = get_in_use_devices()
+            for disk in disks:
+                disk['in_use'] = is_device_in_use(disk['path'], in_use)
+            timings['zpool_status'] = _elapsed_ms(stage)
+
+            # SMART 상태는 백그라운드 캐시에서 조회 (smartctl 실행 없음)
+            stage = time.perf_counter()
+            for disk in disks:
+                smart = smart_cache.get(disk['path'])
+                disk['health'] = smart['health']
+                disk['health_checked_at'] = smart['checked_at']
+                disk['stale'] = smart['stale']
+            timings['smart_cache'] = _elapsed_ms(stage)
+            timings['total'] = _elapsed_ms(started)
+
+            logger.info(f"물리 디스크 목록 조회 성공, 총 {len(disks)}개 디스크 발견, 소요 시간: {timings['total']}ms")
             return {
                 'disks': disks,
+                'meta': {
+                    'timings_ms': timings,
+                    'smart_ttl': smart_cache.ttl,
+                    'smart_refresh_interval': smart_cache.interval
+                },
                 'stderr': lsblk_result.stderr,
                 'returncode': lsblk_result.returncode
             }, 200
@@ -71,6 +87,52 @@ class DiskList(Resource):
                 logger.error(f"물리 디스크 목록 조회 중 예외 발생: {str(e)}", exc_info=True)
                 return {'error': '서버 내부 오류가 발생했습니다.'}, 500
 
+# SMART 상태 즉시 갱신
+# 동시에 들어온 요청은 디바이스당 하나의 smartctl 실행 결과를 공유
+@zpool_api.route('/disks/smart/refresh')
+class SmartRefresh(Resource):
+    @zpool_api.doc(description='SMART 상태 즉시 갱신')
+    @jwt_required()
+    @zpool_api.expect(smart_refresh_model)
+    def post(self):
+        try:
+            data = request.get_json(silent=True) or {}
+            devices = data.get('devices')
+            try:
+                timeout = float(data.get('timeout', 30))
+            except (TypeError, ValueError):
+                logger.warning(f"SMART 갱신 실패 - 잘못된 timeout: {data.get('timeout')}")
+                return {'error': 'timeout은 숫자여야 합니다.'}, 400
+            if not math.isfinite(timeout):
+                logger.warning(f"SMART 갱신 실패 - 잘못된 timeout: {data.get('timeout')}")
+                return {'error': 'timeout은 유한한 숫자여야 합니다.'}, 400
+            timeout = min(max(timeout, 0), SMART_REFRESH_WAIT_MAX)
+            # smartctl 인자로 넘어가므로 물리 디스크 목록에 있는 경로만 허용
+            known = [disk['path'] for disk in list_physical_disks()[0]]
+            if devices is None:
+                devices = known
+            elif not isinstance(devices, list):
+                logger.warning("SMART 갱신 실패 - 잘못된 데이터 형식")
+                return {'error': 'devices는 리스트 형식이어야 합니다.'}, 400
+            unknown = [device for device in devices if device not in known]
+            if unknown:
+                logger.warning(f"SMART 갱신 실패 - 물리 디스크가 아닌 디바이스: {unknown}")
+                return {'error': f'물리 디스크 목록에 없는 디바이스입니다: {unknown}'}, 400
+
+            logger.info(f"SMART 상태 갱신 요청 - 디바이스: {devices}")
+            futures = smart_cache.refresh(devices)
+            if not data.get('wait'):
+                return {'message': 'SMART 상태 갱신이 예약되었습니다.', 'devices': devices}, 202
+
+            _, pending = wait(futures.values(), timeout=timeout)
+            return {
+                'devices': {device: smart_cache.get(device) for device in devices},
+                'pending': [device for device, future in futures.items() if future in pending]
+            }, 200
+        except Exception as e:
+            logger.error(f"SMART 상태 갱신 중 예외 발생: {str(e)}", exc_info=True)
+            return {'error': '서버 내부 오류가 발생했습니다.'}, 500
+
 # zpool 전체 목록 조회
 # @zpool_bp.route('/list', methods=['GET'])
 @zpool_api.route('/list')
@@ -80,7 +142,7 @@ class ZpoolList(Resource):
     def get(self):
         try:
             logger.info("zpool 전체 목록 조회 요청")
-            result = subprocess.run('zpool list', capture_output=True, shell=True, encoding='UTF-8')
+            result = run_command(['zpool', 'list'])
             lines = result.stdout.strip().split('\n')
             if not lines or lines == ['']:
                 logger.info("zpool 목록이 비어있음")
@@ -110,7 +172,7 @@ class ZpoolList(Resource):
 # zpool 생성
 @zpool_api.route('/create')
 class CreateZpool(Resource):
-    @zpool_api.doc(description='zpool 생성')
+    @zpool_api.doc(description='zpool 생성', params={'async': '작업 등록 후 바로 202 응답 (true | false, default: false)'})
     @jwt_required()
     @zpool_api.expect(zpool_create_model)
     def post(self):
@@ -127,13 +189,13 @@ class CreateZpool(Resource):
 
         logger.info(f"zpool 생성 요청 - 풀명: {pool_name}, RAID모드: {raid_mode}, 디바이스: {devices}, 스페어: {spares}")
 
-        raid_mode = raid_mode.lower()
-
         # 필수 입력값이 누락되었을 때
         if not pool_name or not raid_mode or not devices:
             logger.warning("zpool 생성 실패 - 필수 항목 누락")
             return {'error': '필수 항목(pool_name, raid_mode, devices)이 누락되었습니다.'}, 400
 
+        raid_mode = raid_mode.lower()
+
         # devices와 spares가 리스트 형식이 아닐 때
         if not isinstance(devices, list) or not isinstance(spares, list):
             logger.warning("zpool 생성 실패 - 잘못된 데이터 형식")
@@ -152,9 +214,9 @@ class CreateZpool(Resource):
             logger.warning(f"zpool 생성 실패 - 이미 존재하는 풀 이름: {pool_name}")
             return {'error': f'이미 존재하는 풀 이름입니다: <{pool_name}>'}, 400
 
-        # device가 사용 중인지 확인
-        used_devices = [d for d in devices + spares if is_device_in_use(d)]
-        print(used_devices)
+        # device가 사용 중인지 확인 (zpool status -P 는 한 번만 실행)
+        in_use = get_in_use_devices()
+        used_devices = [d for d in devices + spares if is_device_in_use(d, in_use)]
         if used_devices:
             logger.warning(f"zpool 생성 실패 - 사용 중인 디바이스 발견: {used_devices}")
             return {
@@ -181,13 +243,24 @@ class CreateZpool(Resource):
             logger.warning(f"zpool 생성 실패 - 디바이스 개수 부족: {raid_mode} 모드는 최소 {min_devices_required[raid_mode]}개 필요, 현재 {len(devices)}개")
             return {'error': f'{raid_mode} 모드는 최소 {min_devices_required[raid_mode]}개의 디바이스가 필요합니다.'}, 400
 
+        # stripe 는 디바이스만 나열, 그 외는 vdev 종류 뒤에 디바이스 나열
+        if raid_mode != 'stripe':
+            cmd.append(raid_mode)
+        cmd += devices
+
         # 예비 디스크 있으면 명령어에 추가
         if spares:
             cmd += ['spare'] + spares
 
         try:
             logger.debug(f"zpool 생성 명령어 실행: {' '.join(cmd)}")
-            result = subprocess.run(cmd, capture_output=True, encoding='utf-8', check=True)
+            job = job_manager.submit('zpool.create', pool_name, pool_name, cmd,
+                                     on_success=lambda: zfs_inventory.reload_dataset(pool_name),
+                                     event=('pool.created', {'pool': pool_name}))
+            if async_requested():
+                logger.info(f"zpool 생성 작업 등록 - 풀명: {pool_name}, 작업: {job['id']}")
+                return job_accepted(job)
+            result = job_manager.result(job['id'])
             logger.info(f"zpool 생성 성공: {pool_name}")
             return {
                 'stdout': result.stdout.strip().split('\n'),
@@ -215,10 +288,8 @@ class ZpoolStatus(Resource):
     def get(self, pool_name):
         try:
             logger.info(f"zpool 속성 조회 요청: {pool_name}")
-            result = subprocess.run(
+            result = run_command(
                 ['zpool', 'get', 'all', pool_name],
-                capture_output=True,
-                encoding='utf-8',
                 check=True
             )
             
@@ -259,17 +330,18 @@ class ZpoolStatus(Resource):
 # @zpool_bp.route('/delete/<pool_name>', methods=['DELETE'])
 @zpool_api.route('/delete/<pool_name>')
 class DeleteZpool(Resource):
-    @zpool_api.doc(description='zpool 삭제')
+    @zpool_api.doc(description='zpool 삭제', params={'async': '작업 등록 후 바로 202 응답 (true | false, default: false)'})
     @jwt_required()
     def delete(self, pool_name):
         try:
             logger.info(f"zpool 삭제 요청: {pool_name}")
-            result = subprocess.run(
-                ['zpool', 'destroy', pool_name],
-                capture_output=True,
-                encoding='utf-8',
-                check=True
-            )
+            job = job_manager.submit('zpool.destroy', pool_name, pool_name, ['zpool', 'destroy', pool_name],
+                                     on_success=lambda: zfs_inventory.remove(pool_name),
+                                     event=('pool.destroyed', {'pool': pool_name}))
+            if async_requested():
+                logger.info(f"zpool 삭제 작업 등록 - 풀명: {pool_name}, 작업: {job['id']}")
+                return job_accepted(job)
+            result = job_manager.result(job['id'])
             logger.info(f"zpool 삭제 성공: {pool_name}")
             return {
                 'message': f'Zpool {pool_name} 삭제 완료',
@@ -280,12 +352,12 @@ class DeleteZpool(Resource):
             
         except subprocess.CalledProcessError as e:
             logger.error(f"zpool 삭제 실패 - 풀명: {pool_name}, 오류: {e.stderr or str(e)}", exc_info=True)
-            return jsonify({
+            return {
                 'error': f'{pool_name} 풀 삭제에 실패했습니다.',
                 'stdout': e.stdout,
                 'stderr': e.stderr,
                 'returncode': e.returncode
-            }), 500
+            }, 500
         except Exception as e:
             logger.error(f"zpool 삭제 중 예외 발생 - 풀명: {pool_name}, 오류: {str(e)}", exc_info=True)
             return {'error': '서버 내부 오류가 발생했습니다.'}, 500
@@ -298,10 +370,8 @@ class ZpoolStatus(Resource):
         try:
             logger.info(f"zpool 상태 조회 요청: {pool_name}")
 
-            result = subprocess.run(
+            result = run_command(
                 ['zpool', 'status', pool_name],
-                capture_output=True,
-                encoding='utf-8',
                 check=True
             )
             
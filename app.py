@@ -1,3 +1,4 @@
+import os
 from flask import Flask
 from flask_restx import Api
 from api.zpool import zpool_api
@@ -5,11 +6,27 @@ from api.zfs import zfs_api
 from api.nfs import nfs_api
 from api.snapshot import snapshot_api
 from api.user import user_api
+from api.jobs import jobs_api
+from api.events import events_api
 from utils.jwt_utils import configure_jwt
+from utils.ip_allowlist import configure_ip_allowlist
+from utils.metrics import configure_metrics
+from utils.smart_cache import smart_cache
+from utils.snapshot_scheduler import snapshot_scheduler
+from utils.nfsd_metrics import nfsd_metrics
+from utils.nfsd_threads import nfsd_autoscaler, NFSD_AUTOSCALE
+from utils.events import zpool_event_follower, EVENTS_ZPOOL_FOLLOW
+from utils.jobs import job_manager
+from utils.logger import get_logger
+
+logger = get_logger("app")
 
 app = Flask(__name__)
 
+# 요청 지표는 IP 차단(403) 응답도 기록하도록 가장 먼저 등록
+configure_metrics(app)
 configure_jwt(app)
+configure_ip_allowlist(app)
 
 # Api 인스턴스 생성
 authorizations = {
@@ -40,6 +57,27 @@ api.add_namespace(zfs_api, path='/zfs')
 api.add_namespace(nfs_api, path='/nfs')
 api.add_namespace(snapshot_api, path='/snapshot')
 api.add_namespace(user_api, path='/user')
+api.add_namespace(jobs_api, path='/jobs')
+api.add_namespace(events_api, path='/events')
+
+# 백그라운드 작업 시작 (SMART 상태 갱신, 스냅샷 스케줄러, nfsd 통계 수집, nfsd 스레드 자동 조정, zpool 이벤트 추적)
+# import 시점이 아니라 요청을 처리할 프로세스에서 한 번만 호출 - 개발 서버 reloader 의 감시 프로세스에서는 실행하지 않음
+# 다른 WSGI 서버에서는 worker 시작 시 호출 (예: gunicorn post_worker_init), 스케줄러/자동 조정은 잠금 파일로 한 프로세스에서만 실행
+def start_background_services():
+    job_manager.start()
+    smart_cache.start()
+    snapshot_scheduler.start()
+    nfsd_metrics.start()
+    if NFSD_AUTOSCALE:
+        try:
+            nfsd_autoscaler.start()
+        except RuntimeError as e:
+            logger.warning(f"nfsd 스레드 자동 조정을 시작하지 않음 - {str(e)}")
+    if EVENTS_ZPOOL_FOLLOW:
+        zpool_event_follower.start()
 
 if __name__ == '__main__':
-    app.run(debug=True, port=5000)
\ No newline at end of file
+    # debug reloader 는 같은 스크립트를 자식 프로세스로 다시 실행하며 자식에만 WERKZEUG_RUN_MAIN 을 설정함
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_background_services()
+    app.run(debug=True, port=5000)
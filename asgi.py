@@ -0,0 +1,147 @@
+"""ASGI 실행 진입점
+
+    pip install uvicorn
+    uvicorn asgi:asgi_app --host 0.0.0.0 --port 5000
+
+기존 flask_restx 네임스페이스와 Swagger 문서는 그대로 Flask(WSGI) 앱에서 처리한다.
+핸들러는 동기 코드 그대로이며, WSGI 호출과 응답 본문 순회를 ASGI_THREADS 크기의
+스레드 풀에서 실행하는 스레드 방식 어댑터다. 요청마다 스레드 하나를 쓰는 점은
+threaded 개발 서버와 같고, 동시에 처리할 수 있는 요청 수는 ASGI_THREADS 로 정한다.
+(asgiref 의 WsgiToAsgi 는 thread_sensitive 모드로 모든 요청을 스레드 하나에서 실행하므로 사용하지 않음)
+"""
+import asyncio, io, os, sys
+from concurrent.futures import ThreadPoolExecutor
+from app import app, start_background_services
+from utils.events import event_bus
+from utils.logger import get_logger
+
+logger = get_logger("app")
+
+# WSGI 요청을 처리할 스레드 수 (동시에 진행 가능한 느린 ZFS 요청 + SSE 구독 수)
+ASGI_THREADS = int(os.getenv("ASGI_THREADS", "256"))
+
+_END = object()
+
+def build_environ(scope, body):
+    path = scope['path']
+    root_path = scope.get('root_path', '')
+    if root_path and path.startswith(root_path):
+        path = path[len(root_path):]
+    server = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': root_path.encode('utf-8').decode('latin-1'),
+        'PATH_INFO': path.encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1] or 80),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    client = scope.get('client')
+    if client:
+        environ['REMOTE_ADDR'], environ['REMOTE_PORT'] = client[0], str(client[1])
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin-1')
+        if name == 'content-type':
+            key = 'CONTENT_TYPE'
+        elif name == 'content-length':
+            key = 'CONTENT_LENGTH'
+        else:
+            key = 'HTTP_' + name.upper().replace('-', '_')
+        value = value.decode('latin-1')
+        environ[key] = f'{environ[key]},{value}' if key in environ else value
+    return environ
+
+class FlaskAsgiApp:
+    def __init__(self, wsgi_app, threads=ASGI_THREADS):
+        self.wsgi_app = wsgi_app
+        self.threads = threads
+        self._executor = None
+
+    def _startup(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix='asgi')
+            # SSE 구독마다 스레드 하나를 쓰므로 구독자가 풀을 모두 차지하지 않도록 절반으로 제한
+            if event_bus.max_subscribers > self.threads // 2:
+                event_bus.max_subscribers = self.threads // 2
+                logger.warning(f"이벤트 구독자 수 한도를 요청 처리 스레드의 절반({event_bus.max_subscribers})으로 제한")
+            start_background_services()
+            logger.info(f"ASGI 모드 시작 - 요청 처리 스레드: {self.threads}")
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            while True:
+                message = await receive()
+                if message['type'] == 'lifespan.startup':
+                    self._startup()
+                    await send({'type': 'lifespan.startup.complete'})
+                elif message['type'] == 'lifespan.shutdown':
+                    if self._executor is not None:
+                        self._executor.shutdown(wait=False)
+                    await send({'type': 'lifespan.shutdown.complete'})
+                    return
+        if scope['type'] != 'http':
+            return
+        self._startup()
+        await self._http(scope, receive, send)
+
+    async def _http(self, scope, receive, send):
+        body = bytearray()
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return
+            body += message.get('body', b'')
+            if not message.get('more_body'):
+                break
+
+        loop = asyncio.get_running_loop()
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response['status'] = int(status.split(' ', 1)[0])
+            response['headers'] = [(k.lower().encode('latin-1'), v.encode('latin-1')) for k, v in headers]
+
+        def call():
+            result = self.wsgi_app(build_environ(scope, bytes(body)), start_response)
+            return result, iter(result)
+
+        # 응답 본문(예: SSE 생성기)은 청크마다 풀에서 다음 값을 가져오고, 연결이 끊기면 닫아서 정리
+        result, chunks = await loop.run_in_executor(self._executor, call)
+        disconnected = asyncio.Event()
+
+        async def watch_disconnect():
+            while (await receive())['type'] != 'http.disconnect':
+                pass
+            disconnected.set()
+
+        watcher = asyncio.ensure_future(watch_disconnect())
+        started = False
+        try:
+            while not disconnected.is_set():
+                chunk = await loop.run_in_executor(self._executor, next, chunks, _END)
+                if not started:
+                    await send({'type': 'http.response.start', 'status': response['status'],
+                                'headers': response['headers']})
+                    started = True
+                if chunk is _END:
+                    await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+                    break
+                if chunk:
+                    await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+        except OSError:
+            # 응답 전송 중 클라이언트 연결 종료
+            pass
+        finally:
+            watcher.cancel()
+            if hasattr(result, 'close'):
+                await loop.run_in_executor(self._executor, result.close)
+
+asgi_app = FlaskAsgiApp(app)
@@ -0,0 +1,54 @@
+"""서버 실행 방식별 동시 요청 처리 비교
+
+실행 중인 서버에 동시 요청을 보내 응답 시간을 측정한다. 같은 느린 엔드포인트
+(예: /zpool/disks, /snapshot/list)에 대해 두 실행 방식을 각각 띄워 비교한다.
+    개발 서버: python app.py
+    ASGI:      uvicorn asgi:asgi_app --port 5000 (ASGI_THREADS 로 동시 처리 스레드 수 조정)
+
+    python benchmarks/bench_async.py URL [요청 수] [동시 요청 수] [access_token]
+"""
+import sys, time
+import urllib.error, urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+def percentile(samples, ratio):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * ratio))]
+
+def bench_http(url, count, concurrency, token=None):
+    headers = {'Authorization': f'Bearer {token}'} if token else {}
+
+    def fetch(_):
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(urllib.request.Request(url, headers=headers), timeout=300) as response:
+                response.read()
+                status = response.status
+        except urllib.error.HTTPError as e:
+            status = e.code
+        return time.perf_counter() - started, status
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(fetch, range(count)))
+    elapsed = time.perf_counter() - started
+    latencies = [latency * 1000 for latency, _ in results]
+    statuses = {}
+    for _, status in results:
+        statuses[status] = statuses.get(status, 0) + 1
+    print(f"URL: {url}, 요청: {count}, 동시 요청: {concurrency}, 상태 코드: {statuses}")
+    print(f"  전체 {elapsed:.2f}s, {count / elapsed:.1f} req/s, "
+          f"p50 {percentile(latencies, 0.5):.1f}ms, p95 {percentile(latencies, 0.95):.1f}ms, "
+          f"max {max(latencies):.1f}ms")
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+    url = sys.argv[1]
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    concurrency = int(sys.argv[3]) if len(sys.argv) > 3 else 50
+    bench_http(url, count, concurrency, sys.argv[4] if len(sys.argv) > 4 else None)
+
+if __name__ == '__main__':
+    main()
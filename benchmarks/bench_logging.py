@@ -0,0 +1,67 @@
+"""로깅 기록 비용 측정 - 요청 스레드에서 로그 한 줄당 걸리는 시간
+
+기존 방식(RotatingFileHandler 직접 기록)과 대기열 방식(text/json)을 비교한다.
+디스크 지연(slow_ms)을 주면 파일 기록마다 해당 시간만큼 지연시켜 느린 저장소를 흉내낸다.
+
+    python benchmarks/bench_logging.py [기록 횟수] [slow_ms]
+"""
+import logging, os, sys, tempfile, time
+from logging.handlers import RotatingFileHandler
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+# 한 줄당 (평균, p99, 최대) us
+def measure(logger, count):
+    samples = []
+    for i in range(count):
+        started = time.perf_counter()
+        logger.info("스냅샷 생성 요청 - ZFS: pool/fs%d, 이름: 240524-153000", i)
+        samples.append((time.perf_counter() - started) * 1e6)
+    samples.sort()
+    return sum(samples) / count, samples[int(count * 0.99)], samples[-1]
+
+class SlowRotatingFileHandler(RotatingFileHandler):
+    delay_seconds = 0
+
+    def emit(self, record):
+        if self.delay_seconds:
+            time.sleep(self.delay_seconds)
+        super().emit(record)
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    SlowRotatingFileHandler.delay_seconds = (float(sys.argv[2]) if len(sys.argv) > 2 else 0) / 1000
+    workdir = tempfile.mkdtemp(prefix='bench-logging-')
+    os.chdir(workdir)
+
+    # 기존 방식: 요청 스레드에서 포맷 + 파일 기록 + 로테이션 확인
+    sync_logger = logging.getLogger('bench-sync')
+    sync_logger.setLevel(logging.INFO)
+    sync_logger.propagate = False
+    handler = SlowRotatingFileHandler(os.path.join(workdir, 'sync.log'), maxBytes=10*1024*1024, backupCount=5)
+    handler.setFormatter(logging.Formatter("[%(asctime)s] [system] %(levelname)s: %(message)s"))
+    sync_logger.addHandler(handler)
+    results = {'sync (RotatingFileHandler)': measure(sync_logger, count)}
+
+    import utils.logger as log_module
+    for fmt in ('text', 'json'):
+        log_module.LOG_FORMAT = fmt
+        name = f'bench-queue-{fmt}'
+        logger = log_module.get_logger(name)
+        logger.propagate = False
+        slow = SlowRotatingFileHandler(os.path.join(workdir, f'{name}.log'), maxBytes=10*1024*1024, backupCount=5)
+        slow.setFormatter(logging.Formatter("%(message)s"))
+        log_module._router.handlers[name] = slow
+        results[f'queue ({fmt})'] = measure(logger, count)
+    started = time.perf_counter()
+    log_module.stop_logging()
+    drain_ms = (time.perf_counter() - started) * 1000
+
+    print(f"기록 횟수: {count}, 디스크 지연: {SlowRotatingFileHandler.delay_seconds * 1000}ms, 작업 디렉토리: {workdir}")
+    print(f"  {'':<28} {'avg':>8} {'p99':>8} {'max':>9} (us/record)")
+    for name, (avg, p99, worst) in results.items():
+        print(f"  {name:<28} {avg:8.2f} {p99:8.2f} {worst:9.2f}")
+    print(f"  대기열 비우기(종료 시): {drain_ms:.1f} ms, 버린 로그: {log_module._PreformattedQueueHandler.dropped}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,4 @@
+import os, sys
+
+# 저장소 루트의 api/, utils/ 를 import 할 수 있도록 경로 추가
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
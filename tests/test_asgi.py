@@ -0,0 +1,72 @@
+import asyncio, threading, time
+import pytest
+from flask import Flask, Response
+import asgi
+
+@pytest.fixture
+def flask_app(monkeypatch):
+    monkeypatch.setattr(asgi, 'start_background_services', lambda: None)
+    app = Flask(__name__)
+    app.closed = threading.Event()
+
+    @app.route('/slow')
+    def slow():
+        time.sleep(0.5)
+        return 'done'
+
+    @app.route('/stream')
+    def stream():
+        def generate():
+            try:
+                while True:
+                    yield 'data: tick\n\n'
+                    time.sleep(0.05)
+            finally:
+                app.closed.set()
+        return Response(generate(), mimetype='text/event-stream')
+    return app
+
+def _scope(path):
+    return {'type': 'http', 'method': 'GET', 'path': path, 'query_string': b'', 'headers': [],
+            'http_version': '1.1', 'scheme': 'http', 'server': ('testserver', 80), 'client': ('127.0.0.1', 1234)}
+
+async def _request(asgi_app, path, disconnect_after=None):
+    messages = []
+    disconnect = asyncio.Event()
+    requested = False
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await disconnect.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        messages.append(message)
+        chunks = [m for m in messages if m['type'] == 'http.response.body' and m.get('body')]
+        if disconnect_after is not None and len(chunks) >= disconnect_after:
+            disconnect.set()
+
+    await asgi_app(_scope(path), receive, send)
+    return messages
+
+def test_slow_requests_run_concurrently(flask_app):
+    asgi_app = asgi.FlaskAsgiApp(flask_app, threads=8)
+
+    async def run():
+        return await asyncio.gather(*(_request(asgi_app, '/slow') for _ in range(4)))
+
+    started = time.perf_counter()
+    results = asyncio.run(run())
+    assert time.perf_counter() - started < 1.5
+    for messages in results:
+        assert messages[0]['status'] == 200
+        assert b''.join(m.get('body', b'') for m in messages[1:]) == b'done'
+
+def test_stream_is_closed_on_disconnect(flask_app):
+    asgi_app = asgi.FlaskAsgiApp(flask_app, threads=2)
+    messages = asyncio.run(_request(asgi_app, '/stream', disconnect_after=3))
+    assert messages[0]['status'] == 200
+    assert flask_app.closed.wait(1)
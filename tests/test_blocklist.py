@@ -0,0 +1,25 @@
+import time
+import pytest
+from utils.blocklist import MemoryBlocklist, SqliteBlocklist, BlocklistFull
+
+def test_full_memory_blocklist_rejects_instead_of_evicting():
+    blocklist = MemoryBlocklist(max_entries=2)
+    blocklist.add('a', time.time() + 60)
+    blocklist.add('b', time.time() + 3600)
+    with pytest.raises(BlocklistFull):
+        blocklist.add('c', time.time() + 600)
+    assert 'a' in blocklist and 'b' in blocklist
+
+def test_expired_entries_make_room():
+    blocklist = MemoryBlocklist(max_entries=2)
+    blocklist.add('old', time.time() - 1)
+    blocklist.add('a', time.time() + 60)
+    blocklist.add('b', time.time() + 60)
+    assert 'a' in blocklist and 'b' in blocklist and 'old' not in blocklist
+
+def test_sqlite_blocklist_is_not_limited_by_memory_cache(tmp_path):
+    blocklist = SqliteBlocklist(str(tmp_path / 'blocklist.db'))
+    blocklist._known = MemoryBlocklist(max_entries=1)
+    for jti in ('a', 'b', 'c'):
+        blocklist.add(jti, time.time() + 60)
+    assert all(jti in blocklist for jti in ('a', 'b', 'c'))
@@ -0,0 +1,36 @@
+import subprocess, threading, time
+import pytest
+from utils.command_runner import CommandRunner
+
+SLOW_READ = ['sh', '-c', 'sleep 0.5; echo read']
+
+def _lead(runner):
+    thread = threading.Thread(target=runner.run, args=(SLOW_READ,), kwargs={'dedupe': True})
+    thread.start()
+    time.sleep(0.1)
+    return thread
+
+def test_joined_caller_keeps_its_own_timeout():
+    runner = CommandRunner()
+    leader = _lead(runner)
+    started = time.monotonic()
+    with pytest.raises(subprocess.TimeoutExpired):
+        runner.run(SLOW_READ, timeout=0.1, dedupe=True)
+    assert time.monotonic() - started < 0.3
+    leader.join()
+
+def test_read_after_write_does_not_join_older_run():
+    runner = CommandRunner()
+    leader = _lead(runner)
+    runner.run(['true'])
+    assert runner.run(SLOW_READ, dedupe=True).stdout == 'read\n'
+    leader.join()
+    assert runner.stats()['commands']['sh']['shared'] == 0
+
+def test_concurrent_reads_share_one_run():
+    runner = CommandRunner()
+    leader = _lead(runner)
+    runner.run(SLOW_READ, dedupe=True)
+    leader.join()
+    assert runner.stats()['commands']['sh']['count'] == 1
+    assert runner.stats()['commands']['sh']['shared'] == 1
@@ -0,0 +1,33 @@
+from utils.events import EventBus
+
+def test_same_change_from_api_and_zpool_events_is_published_once():
+    bus = EventBus(dedupe_window=10)
+    sub = bus.subscribe()
+    assert bus.publish('snapshot.created', source='api', pool='tank', name='tank/a@s1') is not None
+    assert bus.publish('snapshot.created', source='zpool', pool='tank', name='tank/a@s1') is None
+    assert bus.publish('dataset.rolled_back', source='zpool', pool='tank', name='tank/a') is not None
+    assert bus.publish('dataset.rolled_back', source='api', pool='tank', name='tank/a@s1') is None
+    events, _ = bus.next_events(sub, 0)
+    assert [(e['type'], e['source']) for e in events] == [('snapshot.created', 'api'), ('dataset.rolled_back', 'zpool')]
+    assert bus.stats()['deduplicated'] == 2
+
+def test_repeated_changes_are_each_published_once():
+    bus = EventBus(dedupe_window=10)
+    sub = bus.subscribe()
+    for type in ('snapshot.created', 'snapshot.destroyed', 'snapshot.created'):
+        bus.publish(type, source='api', name='tank/a@s1')
+    # zpool events 가 같은 세 변경을 뒤이어 알림 - 모두 API 이벤트와 짝이 맞아 생략
+    for type in ('snapshot.created', 'snapshot.destroyed', 'snapshot.created'):
+        assert bus.publish(type, source='zpool', name='tank/a@s1') is None
+    # 짝이 없는 새 변경은 발행
+    assert bus.publish('snapshot.destroyed', source='zpool', name='tank/a@s1') is not None
+    events, _ = bus.next_events(sub, 0)
+    assert [(e['type'], e['source']) for e in events] == [
+        ('snapshot.created', 'api'), ('snapshot.destroyed', 'api'), ('snapshot.created', 'api'),
+        ('snapshot.destroyed', 'zpool')]
+    assert bus.stats()['deduplicated'] == 3
+
+def test_events_outside_window_are_not_merged():
+    bus = EventBus(dedupe_window=0)
+    bus.publish('snapshot.created', source='api', name='tank/a@s1')
+    assert bus.publish('snapshot.created', source='zpool', name='tank/a@s1') is not None
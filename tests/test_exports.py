@@ -0,0 +1,48 @@
+from utils.exports import ExportsFile
+
+EXPORTS = '''# 공유 목록
+/tank/a 10.0.0.1(rw,sync)   # 개발 서버
+/tank/b -ro,sync \\
+    10.0.0.2(no_root_squash) 10.0.0.3
+"/tank/with space"  10.0.0.4(ro)
+'''
+
+def _load(tmp_path):
+    path = tmp_path / 'exports'
+    path.write_text(EXPORTS)
+    return ExportsFile.load(str(path))
+
+def test_unmodified_file_renders_verbatim(tmp_path):
+    exports = _load(tmp_path)
+    assert exports.render() == EXPORTS
+    assert exports.get('/tank/with space', '10.0.0.4') == 'ro'
+
+def test_only_changed_entry_is_rerendered(tmp_path):
+    exports = _load(tmp_path)
+    exports.add('/tank/a', '10.0.0.5', 'ro')
+    lines = exports.render().splitlines()
+    assert lines[1] == '/tank/a 10.0.0.1(rw,sync) 10.0.0.5(ro) # 개발 서버'
+    assert lines[2:] == EXPORTS.splitlines()[2:]
+
+def test_effective_options_include_default_options(tmp_path):
+    exports = _load(tmp_path)
+    assert exports.effective_options('/tank/b', '10.0.0.2') == 'ro,sync,no_root_squash'
+    assert exports.effective_options('/tank/b', '10.0.0.3') == 'ro,sync'
+    assert exports.effective_options('/tank/a', '10.0.0.1') == 'rw,sync'
+
+def test_restore_writes_back_original_bytes(tmp_path):
+    exports = _load(tmp_path)
+    exports.remove('/tank/b', '10.0.0.3')
+    exports.add('/tank/c', '10.0.0.6', 'rw')
+    exports.save()
+    exports.restore()
+    assert (tmp_path / 'exports').read_text() == EXPORTS
+
+def test_restore_removes_file_that_did_not_exist(tmp_path):
+    path = tmp_path / 'exports'
+    exports = ExportsFile.load(str(path))
+    exports.add('/tank/a', '10.0.0.1', 'rw')
+    exports.save()
+    assert path.exists()
+    exports.restore()
+    assert not path.exists()
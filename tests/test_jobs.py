@@ -0,0 +1,34 @@
+import pytest
+from flask_jwt_extended import create_access_token
+from utils.jobs import JobManager, JobStore
+
+def _running_job(store, job_id):
+    store.insert({'id': job_id, 'kind': 'zfs.destroy', 'pool': 'tank', 'target': 'tank/fs',
+                  'command': 'zfs destroy tank/fs', 'status': 'running', 'created_at': 0})
+
+def test_recover_only_when_no_other_process_runs_jobs(tmp_path):
+    path = str(tmp_path / 'jobs.db')
+    owner = JobManager(JobStore(path), max_workers=1)
+    _running_job(owner.store, 'before')
+    owner.start()
+    assert owner.store.get('before')['status'] == 'interrupted'
+
+    # 작업을 실행 중인 프로세스(공유 잠금 보유)가 있으면 다른 프로세스는 복구하지 않음
+    _running_job(owner.store, 'live')
+    other = JobManager(JobStore(path), max_workers=1)
+    other.start()
+    assert other.store.get('live')['status'] == 'running'
+
+@pytest.fixture
+def client():
+    from app import app
+    app.config['JWT_SECRET_KEY'] = 'k' * 40
+    with app.app_context():
+        token = create_access_token(identity='admin')
+    return app.test_client(), {'Authorization': f'Bearer {token}'}
+
+@pytest.mark.parametrize('wait', ['nan', 'inf', '-inf'])
+def test_job_wait_rejects_non_finite(client, wait):
+    test_client, headers = client
+    response = test_client.get(f'/jobs/none?wait={wait}', headers=headers)
+    assert response.status_code == 400
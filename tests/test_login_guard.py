@@ -0,0 +1,14 @@
+import time
+import pytest
+from utils import login_guard as login_guard_module
+from utils.login_guard import LoginGuard, LoginBusyError
+
+def test_hash_timeout_is_reported_as_busy(monkeypatch):
+    monkeypatch.setattr(login_guard_module, 'LOGIN_HASH_TIMEOUT', 0.05)
+    monkeypatch.setattr(login_guard_module, 'authenticate_user', lambda u, p: time.sleep(0.3) or True)
+    guard = LoginGuard(workers=1, queue_size=1)
+
+    with pytest.raises(LoginBusyError):
+        guard.verify('admin', 'pw')
+
+    assert guard.stats()['timeout'] == 1
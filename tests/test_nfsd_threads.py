@@ -0,0 +1,22 @@
+from utils import nfsd_threads
+from utils.nfsd_threads import NfsdAutoscaler, persist_thread_count
+
+def test_restart_right_after_stop_leaves_a_running_thread(tmp_path, monkeypatch):
+    monkeypatch.setattr(nfsd_threads, 'NFSD_AUTOSCALE_LOCK', str(tmp_path / 'autoscaler.lock'))
+    autoscaler = NfsdAutoscaler(interval=60, proc_root=str(tmp_path))
+    for _ in range(5):
+        autoscaler.start()
+        autoscaler.stop()
+        autoscaler.start()
+        assert autoscaler.enabled and autoscaler._thread.is_alive()
+        autoscaler.stop()
+        assert not autoscaler._thread.is_alive()
+
+def test_persist_thread_count_keeps_other_settings(tmp_path):
+    conf = tmp_path / 'nfs.conf'
+    conf.write_text('# 설정\n[nfsd]\nthreads=8\nvers3=n\n')
+    conf.chmod(0o640)
+    persist_thread_count(32, str(conf))
+    assert conf.read_text() == '# 설정\n[nfsd]\nthreads=32\nvers3=n\n'
+    assert conf.stat().st_mode & 0o777 == 0o640
+    assert [p.name for p in tmp_path.iterdir()] == ['nfs.conf']
@@ -0,0 +1,106 @@
+import subprocess
+from datetime import datetime, timedelta
+import pytest
+from utils import retention
+from utils.retention import build_destroy_batches, compute_retention, destroy_batches, validate_policy
+
+# (이름, 생성 시각) 목록 -> 생성 순서의 스냅샷 목록
+def _snapshots(*items, dataset='tank/fs'):
+    return [{'name': f'{dataset}@{name}', 'creation': int(created.timestamp()), 'createtxg': txg}
+            for txg, (name, created) in enumerate(items, 1)]
+
+# 2026-10-01 00:00 부터 hours 시간마다 하나씩
+def _hourly(count, hours=1):
+    start = datetime(2026, 10, 1)
+    return _snapshots(*((f's{i:03d}', start + timedelta(hours=i * hours)) for i in range(count)))
+
+def _kept(snapshots, policy, prefix=''):
+    keep, prune = compute_retention(snapshots, validate_policy(policy), prefix)
+    assert not set(keep) & prune
+    assert set(keep) | prune == {s['name'] for s in snapshots if s['name'].split('@')[1].startswith(prefix)}
+    return {name.split('@')[1]: reasons for name, reasons in keep.items()}
+
+@pytest.mark.parametrize('count, hours, policy, expected', [
+    # 최신 N개
+    (5, 1, {'keep_last': 2}, {'s004': ['keep_last'], 's003': ['keep_last']}),
+    # 시간별 버킷마다 가장 최신 것 - 30분 간격이면 각 시간의 두 번째 스냅샷
+    (6, 0.5, {'hourly': 2}, {'s005': ['hourly'], 's003': ['hourly']}),
+    # 일별: 6시간 간격 3일치 -> 각 날짜의 마지막(18시) 스냅샷
+    (12, 6, {'daily': 3}, {'s011': ['daily'], 's007': ['daily'], 's003': ['daily']}),
+    # 버킷 수보다 많이 요청하면 있는 버킷만 보존
+    (12, 6, {'daily': 10}, {'s011': ['daily'], 's007': ['daily'], 's003': ['daily']}),
+    # 주별(ISO 주): 10/1(목) ~ 10/14(수), 하루 간격 -> 10/4(일), 10/11(일), 10/14(수)
+    (14, 24, {'weekly': 3}, {'s013': ['weekly'], 's010': ['weekly'], 's003': ['weekly']}),
+    # 같은 스냅샷이 여러 정책으로 보존되면 사유를 모두 기록
+    (12, 6, {'keep_last': 1, 'daily': 2}, {'s011': ['keep_last', 'daily'], 's007': ['daily']}),
+])
+def test_compute_retention_buckets(count, hours, policy, expected):
+    assert _kept(_hourly(count, hours), policy) == expected
+
+def test_compute_retention_monthly_crosses_year():
+    snapshots = _snapshots(('nov', datetime(2025, 11, 30)), ('dec1', datetime(2025, 12, 1)),
+                           ('dec2', datetime(2025, 12, 31)), ('jan', datetime(2026, 1, 2)))
+    assert _kept(snapshots, {'monthly': 2}) == {'jan': ['monthly'], 'dec2': ['monthly']}
+
+def test_compute_retention_only_considers_prefix():
+    snapshots = _snapshots(('auto-1', datetime(2026, 10, 1)), ('manual', datetime(2026, 10, 2)),
+                           ('auto-2', datetime(2026, 10, 3)))
+    keep, prune = compute_retention(snapshots, validate_policy({'keep_last': 1}), 'auto-')
+    assert set(keep) == {'tank/fs@auto-2'}
+    assert prune == {'tank/fs@auto-1'}
+
+@pytest.mark.parametrize('names, prune, max_chars, expected', [
+    # 연속 구간은 범위로, 보존 대상이 끼면 범위를 나눔
+    ('abcdefg', 'abcefg', 1000, ['tank/fs@a%c,e%g']),
+    ('abcdefg', 'bdf', 1000, ['tank/fs@b,d,f']),
+    ('abc', 'abc', 1000, ['tank/fs@a%c']),
+    ('abc', '', 1000, []),
+    # 보존 대상이 맨 앞/맨 뒤
+    ('abcde', 'bcd', 1000, ['tank/fs@b%d']),
+    # 길이 제한마다 배치를 나눔 ("tank/fs@" 8자 + 항목)
+    ('abcdefg', 'aceg', 11, ['tank/fs@a,c', 'tank/fs@e,g']),
+    ('abcdefg', 'aceg', 9, ['tank/fs@a', 'tank/fs@c', 'tank/fs@e', 'tank/fs@g']),
+])
+def test_build_destroy_batches(names, prune, max_chars, expected):
+    snapshots = _snapshots(*((name, datetime(2026, 10, 1)) for name in names))
+    batches = build_destroy_batches('tank/fs', snapshots, {f'tank/fs@{n}' for n in prune}, max_chars)
+    assert batches == expected
+
+def _fake_run(calls, stdout='reclaim\t300\n', raises=None):
+    def run(cmd, timeout=None):
+        calls.append((cmd, timeout))
+        if raises:
+            raise raises
+        return subprocess.CompletedProcess(cmd, 0, stdout, '')
+    return run
+
+def test_dry_run_measures_all_batches_in_one_command(monkeypatch):
+    calls = []
+    monkeypatch.setattr(retention, 'run_command', _fake_run(calls))
+
+    results, reclaim, exact = destroy_batches(['tank/fs@a%c', 'tank/fs@e,g'], dry_run=True)
+
+    assert [cmd for cmd, _ in calls] == [['zfs', 'destroy', '-nvp', 'tank/fs@a%c,e,g']]
+    assert (reclaim, exact) == (300, True)
+    assert results[0]['reclaim_bytes'] == 300
+
+def test_dry_run_over_argument_limit_is_a_lower_bound(monkeypatch):
+    calls = []
+    monkeypatch.setattr(retention, 'run_command', _fake_run(calls))
+    monkeypatch.setattr(retention, 'DESTROY_ARG_MAX_CHARS', 10)
+
+    _, reclaim, exact = destroy_batches(['tank/fs@a%c', 'tank/fs@e,g'], dry_run=True)
+
+    assert len(calls) == 2
+    assert (reclaim, exact) == (600, False)
+
+def test_destroy_uses_long_timeout_and_reports_expiry(monkeypatch):
+    calls = []
+    monkeypatch.setattr(retention, 'run_command',
+                        _fake_run(calls, raises=subprocess.TimeoutExpired(['zfs'], 1)))
+
+    results, _, _ = destroy_batches(['tank/fs@a%c'], dry_run=False)
+
+    assert calls[0][1] == retention.RETENTION_DESTROY_TIMEOUT
+    assert results[0]['returncode'] is None
+    assert '제한 시간' in results[0]['stderr']
@@ -0,0 +1,34 @@
+import pytest
+from flask_jwt_extended import create_access_token
+import api.zpool
+
+@pytest.fixture
+def client(monkeypatch):
+    from app import app
+    app.config['JWT_SECRET_KEY'] = 'k' * 40
+    monkeypatch.setattr(api.zpool, 'list_physical_disks', lambda: ([{'path': '/dev/sdb'}], None))
+    with app.app_context():
+        token = create_access_token(identity='admin')
+    return app.test_client(), {'Authorization': f'Bearer {token}'}
+
+@pytest.mark.parametrize('timeout', ['inf', '-inf', 'nan', 'abc'])
+def test_refresh_rejects_invalid_timeout(client, timeout):
+    test_client, headers = client
+    response = test_client.post('/zpool/disks/smart/refresh', headers=headers,
+                                json={'devices': ['/dev/sdb'], 'wait': True, 'timeout': timeout})
+    assert response.status_code == 400
+
+def test_refresh_rejects_unknown_device(client):
+    test_client, headers = client
+    response = test_client.post('/zpool/disks/smart/refresh', headers=headers, json={'devices': ['--scan']})
+    assert response.status_code == 400
+
+def test_refresh_clamps_large_timeout(client, monkeypatch):
+    test_client, headers = client
+    waited = []
+    monkeypatch.setattr(api.zpool.smart_cache, 'refresh', lambda devices: {})
+    monkeypatch.setattr(api.zpool, 'wait', lambda futures, timeout: waited.append(timeout) or (set(), set()))
+    response = test_client.post('/zpool/disks/smart/refresh', headers=headers,
+                                json={'devices': ['/dev/sdb'], 'wait': True, 'timeout': 1e6})
+    assert response.status_code == 200
+    assert waited == [api.zpool.SMART_REFRESH_WAIT_MAX]
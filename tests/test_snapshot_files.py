@@ -0,0 +1,75 @@
+import os
+import pytest
+from utils import snapshot_files
+from utils.snapshot_files import restore_from_snapshot, SnapshotPathError
+
+@pytest.fixture
+def dataset(tmp_path, monkeypatch):
+    mountpoint = tmp_path / 'tank'
+    snap_root = mountpoint / '.zfs' / 'snapshot' / 'daily'
+    (snap_root / 'docs' / 'sub').mkdir(parents=True)
+    (snap_root / 'docs' / 'x').write_text('snapshot x')
+    (snap_root / 'docs' / 'sub' / 'y').write_text('snapshot y')
+    (mountpoint / 'docs').mkdir()
+    outside = tmp_path / 'outside'
+    outside.mkdir()
+    monkeypatch.setattr(snapshot_files, 'snapshot_root',
+                        lambda snapshot: (os.path.realpath(snap_root), os.path.realpath(mountpoint)))
+    return mountpoint, outside
+
+def test_restore_does_not_follow_symlinked_file(dataset):
+    mountpoint, outside = dataset
+    secret = outside / 'shadow'
+    secret.write_text('secret')
+    os.symlink(secret, mountpoint / 'docs' / 'x')
+
+    result = restore_from_snapshot('tank@daily', 'docs', overwrite=True)
+
+    assert secret.read_text() == 'secret'
+    assert not os.path.islink(mountpoint / 'docs' / 'x')
+    assert (mountpoint / 'docs' / 'x').read_text() == 'snapshot x'
+    assert result['files'] == 2
+
+def test_restore_does_not_follow_symlinked_directory(dataset):
+    mountpoint, outside = dataset
+    os.symlink(outside, mountpoint / 'docs' / 'sub')
+
+    restore_from_snapshot('tank@daily', 'docs', overwrite=True)
+
+    assert os.listdir(outside) == []
+    assert not os.path.islink(mountpoint / 'docs' / 'sub')
+    assert (mountpoint / 'docs' / 'sub' / 'y').read_text() == 'snapshot y'
+
+def test_restore_rejects_existing_target_without_overwrite(dataset):
+    mountpoint, _ = dataset
+    with pytest.raises(SnapshotPathError) as e:
+        restore_from_snapshot('tank@daily', 'docs')
+    assert e.value.status == 409
+
+def test_restore_symlink_as_link_not_its_target(dataset):
+    mountpoint, _ = dataset
+    snap_root = mountpoint / '.zfs' / 'snapshot' / 'daily'
+    os.symlink('docs', snap_root / 'current')
+    (mountpoint / 'docs3').mkdir()
+    (mountpoint / 'docs3' / 'keep').write_text('live')
+    os.symlink('docs3', mountpoint / 'current')
+
+    result = restore_from_snapshot('tank@daily', 'current', overwrite=True)
+
+    assert os.readlink(mountpoint / 'current') == 'docs'
+    assert os.listdir(mountpoint / 'docs3') == ['keep']
+    assert result['files'] == 1
+
+def test_failed_overwrite_keeps_original_file(dataset, monkeypatch):
+    mountpoint, _ = dataset
+    (mountpoint / 'docs' / 'x').write_text('live x')
+
+    def no_space(src_fd, dst_fd):
+        raise OSError(28, 'No space left on device')
+    monkeypatch.setattr(snapshot_files, '_copy_file', no_space)
+
+    with pytest.raises(OSError):
+        restore_from_snapshot('tank@daily', 'docs/x', overwrite=True)
+
+    assert (mountpoint / 'docs' / 'x').read_text() == 'live x'
+    assert os.listdir(mountpoint / 'docs') == ['x']
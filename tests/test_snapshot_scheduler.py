@@ -0,0 +1,43 @@
+from datetime import datetime
+import pytest
+from utils.snapshot_scheduler import CronSpec
+
+@pytest.mark.parametrize('expr, weekdays', [
+    ('0 0 * * 7', {0}),
+    ('0 0 * * 0', {0}),
+    ('0 0 * * 5-7', {5, 6, 0}),
+    ('0 0 * * 0,7', {0}),
+    ('0 0 * * */2', {0, 2, 4, 6}),
+    ('0 0 * * 1-7/3', {1, 4, 0}),
+])
+def test_weekday_values(expr, weekdays):
+    assert CronSpec(expr).weekdays == weekdays
+
+@pytest.mark.parametrize('expr', [
+    '0 0 * * 8', '60 0 * * *', '0 24 * * *', '0 0 0 * *', '0 0 * 13 *',
+    '0 0 * * 5-3', '*/0 * * * *', '0 0 * *', 'x 0 * * *',
+])
+def test_invalid_expressions(expr):
+    with pytest.raises(ValueError):
+        CronSpec(expr)
+
+# 2026-10-17 은 토요일
+@pytest.mark.parametrize('expr, after, expected', [
+    # 일/요일 중 하나만 지정되면 그 항목만 적용
+    ('0 3 * * 7', datetime(2026, 10, 17, 12, 0), datetime(2026, 10, 18, 3, 0)),
+    ('0 3 1 * *', datetime(2026, 10, 17, 12, 0), datetime(2026, 11, 1, 3, 0)),
+    # 둘 다 지정되면 어느 한쪽만 맞아도 실행 (월요일 또는 1일)
+    ('0 3 1 * 1', datetime(2026, 10, 17, 12, 0), datetime(2026, 10, 19, 3, 0)),
+    ('0 3 20 * 1', datetime(2026, 10, 19, 12, 0), datetime(2026, 10, 20, 3, 0)),
+    # '*' 로 시작하는 */n 은 지정하지 않은 것으로 보아 두 조건을 모두 만족해야 함
+    ('0 3 */2 * 1', datetime(2026, 10, 17, 12, 0), datetime(2026, 10, 19, 3, 0)),
+    ('0 3 */2 * 1', datetime(2026, 10, 19, 12, 0), datetime(2026, 11, 9, 3, 0)),
+    ('0 3 1 * */1', datetime(2026, 10, 17, 12, 0), datetime(2026, 11, 1, 3, 0)),
+    # 분 단위 */n, 경계 시각은 포함하지 않음
+    ('*/15 * * * *', datetime(2026, 10, 17, 12, 0), datetime(2026, 10, 17, 12, 15)),
+    ('*/15 * * * *', datetime(2026, 10, 17, 12, 59, 30), datetime(2026, 10, 17, 13, 0)),
+    # 윤년 2월 29일
+    ('0 0 29 2 *', datetime(2026, 10, 17, 12, 0), datetime(2028, 2, 29, 0, 0)),
+])
+def test_next_after(expr, after, expected):
+    assert CronSpec(expr).next_after(after) == expected
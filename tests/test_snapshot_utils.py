@@ -0,0 +1,65 @@
+import base64, json, string, subprocess
+import pytest
+from utils import snapshot_utils
+from utils.snapshot_utils import _unescape_diff_path, iter_diff, decode_cursor, encode_cursor, sort_position
+
+def _escape(name):
+    # OpenZFS stream_bytes 와 같은 방식으로 표기
+    return ''.join(chr(b) if ' ' < chr(b) < '\x7f' and b != ord('\\') else f'\\{b:04o}'
+                   for b in name.encode('utf-8')).encode()
+
+def test_unescape_space_and_utf8():
+    assert _escape('my file') == rb'my\0040file'
+    assert _unescape_diff_path(b'/tank/' + _escape('my file')) == '/tank/my file'
+    assert _unescape_diff_path(b'/tank/' + _escape('문서 2024')) == '/tank/문서 2024'
+    assert _unescape_diff_path(b'/tank/' + _escape('a\\b')) == '/tank/a\\b'
+
+def test_unescape_leaves_non_escape_digits():
+    assert _unescape_diff_path(rb'/tank/\9999') == '/tank/\\9999'
+
+def test_iter_diff_prefix_matches_directory_boundary(tmp_path, monkeypatch):
+    output = tmp_path / 'diff.txt'
+    output.write_bytes(b''.join(
+        b'1700000000.0\tM\tF\t' + path + b'\n'
+        for path in (b'/tank/doc/a', b'/tank/documents/b', b'/tank/doc', b'/tank/' + _escape('doc/한 글'))
+    ))
+    monkeypatch.setattr(snapshot_utils, 'popen_command',
+                        lambda cmd, **kwargs: subprocess.Popen(['cat', str(output)], **kwargs))
+    paths = [item['path'] for item in iter_diff('tank@a', path_prefix='/tank/doc/')]
+    assert paths == ['/tank/doc/a', '/tank/doc', '/tank/doc/한 글']
+
+ROWS = [
+    {'name': 'tank/fs@a', 'creation': 1760000000, 'used': 0, 'createtxg': 7},
+    {'name': 'tank/데이터 셋@b', 'creation': 1760000100, 'used': 4096, 'createtxg': 12},
+]
+
+@pytest.mark.parametrize('row', ROWS)
+@pytest.mark.parametrize('sort, order', [('creation', 'asc'), ('creation', 'desc'), ('used', 'desc'), ('name', 'asc')])
+def test_cursor_round_trip(row, sort, order):
+    position = sort_position(row, sort, order)
+    cursor = encode_cursor(position)
+    assert decode_cursor(cursor, sort) == position
+    assert set(cursor) <= set(string.ascii_letters + string.digits + '-_=')
+
+def _raw(value):
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).decode()
+
+@pytest.mark.parametrize('cursor, sort', [
+    ('!!!', 'creation'),
+    ('ééé', 'creation'),
+    (encode_cursor((1, 'tank/fs', 7))[:-4], 'creation'),
+    (_raw(None), 'creation'),
+    (_raw({'a': 1}), 'creation'),
+    (_raw([1, 'tank/fs']), 'creation'),
+    (_raw([1, 'tank/fs', 7, 8]), 'creation'),
+    (_raw(['1', 'tank/fs', 7]), 'creation'),
+    (_raw([1.5, 'tank/fs', 7]), 'creation'),
+    (_raw([True, 'tank/fs', 7]), 'creation'),
+    (_raw([1, 'tank/fs', False]), 'creation'),
+    # 다른 정렬 기준의 cursor
+    (encode_cursor(('tank/fs', 7)), 'creation'),
+    (encode_cursor((1, 'tank/fs', 7)), 'name'),
+])
+def test_cursor_rejects_tampered_values(cursor, sort):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor, sort)
@@ -0,0 +1,41 @@
+from utils.zfs_inventory import ZfsInventory
+
+class FakeInventory(ZfsInventory):
+    def __init__(self, datasets):
+        super().__init__(max_age=0)
+        self.datasets_on_disk = set(datasets)
+        self.full_lists = 0
+        self.during_list = None
+
+    def _list(self, names=None):
+        if names is None:
+            self.full_lists += 1
+            listed = set(self.datasets_on_disk)
+            if self.during_list:
+                self.during_list()
+                self.during_list = None
+        else:
+            listed = self.datasets_on_disk & set(names)
+        return {name: {'name': name} for name in listed}
+
+def test_refresh_relists_when_dataset_changes_during_listing():
+    inventory = FakeInventory(['tank'])
+
+    def create():
+        inventory.datasets_on_disk.add('tank/new')
+        inventory.reload_dataset('tank/new')
+    inventory.during_list = create
+
+    inventory.refresh()
+
+    assert inventory.full_lists == 2
+    assert inventory.datasets() == ['tank', 'tank/new']
+
+def test_exists_confirms_miss_with_targeted_reload():
+    inventory = FakeInventory(['tank'])
+    inventory.refresh()
+    inventory.datasets_on_disk.add('tank/cli')
+
+    assert inventory.exists('tank/cli')
+    assert not inventory.exists('tank/missing')
+    assert inventory.full_lists == 1
@@ -1,7 +1,139 @@
-BLOCKLIST = set()
+import heapq, os, sqlite3, threading, time
+from utils.logger import get_logger
 
-def add_to_blocklist(jti):
-  BLOCKLIST.add(jti)
+logger = get_logger("user")
+
+# 폐기 토큰 저장소 종류 (memory | sqlite) - 여러 worker 프로세스가 공유하려면 sqlite 사용
+BLOCKLIST_BACKEND = os.getenv("BLOCKLIST_BACKEND", "memory")
+BLOCKLIST_DB_FILE = os.getenv("BLOCKLIST_DB_FILE", os.path.join(os.path.dirname(__file__), '../data/blocklist.db'))
+# 메모리 보관 최대 개수 (만료 전 항목으로 가득 차면 새 폐기 등록 거부), exp 를 모를 때 보관 시간(초), 만료 항목 정리 주기(초)
+BLOCKLIST_MAX_ENTRIES = int(os.getenv("BLOCKLIST_MAX_ENTRIES", "100000"))
+BLOCKLIST_DEFAULT_TTL = int(os.getenv("BLOCKLIST_DEFAULT_TTL", str(30 * 24 * 3600)))
+BLOCKLIST_PURGE_INTERVAL = int(os.getenv("BLOCKLIST_PURGE_INTERVAL", "60"))
+
+class BlocklistFull(Exception):
+    pass
+
+class MemoryBlocklist:
+    """프로세스 내 폐기 토큰 저장소 - jti -> exp, 토큰 만료 시각이 지나면 제거
+
+    아직 만료되지 않은 폐기 토큰을 지우면 다시 사용할 수 있게 되므로, 한도를 넘으면 제거하지 않고 등록을 거부함
+    """
+
+    def __init__(self, max_entries=BLOCKLIST_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = {}   # jti -> expires_at
+        self._expiry = []    # (expires_at, jti) 힙 - 만료 순 정리용
+        self._lock = threading.Lock()
+        self._purged_at = 0
+
+    def add(self, jti, expires_at):
+        with self._lock:
+            now = time.time()
+            self._purge(now)
+            if jti not in self._entries and len(self._entries) >= self.max_entries:
+                # 만료된 항목을 먼저 정리하고도 가득 차 있으면 거부
+                self._purge(now, force=True)
+                if len(self._entries) >= self.max_entries:
+                    raise BlocklistFull(f'폐기 토큰 저장소가 가득 찼습니다 (최대 {self.max_entries}개).')
+            self._entries[jti] = expires_at
+            heapq.heappush(self._expiry, (expires_at, jti))
+
+    def discard(self, jti):
+        with self._lock:
+            self._entries.pop(jti, None)
+
+    # 만료된 토큰은 JWT 검증 단계에서 거부되므로 목록에서 빼도 안전함
+    def _purge(self, now, force=False):
+        if not force and now - self._purged_at < BLOCKLIST_PURGE_INTERVAL:
+            return
+        self._purged_at = now
+        while self._expiry and self._expiry[0][0] <= now:
+            expires_at, jti = heapq.heappop(self._expiry)
+            if self._entries.get(jti) == expires_at:
+                del self._entries[jti]
+        # discard/재등록으로 남은 힙 찌꺼기가 많으면 재구성
+        if len(self._expiry) > 2 * len(self._entries) + 1024:
+            self._expiry = [(exp, jti) for jti, exp in self._entries.items()]
+            heapq.heapify(self._expiry)
+
+    def __contains__(self, jti):
+        expires_at = self._entries.get(jti)
+        return expires_at is not None and expires_at > time.time()
+
+    def __len__(self):
+        return len(self._entries)
+
+class SqliteBlocklist:
+    """SQLite(WAL) 폐기 토큰 저장소 - 모든 worker 프로세스가 같은 파일을 공유
+
+    폐기된 토큰은 되살아나지 않으므로 조회 결과 중 '폐기됨'만 프로세스 메모리에 캐시함
+    """
+
+    def __init__(self, path=BLOCKLIST_DB_FILE):
+        self.path = path
+        self._local = threading.local()
+        self._known = MemoryBlocklist()
+        self._purged_at = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._conn() as conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS revoked (jti TEXT PRIMARY KEY, expires_at REAL NOT NULL)')
+            conn.execute('CREATE INDEX IF NOT EXISTS revoked_expires_at ON revoked (expires_at)')
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def add(self, jti, expires_at):
+        now = time.time()
+        with self._conn() as conn:
+            conn.execute('INSERT OR REPLACE INTO revoked (jti, expires_at) VALUES (?, ?)', (jti, expires_at))
+            if now - self._purged_at >= BLOCKLIST_PURGE_INTERVAL:
+                self._purged_at = now
+                conn.execute('DELETE FROM revoked WHERE expires_at <= ?', (now,))
+        self._remember(jti, expires_at)
+
+    # 메모리 캐시는 조회 최적화용 - 가득 차면 캐시하지 않고 SQLite 에서 조회
+    def _remember(self, jti, expires_at):
+        try:
+            self._known.add(jti, expires_at)
+        except BlocklistFull:
+            pass
+
+    def discard(self, jti):
+        with self._conn() as conn:
+            conn.execute('DELETE FROM revoked WHERE jti = ?', (jti,))
+        self._known.discard(jti)
+
+    def __contains__(self, jti):
+        if jti in self._known:
+            return True
+        row = self._conn().execute('SELECT expires_at FROM revoked WHERE jti = ?', (jti,)).fetchone()
+        if row is None or row[0] <= time.time():
+            return False
+        self._remember(jti, row[0])
+        return True
+
+    def __len__(self):
+        return self._conn().execute('SELECT COUNT(*) FROM revoked WHERE expires_at > ?', (time.time(),)).fetchone()[0]
+
+def create_blocklist(backend=BLOCKLIST_BACKEND):
+    if backend == 'sqlite':
+        return SqliteBlocklist()
+    if backend == 'memory':
+        return MemoryBlocklist()
+    raise ValueError(f'알 수 없는 폐기 토큰 저장소 종류입니다: {backend}')
+
+BLOCKLIST = create_blocklist()
+
+# expires_at: 토큰의 exp (epoch 초) - 이 시각 이후에는 목록에서 제거됨
+def add_to_blocklist(jti, expires_at=None):
+  BLOCKLIST.add(jti, expires_at or time.time() + BLOCKLIST_DEFAULT_TTL)
 
 def remove_from_blocklist(jti):
-  BLOCKLIST.discard(jti)
\ No newline at end of file
+  BLOCKLIST.discard(jti)
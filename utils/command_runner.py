@@ -0,0 +1,229 @@
+import os, signal, subprocess, threading, time
+from collections import deque
+from utils.logger import get_logger
+
+logger = get_logger("command")
+
+# 명령(실행 파일)별 기본 제한 시간(초)과 동시 실행 개수
+# 환경 변수 예: COMMAND_TIMEOUTS="zfs=120,smartctl=10", COMMAND_CONCURRENCY="zpool=2"
+def _parse_overrides(value):
+    overrides = {}
+    for item in (value or '').split(','):
+        name, _, number = item.partition('=')
+        if name.strip() and number.strip():
+            overrides[name.strip()] = float(number)
+    return overrides
+
+COMMAND_TIMEOUT_DEFAULT = float(os.getenv("COMMAND_TIMEOUT_DEFAULT", "120"))
+COMMAND_TIMEOUTS = {
+    'zfs': 120, 'zpool': 120, 'smartctl': 15, 'exportfs': 60,
+    'systemctl': 60, 'lsblk': 10, 'findmnt': 10, 'chmod': 10,
+    **_parse_overrides(os.getenv("COMMAND_TIMEOUTS"))
+}
+COMMAND_CONCURRENCY_DEFAULT = int(os.getenv("COMMAND_CONCURRENCY_DEFAULT", "8"))
+COMMAND_CONCURRENCY = {
+    'zfs': 8, 'zpool': 4, 'smartctl': 8, 'exportfs': 1, 'systemctl': 2,
+    **{k: int(v) for k, v in _parse_overrides(os.getenv("COMMAND_CONCURRENCY")).items()}
+}
+
+# 상태를 바꾸지 않는 (명령, 하위 명령) - 같은 인자로 동시에 실행 중이면 결과를 공유
+READ_ONLY_COMMANDS = {
+    ('zfs', 'list'), ('zfs', 'get'), ('zpool', 'list'), ('zpool', 'status'), ('zpool', 'get'),
+    ('exportfs', '-v'), ('systemctl', 'status'), ('smartctl', '-H'),
+    ('lsblk', None), ('findmnt', None),
+}
+
+def command_name(cmd):
+    return os.path.basename(cmd[0])
+
+# 통계/지표용 명령 분류 (예: "zfs list", "zpool status", "smartctl")
+def command_class(cmd):
+    name = command_name(cmd)
+    if name in ('zfs', 'zpool') and len(cmd) > 1:
+        return f"{name} {cmd[1]}"
+    return name
+
+def is_read_only(cmd):
+    name = command_name(cmd)
+    return (name, None) in READ_ONLY_COMMANDS or (len(cmd) > 1 and (name, cmd[1]) in READ_ONLY_COMMANDS)
+
+def _timeout_for(name, timeout):
+    return timeout if timeout is not None else COMMAND_TIMEOUTS.get(name, COMMAND_TIMEOUT_DEFAULT)
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class CommandRunner:
+    """외부 명령 실행기 - 제한 시간 초과 시 프로세스 그룹 종료, 명령별 동시 실행 제한,
+    읽기 전용 명령의 중복 실행 합치기, 명령 분류별 실행 시간 기록"""
+
+    def __init__(self):
+        self._semaphores = {}
+        self._inflight = {}
+        self._stats = {}
+        self._observers = []
+        self._lock = threading.Lock()
+        # 상태를 바꾸는 명령이 끝날 때마다 증가 - 그 이전에 시작된 읽기 결과를 공유하지 않도록 키에 포함
+        self._epoch = 0
+
+    def _semaphore(self, name):
+        with self._lock:
+            sem = self._semaphores.get(name)
+            if sem is None:
+                sem = self._semaphores[name] = threading.BoundedSemaphore(
+                    COMMAND_CONCURRENCY.get(name, COMMAND_CONCURRENCY_DEFAULT))
+            return sem
+
+    # 명령 실행이 끝날 때마다 observer(cmd_class, duration_seconds, returncode, timed_out) 호출
+    def add_observer(self, observer):
+        self._observers.append(observer)
+
+    # lock 보유 상태에서 호출
+    def _stats_for(self, name):
+        stats = self._stats.get(name)
+        if stats is None:
+            stats = self._stats[name] = {'count': 0, 'errors': 0, 'timeouts': 0, 'shared': 0,
+                                         'total_ms': 0.0, 'max_ms': 0.0, 'recent': deque(maxlen=200)}
+        return stats
+
+    def _record(self, cmd, duration, returncode, timed_out=False):
+        name = command_class(cmd)
+        with self._lock:
+            stats = self._stats_for(name)
+            ms = duration * 1000
+            stats['count'] += 1
+            stats['errors'] += returncode not in (0, None) and not timed_out
+            stats['timeouts'] += timed_out
+            stats['total_ms'] += ms
+            stats['max_ms'] = max(stats['max_ms'], ms)
+            stats['recent'].append(ms)
+        for observer in self._observers:
+            try:
+                observer(name, duration, returncode, timed_out)
+            except Exception as e:
+                logger.error(f"명령 실행 기록 중 예외 발생: {str(e)}")
+
+    def _execute(self, cmd, timeout, input):
+        name = command_name(cmd)
+        timeout = _timeout_for(name, timeout)
+        with self._semaphore(name):
+            started = time.perf_counter()
+            # 새 세션으로 실행해 시간 초과 시 하위 프로세스까지 함께 종료
+            proc = subprocess.Popen(cmd, stdin=subprocess.PIPE if input is not None else None,
+                                    stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                    encoding='utf-8', errors='replace', start_new_session=True)
+            try:
+                stdout, stderr = proc.communicate(input, timeout=timeout)
+            except subprocess.TimeoutExpired:
+                try:
+                    os.killpg(proc.pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+                stdout, stderr = proc.communicate()
+                duration = time.perf_counter() - started
+                self._record(cmd, duration, proc.returncode, timed_out=True)
+                logger.error(f"명령 시간 초과로 종료 - 명령: {' '.join(cmd)}, 제한: {timeout}초")
+                raise subprocess.TimeoutExpired(cmd, timeout, stdout, stderr)
+            except BaseException:
+                proc.kill()
+                proc.wait()
+                raise
+            duration = time.perf_counter() - started
+        self._record(cmd, duration, proc.returncode)
+        logger.debug(f"명령 실행 - {' '.join(cmd)}, 종료 코드: {proc.returncode}, 소요 시간: {duration * 1000:.1f}ms")
+        return subprocess.CompletedProcess(cmd, proc.returncode, stdout, stderr)
+
+    def _bump_epoch(self):
+        with self._lock:
+            self._epoch += 1
+
+    # 같은 읽기 전용 명령이 실행 중이면 새로 실행하지 않고 그 결과를 기다림
+    # 마지막 변경 명령이 끝난 뒤에 시작된 실행만 공유하며, 기다리는 쪽도 자신의 제한 시간을 지킴
+    def _single_flight(self, cmd, timeout):
+        with self._lock:
+            key = (self._epoch, tuple(cmd))
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+            else:
+                # 합쳐진 호출 수 (실제 실행 없이 결과 공유)
+                self._stats_for(command_class(cmd))['shared'] += 1
+        if not leader:
+            timeout = _timeout_for(command_name(cmd), timeout)
+            if not flight.done.wait(timeout):
+                logger.error(f"실행 중인 같은 명령의 결과 대기 시간 초과 - 명령: {' '.join(cmd)}, 제한: {timeout}초")
+                raise subprocess.TimeoutExpired(cmd, timeout)
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+        try:
+            flight.result = self._execute(cmd, timeout, None)
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            flight.done.set()
+        return flight.result
+
+    def run(self, cmd, check=False, timeout=None, input=None, dedupe=None):
+        if dedupe is None:
+            dedupe = input is None and is_read_only(cmd)
+        if dedupe:
+            result = self._single_flight(cmd, timeout)
+        else:
+            try:
+                result = self._execute(cmd, timeout, input)
+            finally:
+                if not is_read_only(cmd):
+                    self._bump_epoch()
+        if check and result.returncode != 0:
+            raise subprocess.CalledProcessError(result.returncode, cmd, result.stdout, result.stderr)
+        return result
+
+    # 스트리밍 용도 (zfs list/diff/send 등) - 동시 실행 제한 없이 종료 시점에 실행 시간만 기록
+    def popen(self, cmd, **kwargs):
+        return _TrackedPopen(self, cmd, **kwargs)
+
+    def stats(self):
+        with self._lock:
+            snapshot = {name: dict(stats, recent=sorted(stats['recent'])) for name, stats in self._stats.items()}
+            inflight = len(self._inflight)
+        result = {}
+        for name, stats in sorted(snapshot.items()):
+            recent = stats.pop('recent')
+            stats['avg_ms'] = round(stats['total_ms'] / stats['count'], 2) if stats['count'] else None
+            stats['p95_ms'] = round(recent[min(len(recent) - 1, int(len(recent) * 0.95))], 2) if recent else None
+            stats['total_ms'] = round(stats['total_ms'], 2)
+            stats['max_ms'] = round(stats['max_ms'], 2)
+            result[name] = stats
+        return {'commands': result, 'inflight': inflight}
+
+class _TrackedPopen(subprocess.Popen):
+    def __init__(self, runner, cmd, **kwargs):
+        self._runner = runner
+        self._started = time.perf_counter()
+        self._recorded = False
+        super().__init__(cmd, **kwargs)
+
+    def wait(self, timeout=None):
+        returncode = super().wait(timeout)
+        if not self._recorded:
+            self._recorded = True
+            self._runner._record(self.args, time.perf_counter() - self._started, returncode)
+            if not is_read_only(self.args):
+                self._runner._bump_epoch()
+        return returncode
+
+command_runner = CommandRunner()
+
+def run_command(cmd, check=False, timeout=None, input=None, dedupe=None):
+    return command_runner.run(cmd, check=check, timeout=timeout, input=input, dedupe=dedupe)
+
+def popen_command(cmd, **kwargs):
+    return command_runner.popen(cmd, **kwargs)
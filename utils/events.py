@@ -0,0 +1,341 @@
+import json, os, subprocess, threading, time
+from collections import deque
+from utils.zfs_inventory import zfs_inventory
+from utils.command_runner import popen_command
+from utils.logger import get_logger
+
+logger = get_logger("events")
+
+# 구독자별 대기열 크기 (가득 차면 가장 오래된 이벤트부터 버림), 재연결용 최근 이벤트 보관 수, 최대 구독자 수
+EVENTS_CLIENT_QUEUE = int(os.getenv("EVENTS_CLIENT_QUEUE", "256"))
+EVENTS_HISTORY = int(os.getenv("EVENTS_HISTORY", "512"))
+EVENTS_MAX_SUBSCRIBERS = int(os.getenv("EVENTS_MAX_SUBSCRIBERS", "100"))
+# API 와 zpool events 가 같은 변경을 각각 알릴 때 하나로 합치는 시간 범위(초)
+EVENTS_DEDUPE_WINDOW = float(os.getenv("EVENTS_DEDUPE_WINDOW", "10"))
+# SSE 연결 유지용 주석 전송 주기(초)
+EVENTS_HEARTBEAT = int(os.getenv("EVENTS_HEARTBEAT", "15"))
+# zpool events -f 추적 여부, 종료 시 재시작 대기(초, 실패가 반복되면 최대 300초까지 늘림)
+EVENTS_ZPOOL_FOLLOW = os.getenv("EVENTS_ZPOOL_FOLLOW", "true").lower() == "true"
+EVENTS_RESTART_DELAY = int(os.getenv("EVENTS_RESTART_DELAY", "5"))
+
+# zpool events -v 의 vdev_state 숫자 값 (vdev_state_t)
+VDEV_STATES = {0: 'UNKNOWN', 1: 'CLOSED', 2: 'OFFLINE', 3: 'REMOVED', 4: 'UNAVAIL',
+               5: 'FAULTED', 6: 'DEGRADED', 7: 'ONLINE'}
+POOL_SYSEVENTS = {
+    'sysevent.fs.zfs.pool_create': 'pool.created',
+    'sysevent.fs.zfs.pool_destroy': 'pool.destroyed',
+    'sysevent.fs.zfs.pool_import': 'pool.imported',
+    'sysevent.fs.zfs.pool_export': 'pool.exported',
+    'sysevent.fs.zfs.resilver_start': 'pool.scan',
+    'sysevent.fs.zfs.resilver_finish': 'pool.scan',
+    'sysevent.fs.zfs.scrub_start': 'pool.scan',
+    'sysevent.fs.zfs.scrub_finish': 'pool.scan',
+    'sysevent.fs.zfs.vdev_remove': 'vdev.removed',
+    'sysevent.fs.zfs.vdev_add': 'vdev.added',
+}
+
+class EventBusFull(Exception):
+    pass
+
+class Subscription:
+    def __init__(self, types=None, queue_size=EVENTS_CLIENT_QUEUE):
+        # 이벤트 종류 접두어 필터 (예: ('pool.', 'share.'))
+        self.types = tuple(types) if types else None
+        self.queue = deque(maxlen=queue_size)
+        self.ready = threading.Event()
+        self.dropped = 0
+        self.created_at = time.time()
+
+    def accepts(self, event):
+        return self.types is None or event['type'].startswith(self.types)
+
+class EventBus:
+    """프로세스 내 이벤트 발행/구독 - 구독자마다 크기가 제한된 대기열, 느린 구독자는 오래된 이벤트를 잃음"""
+
+    def __init__(self, queue_size=EVENTS_CLIENT_QUEUE, history=EVENTS_HISTORY, max_subscribers=EVENTS_MAX_SUBSCRIBERS,
+                 dedupe_window=EVENTS_DEDUPE_WINDOW):
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self.dedupe_window = dedupe_window
+        self._last_id = 0
+        self._history = deque(maxlen=history)
+        self._subscribers = set()
+        self._recent = {}     # (종류, 대상) -> (마지막 시각, {출처: 짝이 오지 않은 발행 수}), 시각 순서 유지
+        self._lock = threading.Lock()
+        self._published = 0
+        self._dropped = 0
+        self._deduplicated = 0
+
+    # last_event_id: 재연결 시 마지막으로 받은 이벤트 ID - 보관 중인 이후 이벤트를 먼저 전달
+    def subscribe(self, types=None, last_event_id=None):
+        sub = Subscription(types, self.queue_size)
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                raise EventBusFull('이벤트 구독자 수가 한도에 도달했습니다.')
+            if last_event_id is not None:
+                missed = [e for e in self._history if e['id'] > last_event_id]
+                # 보관 범위보다 오래된 ID 면 그 사이 이벤트는 알 수 없으므로 누락으로 알림
+                oldest = self._history[0]['id'] if self._history else self._last_id + 1
+                if last_event_id < oldest - 1:
+                    sub.dropped += oldest - 1 - last_event_id
+                for event in missed:
+                    if sub.accepts(event):
+                        self._deliver(sub, event)
+            self._subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            self._subscribers.discard(sub)
+
+    # lock 보유 상태에서 호출
+    def _deliver(self, sub, event):
+        if len(sub.queue) == sub.queue.maxlen:
+            sub.dropped += 1
+            self._dropped += 1
+        sub.queue.append(event)
+        sub.ready.set()
+
+    # 같은 (종류, 대상) 이벤트를 다른 출처에서 dedupe_window 안에 이미 발행했으면 True (lock 보유 상태에서 호출)
+    # 예: API 로 만든 스냅샷은 API 가 먼저 알리고, 뒤이어 zpool events 의 history_event 로 한 번 더 들어옴
+    # 출처별로 아직 상대 출처에서 짝이 오지 않은 발행 수를 세어, 생성/삭제/생성처럼 반복된 변경도 각각 한 번씩만 발행
+    def _duplicate(self, type, source, data, now):
+        target = data.get('name') or data.get('pool')
+        if not target or not self.dedupe_window:
+            return False
+        if type == 'dataset.rolled_back':
+            target = target.split('@')[0]
+        while self._recent:
+            key, (seen_at, _) = next(iter(self._recent.items()))
+            if now - seen_at < self.dedupe_window:
+                break
+            del self._recent[key]
+        key = (type, target)
+        _, pending = self._recent.pop(key, (None, {}))
+        other = next((s for s, count in pending.items() if s != source and count), None)
+        if other is not None:
+            pending[other] -= 1
+            duplicate = True
+        else:
+            pending[source] = pending.get(source, 0) + 1
+            duplicate = False
+        if any(pending.values()):
+            self._recent[key] = (now, pending)
+        return duplicate
+
+    def publish(self, type, source='api', **data):
+        event = {'type': type, 'time': time.time(), 'source': source, 'data': data}
+        with self._lock:
+            if self._duplicate(type, source, data, event['time']):
+                self._deduplicated += 1
+                logger.debug(f"중복 이벤트 생략 - {type}, 출처: {source}, 데이터: {data}")
+                return None
+            self._last_id += 1
+            event['id'] = self._last_id
+            self._history.append(event)
+            self._published += 1
+            for sub in self._subscribers:
+                if sub.accepts(event):
+                    self._deliver(sub, event)
+        logger.debug(f"이벤트 발행 - {type}, 출처: {source}, 데이터: {data}")
+        return event
+
+    # 이벤트가 올 때까지 최대 timeout 초 대기 -> (이벤트 목록, 그 사이 버려진 개수)
+    def next_events(self, sub, timeout):
+        sub.ready.wait(timeout)
+        with self._lock:
+            events = list(sub.queue)
+            sub.queue.clear()
+            dropped, sub.dropped = sub.dropped, 0
+            sub.ready.clear()
+        return events, dropped
+
+    def stats(self):
+        with self._lock:
+            return {
+                'subscribers': len(self._subscribers),
+                'max_subscribers': self.max_subscribers,
+                'queue_size': self.queue_size,
+                'published': self._published,
+                'dropped': self._dropped,
+                'deduplicated': self._deduplicated,
+                'last_event_id': self._last_id
+            }
+
+def format_sse(event):
+    lines = []
+    if 'id' in event:
+        lines.append(f"id: {event['id']}")
+    lines.append(f"event: {event['type']}")
+    lines.append(f"data: {json.dumps(event, ensure_ascii=False)}")
+    return '\n'.join(lines) + '\n\n'
+
+def _parse_value(value):
+    value = value.strip()
+    if len(value) >= 2 and value[0] == value[-1] == '"':
+        return value[1:-1]
+    return value
+
+# zpool events -H -v 출력 파싱 - 이벤트마다 {'time_text', 'class', 필드...} 반환
+# 첫 줄: "시각<TAB>클래스", 이후 들여쓴 "key = value" 줄, 빈 줄로 이벤트 구분
+def parse_zpool_events(lines):
+    event = None
+    for line in lines:
+        line = line.rstrip('\n')
+        if not line.strip():
+            if event is not None:
+                yield event
+                event = None
+            continue
+        if not line[0].isspace():
+            if event is not None:
+                yield event
+            header, _, cls = line.rpartition('\t') if '\t' in line else line.rpartition(' ')
+            event = {'time_text': header.strip(), 'class': cls.strip()}
+            continue
+        if event is not None and ' = ' in line:
+            key, _, value = line.strip().partition(' = ')
+            event[key] = _parse_value(value)
+    if event is not None:
+        yield event
+
+def _event_seconds(raw):
+    # time = 0x6650a1b8 0x1a2b3c (초, 나노초)
+    try:
+        return int(raw['time'].split()[0], 0)
+    except (KeyError, ValueError, IndexError):
+        return None
+
+def _vdev_state(value):
+    try:
+        return VDEV_STATES.get(int(value, 0), value)
+    except (TypeError, ValueError):
+        return value
+
+# zpool 이벤트 -> (이벤트 종류, 데이터), 대시보드에 필요 없는 이벤트는 None
+def classify_zpool_event(raw):
+    cls = raw.get('class', '')
+    pool = raw.get('pool')
+    if cls in POOL_SYSEVENTS:
+        return POOL_SYSEVENTS[cls], {'pool': pool, 'class': cls}
+    if cls == 'resource.fs.zfs.statechange':
+        # 루트 vdev 의 상태 변경은 풀 상태 변경
+        if raw.get('vdev_type') == 'root' or not raw.get('vdev_path'):
+            return 'pool.state_changed', {'pool': pool, 'state': _vdev_state(raw.get('vdev_state'))}
+        return 'vdev.state_changed', {'pool': pool, 'vdev': raw.get('vdev_path'),
+                                      'state': _vdev_state(raw.get('vdev_state'))}
+    if cls.startswith('ereport.fs.zfs.'):
+        return 'vdev.fault', {'pool': pool, 'vdev': raw.get('vdev_path'), 'fault': cls.rsplit('.', 1)[-1]}
+    if cls == 'sysevent.fs.zfs.history_event':
+        name, action = raw.get('history_dsname'), raw.get('history_internal_name')
+        if not name:
+            return None
+        kind = 'snapshot' if '@' in name else 'dataset'
+        if action in ('create', 'snapshot', 'clone'):
+            return f'{kind}.created', {'pool': pool, 'name': name}
+        if action == 'destroy':
+            return f'{kind}.destroyed', {'pool': pool, 'name': name}
+        if action == 'rename':
+            return 'dataset.renamed', {'pool': pool, 'name': name}
+        if action == 'rollback':
+            return 'dataset.rolled_back', {'pool': pool, 'name': name}
+        return None
+    return None
+
+# API 밖(zfs 명령 직접 실행 등)에서 생긴 변경도 인벤토리에 반영
+def _sync_inventory(type, data):
+    name = data.get('name') or data.get('pool')
+    if not name:
+        return
+    if type in ('pool.created', 'pool.imported', 'dataset.created', 'dataset.renamed'):
+        zfs_inventory.reload_dataset(name)
+    elif type in ('pool.destroyed', 'pool.exported', 'dataset.destroyed'):
+        zfs_inventory.remove(name)
+    elif type.startswith('snapshot.') or type == 'dataset.rolled_back':
+        zfs_inventory.mark_stale(name.split('@')[0])
+
+class ZpoolEventFollower:
+    """zpool events -f 를 계속 읽어 이벤트 버스로 전달 - 프로세스가 끝나면 지연 후 재시작"""
+
+    def __init__(self, bus):
+        self.bus = bus
+        self.restarts = 0
+        self.received = 0
+        self.last_event_at = None
+        self._proc = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name='zpool-events', daemon=True)
+        self._thread.start()
+        logger.info("zpool 이벤트 추적 시작")
+
+    def stop(self):
+        self._stop.set()
+        proc = self._proc
+        if proc is not None and proc.poll() is None:
+            proc.kill()
+
+    def _loop(self):
+        delay = EVENTS_RESTART_DELAY
+        while not self._stop.is_set():
+            started = time.time()
+            try:
+                self._follow(started)
+            except Exception as e:
+                logger.error(f"zpool 이벤트 추적 중 예외 발생: {str(e)}", exc_info=True)
+            if self._stop.is_set():
+                break
+            # 한동안 정상 동작했으면 재시작 지연을 처음 값으로
+            if time.time() - started > 60:
+                delay = EVENTS_RESTART_DELAY
+            logger.warning(f"zpool events 종료 - {delay}초 후 재시작")
+            self._stop.wait(delay)
+            delay = min(delay * 2, 300)
+            self.restarts += 1
+
+    def _follow(self, since):
+        # 시작 시 커널 버퍼에 남아 있는 과거 이벤트가 먼저 출력되므로 시작 시각 이전 이벤트는 건너뜀
+        self._proc = popen_command(['zpool', 'events', '-f', '-H', '-v'], stdout=subprocess.PIPE,
+                                   stderr=subprocess.DEVNULL, text=True, bufsize=1)
+        try:
+            for raw in parse_zpool_events(self._proc.stdout):
+                seconds = _event_seconds(raw)
+                if seconds is not None and seconds < since - 1:
+                    continue
+                self.received += 1
+                self.last_event_at = time.time()
+                classified = classify_zpool_event(raw)
+                if classified is None:
+                    continue
+                type, data = classified
+                try:
+                    _sync_inventory(type, data)
+                except Exception as e:
+                    logger.error(f"zpool 이벤트 인벤토리 반영 실패 - {type}: {str(e)}")
+                self.bus.publish(type, source='zpool', **data)
+        finally:
+            self._proc.stdout.close()
+            if self._proc.poll() is None:
+                self._proc.kill()
+            self._proc.wait()
+
+    def status(self):
+        return {
+            'enabled': EVENTS_ZPOOL_FOLLOW,
+            'running': bool(self._thread and self._thread.is_alive()),
+            'restarts': self.restarts,
+            'received': self.received,
+            'last_event_at': self.last_event_at
+        }
+
+event_bus = EventBus()
+zpool_event_follower = ZpoolEventFollower(event_bus)
+
+# API 변경 작업 완료 알림
+def publish_event(type, **data):
+    return event_bus.publish(type, source='api', **data)
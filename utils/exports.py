@@ -0,0 +1,255 @@
+import os, re, shlex, threading, time
+from utils.command_runner import run_command
+from utils.file_utils import atomic_write
+from utils.logger import get_logger
+
+logger = get_logger("nfs")
+
+EXPORTS_FILE = os.getenv("NFS_EXPORTS_FILE", "/etc/exports")
+# exportfs -v 결과 캐시 최대 유지 시간(초) - 외부에서 exportfs 를 직접 실행한 경우 대비
+EXPORTS_STATE_MAX_AGE = int(os.getenv("NFS_EXPORTS_STATE_MAX_AGE", "60"))
+
+# /etc/exports 읽기-수정-쓰기 구간 보호
+exports_lock = threading.RLock()
+
+class ExportEntry:
+    """/etc/exports 의 공유 한 줄 - 경로와 (client, options) 목록
+
+    파일에서 읽은 줄은 원문(raw)을 보관하고, 변경되지 않았으면 저장 시 원문 그대로 다시 씀
+    """
+
+    def __init__(self, path, clients, default_options=None, comment=None, raw=None):
+        self.path = path
+        self.clients = clients  # [[client, options], ...]
+        self.default_options = default_options
+        self.comment = comment  # 줄 끝 주석 ('# ...')
+        self.raw = raw
+        self.modified = raw is None
+
+    def render(self):
+        if not self.modified:
+            return self.raw
+        path = self.path if not any(c.isspace() for c in self.path) else f'"{self.path}"'
+        parts = [path]
+        if self.default_options:
+            parts.append(f"-{self.default_options}")
+        parts += [f"{client}({options})" if options else client for client, options in self.clients]
+        if self.comment:
+            parts.append(self.comment)
+        return ' '.join(parts) + '\n'
+
+def _parse_client(token):
+    if '(' in token and token.endswith(')'):
+        client, options = token[:-1].split('(', 1)
+        return [client or '*', options]
+    return [token, '']
+
+# 따옴표 밖의 첫 '#' 부터를 주석으로 분리 -> (본문, 주석 또는 None)
+def _split_comment(line):
+    quoted = False
+    for i, c in enumerate(line):
+        if c == '"':
+            quoted = not quoted
+        elif c == '#' and not quoted and (i == 0 or line[i - 1].isspace()):
+            return line[:i], line[i:].rstrip()
+    return line, None
+
+# raw: 파일의 원문 (백슬래시 줄 이어쓰기 포함)
+def _parse_line(raw):
+    body, comment = _split_comment(raw.replace('\\\n', ' '))
+    tokens = shlex.split(body)
+    if not tokens:
+        return None
+    default_options = None
+    rest = tokens[1:]
+    if rest and rest[0].startswith('-'):
+        default_options = rest[0][1:]
+        rest = rest[1:]
+    return ExportEntry(tokens[0], [_parse_client(t) for t in rest], default_options, comment,
+                       raw if raw.endswith('\n') else raw + '\n')
+
+# 백슬래시로 이어지는 줄을 하나로 묶어 논리적인 줄 단위로 반환 (원문 유지)
+def _logical_lines(content):
+    pending = ''
+    for line in content.splitlines(keepends=True):
+        pending += line
+        if not line.endswith('\\\n'):
+            yield pending
+            pending = ''
+    if pending:
+        yield pending
+
+class ExportsFile:
+    """파싱된 /etc/exports - 주석/빈 줄은 그대로 유지하고 (경로, 클라이언트) 로 색인"""
+
+    def __init__(self, path=EXPORTS_FILE):
+        self.path = path
+        self.items = []   # 원본 문자열(주석/빈 줄) 또는 ExportEntry
+        self.index = {}   # (path, client) -> ExportEntry
+        self.original = None  # 읽을 때의 파일 내용 (bytes, 파일이 없었으면 None) - restore() 용
+
+    @classmethod
+    def load(cls, path=EXPORTS_FILE):
+        exports = cls(path)
+        try:
+            with open(path, 'rb') as f:
+                exports.original = f.read()
+            content = exports.original.decode('utf-8')
+        except FileNotFoundError:
+            logger.warning(f"{path} 파일을 찾을 수 없습니다.")
+            content = ''
+        for line in _logical_lines(content):
+            try:
+                entry = _parse_line(line)
+            except ValueError:
+                entry = None
+            if entry is None:
+                exports.items.append(line if line.endswith('\n') else line + '\n')
+                continue
+            exports.items.append(entry)
+            for client, _ in entry.clients:
+                exports.index[(entry.path, client)] = entry
+        return exports
+
+    def entries(self):
+        return [item for item in self.items if isinstance(item, ExportEntry)]
+
+    def get(self, path, client):
+        entry = self.index.get((path, client))
+        if entry is None:
+            return None
+        return next(options for c, options in entry.clients if c == client)
+
+    # 같은 경로의 줄이 있으면 해당 줄에 클라이언트 추가, 없으면 새 줄 추가
+    def add(self, path, client, options):
+        if (path, client) in self.index:
+            raise KeyError(f'이미 공유된 대상입니다: {path} -> {client}')
+        entry = next((e for e in self.entries() if e.path == path), None)
+        if entry is None:
+            entry = ExportEntry(path, [])
+            self.items.append(entry)
+        entry.clients.append([client, options])
+        entry.modified = True
+        self.index[(path, client)] = entry
+
+    def remove(self, path, client):
+        entry = self.index.pop((path, client), None)
+        if entry is None:
+            raise KeyError(f'공유 대상이 존재하지 않습니다: {path} -> {client}')
+        entry.clients = [c for c in entry.clients if c[0] != client]
+        entry.modified = True
+        if not entry.clients:
+            self.items.remove(entry)
+
+    # exportfs -ra 와 같은 결과가 되도록 줄의 기본 옵션(-옵션) 뒤에 클라이언트 옵션을 붙임 (뒤의 값이 우선)
+    def effective_options(self, path, client):
+        entry = self.index.get((path, client))
+        if entry is None:
+            return None
+        return ','.join(o for o in (entry.default_options, self.get(path, client)) if o)
+
+    def render(self):
+        return ''.join(item.render() if isinstance(item, ExportEntry) else item for item in self.items)
+
+    def save(self):
+        atomic_write(self.path, self.render())
+        exports_state.invalidate()
+        logger.info(f"{self.path} 저장 완료 - 공유 {len(self.index)}개")
+
+    # 변경 실패 시 읽을 때의 파일 내용으로 그대로 되돌림 (파일이 없었으면 삭제)
+    def restore(self):
+        if self.original is None:
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+        else:
+            atomic_write(self.path, self.original)
+        exports_state.invalidate()
+        logger.info(f"{self.path} 원복 완료")
+
+# 전체 재적용(exportfs -ra) 없이 해당 공유만 반영 - options 는 ExportsFile.effective_options() 값
+def export_share(path, client, options):
+    cmd = ['exportfs', '-o', options, f"{client}:{path}"] if options else ['exportfs', f"{client}:{path}"]
+    try:
+        return run_command(cmd, check=True)
+    finally:
+        exports_state.invalidate()
+
+def unexport_share(path, client):
+    try:
+        return run_command(['exportfs', '-u', f"{client}:{path}"], check=True)
+    finally:
+        exports_state.invalidate()
+
+# 여러 변경을 한 번에 반영할 때 사용 (파일 기준 전체 동기화)
+def reload_exports():
+    try:
+        return run_command(['exportfs', '-ra'], check=True)
+    finally:
+        exports_state.invalidate()
+
+_CLIENT_PATTERN = re.compile(r'(\S+?)\(([^)]*)\)')
+
+# exportfs -v 출력 파싱 -> {path: [{'client', 'options'}, ...]}
+# 경로가 길면 클라이언트가 다음 줄(들여쓰기)로 넘어가고, 한 줄에 여러 클라이언트가 올 수 있음
+def parse_exportfs_output(output):
+    index = {}
+    path = None
+    for line in output.splitlines():
+        if not line.strip():
+            continue
+        if not line[0].isspace():
+            parts = line.split(None, 1)
+            path, line = parts[0], parts[1] if len(parts) > 1 else ''
+            index.setdefault(path, [])
+        if path is None:
+            continue
+        for client, options in _CLIENT_PATTERN.findall(line):
+            index[path].append({'client': client, 'options': options.split(',') if options else []})
+    return index
+
+class ExportsState:
+    """현재 커널 export 상태(exportfs -v) 캐시
+
+    API 를 통한 변경 시 invalidate() 되고, /etc/exports 의 mtime 이 바뀌거나
+    EXPORTS_STATE_MAX_AGE 가 지나면 다음 조회 때 다시 읽는다.
+    """
+
+    def __init__(self, exports_file=EXPORTS_FILE, max_age=EXPORTS_STATE_MAX_AGE):
+        self.exports_file = exports_file
+        self.max_age = max_age
+        self._index = None
+        self._loaded_at = 0
+        self._mtime = None
+        self._lock = threading.Lock()
+
+    def _file_mtime(self):
+        try:
+            return os.stat(self.exports_file).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def invalidate(self):
+        with self._lock:
+            self._index = None
+
+    def _current(self):
+        mtime = self._file_mtime()
+        with self._lock:
+            if self._index is not None and self._mtime == mtime and time.monotonic() - self._loaded_at < self.max_age:
+                return self._index
+            result = run_command(['exportfs', '-v'], check=True)
+            self._index = parse_exportfs_output(result.stdout)
+            self._loaded_at = time.monotonic()
+            self._mtime = mtime
+            logger.debug(f"exportfs -v 상태 갱신 - 경로 {len(self._index)}개")
+            return self._index
+
+    def get(self, path):
+        return [{'path': path, **share} for share in self._current().get(path, [])]
+
+    def shares(self):
+        return [{'path': path, **share} for path, clients in self._current().items() for share in clients]
+
+exports_state = ExportsState()
@@ -0,0 +1,50 @@
+import fcntl, os, tempfile
+
+# 여러 프로세스(개발 서버 reloader, 다중 worker) 중 하나만 실행해야 하는 작업용 파일 잠금
+# 잠금을 얻으면 fd 반환 (프로세스가 끝날 때까지 유지), 다른 프로세스가 보유 중이면 None
+def try_lock_file(path):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        os.close(fd)
+        return None
+    os.ftruncate(fd, 0)
+    os.write(fd, f'{os.getpid()}\n'.encode())
+    return fd
+
+# 잠금 파일을 공유 잠금으로 유지 (fd 를 주면 보유 중인 배타 잠금을 공유 잠금으로 전환)
+# 다른 프로세스가 배타 잠금을 보유 중이면 풀릴 때까지 대기, fd 는 프로세스가 끝날 때까지 유지
+def share_lock_file(path, fd=None):
+    if fd is None:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    fcntl.flock(fd, fcntl.LOCK_SH)
+    return fd
+
+# 임시 파일에 기록하고 fsync 후 rename 으로 원자적 교체 - 기존 파일 권한 유지 (새 파일이면 mode)
+# content 는 str 또는 bytes, 쓰는 도중 중단되어도 기존 파일은 그대로 남음
+def atomic_write(path, content, mode=0o644):
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=f'.{os.path.basename(path)}.', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb' if isinstance(content, bytes) else 'w') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            os.chmod(tmp_path, os.stat(path).st_mode & 0o7777)
+        except FileNotFoundError:
+            os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    # rename 결과도 디스크에 반영
+    dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
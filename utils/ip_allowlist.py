@@ -0,0 +1,121 @@
+import ipaddress, os, threading, time
+from bisect import bisect_right
+from flask import request
+from utils.logger import get_logger
+
+logger = get_logger("user")
+
+DEFAULT_ALLOWED_IP_RANGES = ['192.168.20.0/24', '192.168.25.0/24', '127.0.0.1/32', '::1/128']
+# 허용 대역 파일 (한 줄에 CIDR 하나, # 주석) - 변경 시 재시작 없이 다시 읽음
+ALLOWED_IP_RANGES_FILE = os.getenv("ALLOWED_IP_RANGES_FILE")
+# 파일 변경 확인 주기(초)
+ALLOWED_IP_RELOAD_INTERVAL = int(os.getenv("ALLOWED_IP_RELOAD_INTERVAL", "5"))
+
+# CIDR 목록을 주소 체계별 (시작, 끝) 정수 구간으로 변환 후 정렬/병합
+def compile_ranges(cidrs):
+    ranges = {4: [], 6: []}
+    for cidr in cidrs:
+        network = ipaddress.ip_network(cidr.strip(), strict=False)
+        ranges[network.version].append((int(network.network_address), int(network.broadcast_address)))
+    compiled = {}
+    for version, items in ranges.items():
+        merged = []
+        for start, end in sorted(items):
+            if merged and start <= merged[-1][1] + 1:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        compiled[version] = ([start for start, _ in merged], [end for _, end in merged])
+    return compiled
+
+class IpAllowlist:
+    """허용 IP 대역 검사 - 정렬된 정수 구간에 대한 이진 탐색 (IPv4/IPv6)"""
+
+    def __init__(self, cidrs=None, path=None):
+        self._lock = threading.Lock()
+        self.configure(cidrs, path)
+
+    # cidrs: 기본 허용 대역, path: 추가 대역 파일 (선택)
+    def configure(self, cidrs, path=None):
+        self.path = path
+        self._base = list(cidrs or [])
+        self._compiled = compile_ranges(self._base)
+        self._count = len(self._base)
+        self._mtime = None
+        self._checked_at = 0
+        if path:
+            self._reload_file()
+
+    def load(self, cidrs):
+        compiled = compile_ranges(cidrs)
+        self._compiled, self._count = compiled, len(cidrs)
+        logger.info(f"허용 IP 대역 적용 - {len(cidrs)}개 (병합 후 IPv4 {len(compiled[4][0])}개, IPv6 {len(compiled[6][0])}개 구간)")
+
+    def _reload_file(self):
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if mtime == self._mtime:
+            return
+        self._mtime = mtime
+        if mtime is None:
+            logger.warning(f"허용 IP 대역 파일 없음 - 경로: {self.path}, 기본 대역 사용")
+            self.load(self._base)
+            return
+        with open(self.path, 'r') as f:
+            cidrs = [line.split('#', 1)[0].strip() for line in f]
+        try:
+            self.load(self._base + [c for c in cidrs if c])
+        except ValueError as e:
+            # 잘못된 파일이면 기존 목록 유지
+            logger.error(f"허용 IP 대역 파일 오류 - 경로: {self.path}, 오류: {str(e)}")
+
+    # 요청 처리 중 호출 - 주기마다 한 번만 파일 변경 여부 확인
+    def maybe_reload(self):
+        if not self.path or time.monotonic() - self._checked_at < ALLOWED_IP_RELOAD_INTERVAL:
+            return
+        with self._lock:
+            if time.monotonic() - self._checked_at < ALLOWED_IP_RELOAD_INTERVAL:
+                return
+            self._checked_at = time.monotonic()
+            self._reload_file()
+
+    def contains(self, ip):
+        try:
+            address = ipaddress.ip_address(ip)
+        except ValueError:
+            return False
+        # IPv4-mapped IPv6 (::ffff:a.b.c.d) 는 IPv4 로 검사
+        if address.version == 6 and address.ipv4_mapped:
+            address = address.ipv4_mapped
+        starts, ends = self._compiled[address.version]
+        value = int(address)
+        i = bisect_right(starts, value) - 1
+        return i >= 0 and value <= ends[i]
+
+    def status(self):
+        return {
+            'ranges': self._count,
+            'ipv4_intervals': len(self._compiled[4][0]),
+            'ipv6_intervals': len(self._compiled[6][0]),
+            'file': self.path
+        }
+
+ip_allowlist = IpAllowlist(DEFAULT_ALLOWED_IP_RANGES)
+
+# 앱 시작 시 한 번 컴파일하고 모든 요청 전에 검사
+def configure_ip_allowlist(app):
+    cidrs = app.config.get('ALLOWED_IP_RANGES')
+    if cidrs is None and os.getenv("ALLOWED_IP_RANGES"):
+        cidrs = [c for c in os.getenv("ALLOWED_IP_RANGES").split(',') if c.strip()]
+    ip_allowlist.configure(cidrs if cidrs is not None else DEFAULT_ALLOWED_IP_RANGES, ALLOWED_IP_RANGES_FILE)
+
+    @app.before_request
+    def check_ip_allowed():
+        ip_allowlist.maybe_reload()
+        if not ip_allowlist.contains(request.remote_addr):
+            logger.warning(f"차단된 IP 접근 시도 - IP: {request.remote_addr}, 경로: {request.path}")
+            return {'error': '접근이 허용되지 않은 IP입니다.'}, 403
+
+    logger.info(f"허용 IP 대역 검사 설정 완료 - {ip_allowlist.status()}")
@@ -0,0 +1,252 @@
+import os, sqlite3, subprocess, threading, time, uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from flask import request
+from utils.command_runner import run_command
+from utils.events import publish_event
+from utils.file_utils import try_lock_file, share_lock_file
+from utils.logger import get_logger
+
+logger = get_logger("jobs")
+
+JOBS_DB_FILE = os.getenv("JOBS_DB_FILE", os.path.join(os.path.dirname(__file__), '../data/jobs.db'))
+# 동시에 실행할 작업 수 (같은 pool 의 작업은 항상 하나씩 순서대로 실행)
+JOBS_MAX_WORKERS = int(os.getenv("JOBS_MAX_WORKERS", "4"))
+# 작업 명령 제한 시간(초) - 풀 생성/삭제, 롤백은 오래 걸릴 수 있음
+JOBS_COMMAND_TIMEOUT = int(os.getenv("JOBS_COMMAND_TIMEOUT", "3600"))
+# 저장할 stdout/stderr 최대 길이, 완료된 작업 보관 기간(초), long-poll 최대 대기 시간(초)
+JOBS_OUTPUT_LIMIT = int(os.getenv("JOBS_OUTPUT_LIMIT", str(64 * 1024)))
+JOBS_RETENTION = int(os.getenv("JOBS_RETENTION", str(7 * 24 * 3600)))
+JOBS_WAIT_MAX = int(os.getenv("JOBS_WAIT_MAX", "60"))
+
+JOB_FINISHED = ('succeeded', 'failed', 'interrupted')
+JOB_COLUMNS = ('id', 'kind', 'pool', 'target', 'command', 'status', 'created_at', 'started_at',
+               'finished_at', 'returncode', 'stdout', 'stderr', 'error')
+
+class JobStore:
+    """SQLite(WAL) 작업 상태/출력 저장소 - 스레드별 연결 사용"""
+
+    def __init__(self, path=JOBS_DB_FILE):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._conn() as conn:
+            conn.execute('''CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY, kind TEXT NOT NULL, pool TEXT NOT NULL, target TEXT NOT NULL,
+                command TEXT NOT NULL, status TEXT NOT NULL, created_at REAL NOT NULL,
+                started_at REAL, finished_at REAL, returncode INTEGER, stdout TEXT, stderr TEXT, error TEXT)''')
+            conn.execute('CREATE INDEX IF NOT EXISTS jobs_created_at ON jobs (created_at)')
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def insert(self, job):
+        with self._conn() as conn:
+            conn.execute(f"INSERT INTO jobs ({', '.join(job)}) VALUES ({', '.join('?' * len(job))})",
+                         tuple(job.values()))
+
+    def update(self, job_id, **fields):
+        with self._conn() as conn:
+            conn.execute(f"UPDATE jobs SET {', '.join(f'{k} = ?' for k in fields)} WHERE id = ?",
+                         (*fields.values(), job_id))
+
+    def get(self, job_id):
+        row = self._conn().execute(f"SELECT {', '.join(JOB_COLUMNS)} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return dict(zip(JOB_COLUMNS, row)) if row else None
+
+    def list(self, status=None, limit=50):
+        query = f"SELECT {', '.join(JOB_COLUMNS)} FROM jobs"
+        args = ()
+        if status:
+            query += " WHERE status = ?"
+            args = (status,)
+        rows = self._conn().execute(query + " ORDER BY created_at DESC LIMIT ?", (*args, limit)).fetchall()
+        return [dict(zip(JOB_COLUMNS, row)) for row in rows]
+
+    # 이전 프로세스에서 끝나지 않은 작업은 실행 상태를 알 수 없으므로 interrupted 로 표시
+    def recover(self):
+        with self._conn() as conn:
+            count = conn.execute("UPDATE jobs SET status = 'interrupted', finished_at = ?, "
+                                 "error = '서버 재시작으로 작업 상태를 확인할 수 없습니다.' "
+                                 "WHERE status IN ('pending', 'running')", (time.time(),)).rowcount
+            conn.execute("DELETE FROM jobs WHERE finished_at IS NOT NULL AND finished_at < ?",
+                         (time.time() - JOBS_RETENTION,))
+        return count
+
+def _truncate(text):
+    if text and len(text) > JOBS_OUTPUT_LIMIT:
+        return text[:JOBS_OUTPUT_LIMIT] + f'\n... ({len(text) - JOBS_OUTPUT_LIMIT}자 생략)'
+    return text
+
+def job_to_dict(job):
+    result = dict(job)
+    started, finished = job['started_at'], job['finished_at']
+    result['duration_ms'] = round((finished - started) * 1000, 2) if started and finished else None
+    return result
+
+class _PendingJob:
+    def __init__(self, job_id, kind, pool, target, cmd, on_success, event):
+        self.id = job_id
+        self.kind = kind
+        self.pool = pool
+        self.target = target
+        self.cmd = cmd
+        self.on_success = on_success
+        self.event = event
+
+class JobManager:
+    """오래 걸리는 변경 작업 실행기 - 크기가 제한된 스레드 풀, pool 별 순차 실행, SQLite 에 상태/출력 저장
+
+    pool 별 순서 보장과 대기열은 프로세스 안에서만 유지되므로 단일 worker 프로세스 기준
+    작업을 실행하는 프로세스는 {JOBS_DB_FILE}.lock 공유 잠금을 유지하며, 재시작 복구(recover)는
+    배타 잠금을 얻은 경우 - 작업을 실행 중인 다른 프로세스가 없을 때만 수행
+    """
+
+    def __init__(self, store=None, max_workers=JOBS_MAX_WORKERS):
+        self.store = store or JobStore()
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._busy_pools = set()
+        self._waiting = {}    # pool -> 실행 대기 작업 deque
+        self._active = {}     # (kind, target) -> job id (대기/실행 중)
+        self._lock_fd = None
+
+    # 작업 실행 준비 - start_background_services() 또는 첫 submit() 에서 호출
+    def start(self):
+        with self._lock:
+            if self._lock_fd is not None:
+                return
+            path = f"{self.store.path}.lock"
+            fd = try_lock_file(path)
+            if fd is None:
+                logger.info(f"다른 프로세스에서 작업을 실행 중이므로 재시작 복구를 건너뜀 - 경로: {path}")
+                self._lock_fd = share_lock_file(path)
+                return
+            interrupted = self.store.recover()
+            if interrupted:
+                logger.warning(f"재시작 전 완료되지 않은 작업 {interrupted}개를 interrupted 로 표시")
+            self._lock_fd = share_lock_file(path, fd)
+
+    # 같은 대상에 같은 작업이 대기/실행 중이면 새로 만들지 않고 기존 작업 반환 (재시도 시 중복 실행 방지)
+    # event: 성공 시 발행할 (이벤트 종류, 데이터)
+    def submit(self, kind, pool, target, cmd, on_success=None, event=None):
+        self.start()
+        with self._lock:
+            active_id = self._active.get((kind, target))
+            if active_id is not None:
+                logger.info(f"진행 중인 작업 재사용 - 작업: {active_id}, 종류: {kind}, 대상: {target}")
+                return job_to_dict(self.store.get(active_id))
+            job = _PendingJob(uuid.uuid4().hex[:12], kind, pool, target, cmd, on_success, event)
+            self.store.insert({'id': job.id, 'kind': kind, 'pool': pool, 'target': target,
+                               'command': ' '.join(cmd), 'status': 'pending', 'created_at': time.time()})
+            self._active[(kind, target)] = job.id
+            start = pool not in self._busy_pools
+            if start:
+                self._busy_pools.add(pool)
+            else:
+                self._waiting.setdefault(pool, deque()).append(job)
+        if start:
+            self._executor.submit(self._run, job)
+        logger.info(f"작업 등록 - 작업: {job.id}, 종류: {kind}, 명령: {' '.join(cmd)}, 대기: {not start}")
+        return self.get(job.id)
+
+    def _run(self, job):
+        store = self.store
+        try:
+            store.update(job.id, status='running', started_at=time.time())
+            self._notify()
+            fields = {}
+            try:
+                result = run_command(job.cmd, timeout=JOBS_COMMAND_TIMEOUT)
+                fields = {'returncode': result.returncode, 'stdout': _truncate(result.stdout),
+                          'stderr': _truncate(result.stderr)}
+                if result.returncode == 0:
+                    fields['status'] = 'succeeded'
+                    if job.on_success:
+                        job.on_success()
+                    if job.event:
+                        publish_event(job.event[0], job=job.id, **job.event[1])
+                else:
+                    fields['status'] = 'failed'
+                    fields['error'] = f'명령이 실패했습니다. (종료 코드: {result.returncode})'
+            except subprocess.TimeoutExpired:
+                fields.update(status='failed', error=f'명령 제한 시간({JOBS_COMMAND_TIMEOUT}초)을 초과했습니다.')
+            except Exception as e:
+                logger.error(f"작업 실행 중 예외 발생 - 작업: {job.id}, 오류: {str(e)}", exc_info=True)
+                fields.update(status=fields.get('status', 'failed'), error=str(e))
+            store.update(job.id, finished_at=time.time(), **fields)
+            log = logger.info if fields['status'] == 'succeeded' else logger.error
+            log(f"작업 종료 - 작업: {job.id}, 종류: {job.kind}, 상태: {fields['status']}, 오류: {fields.get('error')}")
+        finally:
+            with self._lock:
+                self._active.pop((job.kind, job.target), None)
+                waiting = self._waiting.get(job.pool)
+                following = waiting.popleft() if waiting else None
+                if not waiting:
+                    self._waiting.pop(job.pool, None)
+                if following is None:
+                    self._busy_pools.discard(job.pool)
+                self._changed.notify_all()
+            if following is not None:
+                self._executor.submit(self._run, following)
+
+    def _notify(self):
+        with self._lock:
+            self._changed.notify_all()
+
+    def get(self, job_id):
+        job = self.store.get(job_id)
+        return job_to_dict(job) if job else None
+
+    def list(self, status=None, limit=50):
+        return [job_to_dict(job) for job in self.store.list(status, limit)]
+
+    # 작업이 끝나거나 timeout 이 지날 때까지 대기 (None 이면 끝날 때까지)
+    def wait(self, job_id, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            job = self.get(job_id)
+            if job is None or job['status'] in JOB_FINISHED:
+                return job
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return job
+            # 다른 worker 프로세스가 실행 중인 작업도 볼 수 있도록 최대 1초마다 다시 조회
+            with self._changed:
+                self._changed.wait(1 if remaining is None else min(remaining, 1))
+
+    # 작업 완료까지 기다린 뒤 run_command(check=True) 와 같은 형태로 결과 반환
+    def result(self, job_id):
+        job = self.wait(job_id)
+        if job['status'] == 'succeeded':
+            return subprocess.CompletedProcess(job['command'].split(), job['returncode'],
+                                               job['stdout'] or '', job['stderr'] or '')
+        if job['returncode'] not in (None, 0):
+            raise subprocess.CalledProcessError(job['returncode'], job['command'], job['stdout'], job['stderr'])
+        raise RuntimeError(job['error'] or f"작업이 완료되지 않았습니다: {job['status']}")
+
+    def stats(self):
+        with self._lock:
+            return {
+                'max_workers': self.max_workers,
+                'busy_pools': sorted(self._busy_pools),
+                'waiting': {pool: len(jobs) for pool, jobs in self._waiting.items()},
+                'active': len(self._active)
+            }
+
+job_manager = JobManager()
+
+# 변경 API 공통 - ?async=true 이면 작업 등록 후 바로 202 응답
+def async_requested():
+    return request.args.get('async', 'false').lower() in ('1', 'true', 'yes')
+
+def job_accepted(job):
+    return job, 202, {'Location': f"/jobs/{job['id']}"}
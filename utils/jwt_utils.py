@@ -1,9 +1,10 @@
-import json
 import os
 from flask_jwt_extended import JWTManager, create_access_token
 from utils.blocklist import BLOCKLIST, add_to_blocklist
+from utils.user_store import user_store, USERS_FILE
+from utils.ip_allowlist import ip_allowlist
 from werkzeug.security import check_password_hash
-from flask import current_app, jsonify
+from flask import jsonify
 from utils.logger import get_logger
 from dotenv import load_dotenv
 
@@ -17,40 +18,25 @@ def configure_jwt(app):
   # 토큰 만료시간
   freshness_in_minutes = 1
   app.config["JWT_ACCESS_TOKEN_EXPIRES"] = freshness_in_minutes * 30 # 30분
+  # flask-restx 가 JWT 예외를 500 으로 처리하지 않고 아래 콜백(401 응답)으로 전달되도록 함
+  app.config["PROPAGATE_EXCEPTIONS"] = True
   jwt.init_app(app)
   logger.info("JWT 설정 완료 - 시크릿 키 및 만료 시간 설정")
 
-# 사용자 정보가 담긴 파일 경로
-USERS_FILE = os.path.join(os.path.dirname(__file__), '../data/users.json')
-
-# 사용자 정보 로딩
+# 사용자 정보 로딩 (저장소 캐시 사용 - 파일이 바뀐 경우에만 다시 읽음)
 def load_users():
-    if not os.path.exists(USERS_FILE):
-        logger.warning(f"사용자 정보 파일 없음 - 경로: {USERS_FILE}")
-        return {}
-    try:
-        with open(USERS_FILE, 'r') as f:
-            users = json.load(f)
-            logger.info(f"사용자 정보 로딩 성공 - 사용자 수: {len(users)}")
-            return users
-    except Exception as e:
-        logger.error(f"사용자 정보 로딩 실패 - 경로: {USERS_FILE}, 오류: {str(e)}", exc_info=True)
-        return {}
-
+    return user_store.all()
 
 # 사용자 정보 저장
 def save_users(users):
     try:
-        with open(USERS_FILE, 'w') as f:
-            json.dump(users, f, indent=2)
-        logger.info(f"사용자 정보 저장 성공 - 사용자 수: {len(users)}")
+        user_store.replace_all(users)
     except Exception as e:
-        logger.error(f"사용자 정보 저장 실패 - 경로: {USERS_FILE}, 오류: {str(e)}", exc_info=True)
+        logger.error(f"사용자 정보 저장 실패 - 오류: {str(e)}", exc_info=True)
 
 # 사용자 인증
 def authenticate_user(username, password):
-    users = load_users()
-    user = users.get(username)
+    user = user_store.get(username)
     if not user:
         logger.warning(f"인증 실패 - 사용자 없음: {username}")
         return False
@@ -61,28 +47,17 @@ def authenticate_user(username, password):
         logger.warning(f"인증 실패 - 비밀번호 불일치: {username}")
         return False
 
-# IP가 허용된 대역인지 확인인
+# IP가 허용된 대역인지 확인 (앱 시작 시 컴파일된 대역 사용)
 def is_ip_allowed(ip):
-    allowed_ranges = current_app.config.get('ALLOWED_IP_RANGES', ['192.168.20.0/24','192.168.25.0/24','127.0.0.1/32'])
-    import ipaddress
-    try:
-        client_ip = ipaddress.ip_address(ip)
-        for cidr in allowed_ranges:
-            if client_ip in ipaddress.ip_network(cidr):
-                logger.info(f"허용된 IP 접근 - IP: {ip}, 허용 대역: {cidr}")
-                return True
-        logger.warning(f"차단된 IP 접근 시도 - IP: {ip}")
-        return False
-    except ValueError as e:
-        logger.error(f"IP 형식 오류 - 입력값: {ip}, 오류: {str(e)}", exc_info=True)
-        return False
-    
+    return ip_allowlist.contains(ip)
+
 # 토큰이 블록리스트에 있는지 확인하는 함수
 # 블록리스트에 있으면 해당 토큰이 유효하지 않다고 판단
 @jwt.token_in_blocklist_loader
 def check_if_token_in_blocklist(jwt_header, jwt_payload):
     # jti=jwt id
-    in_blocklist = jwt_payload["jti"] in BLOCKLIST
+    jti = jwt_payload["jti"]
+    in_blocklist = jti in BLOCKLIST
     logger.debug(f"토큰 블록리스트 확인 - JTI: {jti}, 차단 여부: {in_blocklist}")
     return in_blocklist
 
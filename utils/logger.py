@@ -1,45 +1,139 @@
+import atexit
+import json
 import logging
-from logging.handlers import RotatingFileHandler
 import os
-from flask_jwt_extended import get_jwt_identity, jwt_required
-from functools import wraps
+import queue
+import threading
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from flask import g, has_request_context
+from flask_jwt_extended import get_jwt_identity
 
 LOG_DIR = "logs"
 if not os.path.exists(LOG_DIR):
     os.makedirs(LOG_DIR)
 
+# 로그 형식 (text | json), 레벨, 기록 대기열 크기 (가득 차면 버림)
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+def _current_user():
+    if not has_request_context():
+        return "system"
+    # 요청당 한 번만 JWT 에서 사용자 ID 를 읽고 g 에 보관
+    user_id = g.get('log_user_id')
+    if user_id is None:
+        try:
+            user_id = get_jwt_identity() or "anonymous"
+        except Exception:
+            # JWT 검증 전(로그인 등)에는 캐시하지 않음
+            return "system"
+        g.log_user_id = user_id
+    return user_id
+
 class UserContextFilter(logging.Filter):
     """사용자 정보를 로그에 추가하는 필터"""
     def filter(self, record):
-        try:
-            # JWT에서 사용자 ID 추출 시도
-            user_id = get_jwt_identity()
-            record.user_id = f"[{user_id}]" if user_id else "[anonymous]"
-        except:
-            # JWT 컨텍스트가 없는 경우 (예: 시스템 로그)
-            record.user_id = "[system]"
+        record.user = _current_user()
+        record.user_id = f"[{record.user}]"
         return True
 
+class JsonFormatter(logging.Formatter):
+    """한 줄 JSON 로그 포맷터"""
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'user': getattr(record, 'user', 'system'),
+            'message': record.getMessage(),
+        }
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+class _PreformattedQueueHandler(QueueHandler):
+    """요청 스레드에서는 포맷만 하고 대기열에 넣음 - 파일 기록/로테이션은 리스너 스레드가 처리"""
+    dropped = 0
+
+    # 기본 구현은 레코드를 복사하지만 이 레코드는 다른 핸들러가 쓰지 않으므로 그대로 변경
+    def prepare(self, record):
+        msg = self.format(record)
+        record.message = msg
+        record.msg = msg
+        record.args = None
+        record.exc_info = None
+        record.exc_text = None
+        record.stack_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            _PreformattedQueueHandler.dropped += 1
+
+class _RoutingHandler(logging.Handler):
+    """리스너 스레드에서 로거 이름별 파일로 전달"""
+    def __init__(self):
+        super().__init__()
+        self.handlers = {}
+
+    def emit(self, record):
+        handler = self.handlers.get(record.name)
+        if handler is not None:
+            handler.handle(record)
+
+_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+_router = _RoutingHandler()
+_listener = None
+_lock = threading.Lock()
+
+def _start_listener():
+    global _listener
+    if _listener is None:
+        _listener = QueueListener(_queue, _router)
+        _listener.start()
+        atexit.register(stop_logging)
+
+# 남은 로그를 모두 기록하고 리스너 종료
+def stop_logging():
+    global _listener
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+def _make_formatter():
+    if LOG_FORMAT == "json":
+        return JsonFormatter()
+    # 사용자 정보를 포함한 포맷터
+    return logging.Formatter("[%(asctime)s] %(user_id)s %(levelname)s: %(message)s")
+
 def get_logger(name):
     logger = logging.getLogger(name)
     if logger.hasHandlers():
         return logger  # 이미 설정된 경우 재사용
-    
-    logger.setLevel(logging.INFO)  # 로그 레벨 info로 설정
-    
-    file_handler = RotatingFileHandler(
-        os.path.join(LOG_DIR, f"{name}.log"),
-        maxBytes=10*1024*1024,  # 10MB
-        backupCount=5
-    )
-    
-    # 사용자 정보를 포함한 포맷터
-    formatter = logging.Formatter("[%(asctime)s] %(user_id)s %(levelname)s: %(message)s")
-    file_handler.setFormatter(formatter)
-    
-    # 사용자 컨텍스트 필터 추가
-    user_filter = UserContextFilter()
-    file_handler.addFilter(user_filter)
-    
-    logger.addHandler(file_handler)
-    return logger
\ No newline at end of file
+
+    with _lock:
+        if logger.hasHandlers():
+            return logger
+        logger.setLevel(LOG_LEVEL)
+
+        file_handler = RotatingFileHandler(
+            os.path.join(LOG_DIR, f"{name}.log"),
+            maxBytes=10*1024*1024,  # 10MB
+            backupCount=5
+        )
+        # 메시지는 대기열에 넣기 전에 완성되므로 그대로 기록
+        file_handler.setFormatter(logging.Formatter("%(message)s"))
+        _router.handlers[name] = file_handler
+
+        queue_handler = _PreformattedQueueHandler(_queue)
+        queue_handler.setFormatter(_make_formatter())
+        # 사용자 컨텍스트 필터 추가
+        queue_handler.addFilter(UserContextFilter())
+
+        logger.addHandler(queue_handler)
+        _start_listener()
+    return logger
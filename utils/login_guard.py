@@ -0,0 +1,138 @@
+import math, os, threading, time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from utils.jwt_utils import authenticate_user
+from utils.logger import get_logger
+
+logger = get_logger("user")
+
+# 비밀번호 해시 검증 스레드 수와 대기 가능 개수, 대기 시간(초)
+LOGIN_HASH_WORKERS = int(os.getenv("LOGIN_HASH_WORKERS", "2"))
+LOGIN_HASH_QUEUE = int(os.getenv("LOGIN_HASH_QUEUE", "16"))
+LOGIN_HASH_TIMEOUT = float(os.getenv("LOGIN_HASH_TIMEOUT", "10"))
+# 토큰 버킷 (초당 충전량, 최대 보유량) - IP 별 / 사용자 ID 별
+LOGIN_IP_RATE = float(os.getenv("LOGIN_IP_RATE", "1"))
+LOGIN_IP_BURST = int(os.getenv("LOGIN_IP_BURST", "10"))
+LOGIN_USER_RATE = float(os.getenv("LOGIN_USER_RATE", "0.2"))
+LOGIN_USER_BURST = int(os.getenv("LOGIN_USER_BURST", "5"))
+# 버킷 테이블 최대 크기 (초과 시 가장 오래 사용되지 않은 항목 제거)
+LOGIN_THROTTLE_MAX_ENTRIES = int(os.getenv("LOGIN_THROTTLE_MAX_ENTRIES", "10000"))
+
+class LoginBusyError(Exception):
+    pass
+
+class TokenBucketTable:
+    """키별 토큰 버킷 - [토큰 수, 마지막 갱신 시각] 만 보관하고 LRU 로 크기 제한"""
+
+    def __init__(self, rate, burst, max_entries=LOGIN_THROTTLE_MAX_ENTRIES):
+        self.rate = rate
+        self.burst = burst
+        self.max_entries = max_entries
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    # 허용되면 0, 아니면 다시 시도 가능할 때까지의 시간(초)
+    def consume(self, key):
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [float(self.burst), now]
+                if len(self._buckets) > self.max_entries:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                return 0
+            return (1 - bucket[0]) / self.rate if self.rate > 0 else math.inf
+
+    def __len__(self):
+        return len(self._buckets)
+
+class LoginGuard:
+    """로그인 요청 제한 - IP/사용자별 토큰 버킷과 크기가 제한된 해시 검증 스레드 풀"""
+
+    def __init__(self, workers=LOGIN_HASH_WORKERS, queue_size=LOGIN_HASH_QUEUE):
+        self.workers = workers
+        self.queue_size = queue_size
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='login-hash')
+        # 실행 중 + 대기 중 작업 수 제한
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+        self.ip_buckets = TokenBucketTable(LOGIN_IP_RATE, LOGIN_IP_BURST)
+        self.user_buckets = TokenBucketTable(LOGIN_USER_RATE, LOGIN_USER_BURST)
+        self._counters = {'attempts': 0, 'success': 0, 'failure': 0,
+                          'rejected_ip': 0, 'rejected_user': 0, 'rejected_busy': 0, 'timeout': 0}
+        self._latencies = deque(maxlen=1000)
+        self._lock = threading.Lock()
+
+    def _count(self, key):
+        with self._lock:
+            self._counters[key] += 1
+
+    # 제한에 걸리면 (사유, 재시도 대기 시간), 아니면 None
+    def throttle(self, client_ip, username):
+        self._count('attempts')
+        wait = self.ip_buckets.consume(client_ip)
+        if wait:
+            self._count('rejected_ip')
+            return 'ip', wait
+        wait = self.user_buckets.consume(username)
+        if wait:
+            self._count('rejected_user')
+            return 'user', wait
+        return None
+
+    def _timed_authenticate(self, username, password):
+        started = time.perf_counter()
+        try:
+            return authenticate_user(username, password)
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            with self._lock:
+                self._latencies.append(elapsed)
+
+    # 대기열이 가득 차거나 LOGIN_HASH_TIMEOUT 안에 검증이 끝나지 않으면 LoginBusyError
+    def verify(self, username, password):
+        if not self._slots.acquire(blocking=False):
+            self._count('rejected_busy')
+            raise LoginBusyError('로그인 요청이 많아 처리할 수 없습니다.')
+        try:
+            future = self._executor.submit(self._timed_authenticate, username, password)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            ok = future.result(timeout=LOGIN_HASH_TIMEOUT)
+        except FutureTimeoutError:
+            # 아직 시작되지 않았으면 대기열에서 제거 (이미 실행 중이면 끝난 뒤 슬롯 반환)
+            future.cancel()
+            self._count('timeout')
+            raise LoginBusyError('로그인 요청이 많아 제한 시간 안에 처리하지 못했습니다.')
+        self._count('success' if ok else 'failure')
+        return ok
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self._counters)
+            latencies = sorted(self._latencies)
+        latency = {'count': len(latencies)}
+        if latencies:
+            latency.update({
+                'avg_ms': round(sum(latencies) / len(latencies), 2),
+                'p95_ms': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 2),
+                'max_ms': round(latencies[-1], 2),
+            })
+        return {
+            **counters,
+            'hash_latency': latency,
+            'hash_workers': self.workers,
+            'hash_queue_size': self.queue_size,
+            'tracked_ips': len(self.ip_buckets),
+            'tracked_users': len(self.user_buckets)
+        }
+
+login_guard = LoginGuard()
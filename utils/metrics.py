@@ -0,0 +1,250 @@
+import itertools, os, threading, time
+from bisect import bisect_left
+from flask import Response, g, has_request_context, request
+from utils.command_runner import command_runner, run_command
+from utils.logger import get_logger
+
+logger = get_logger("metrics")
+
+# 지표 이름 접두사, 카운터 분할 수 (스레드별로 분산해 잠금 경합 감소)
+METRICS_PREFIX = os.getenv("METRICS_PREFIX", "nas")
+METRICS_STRIPES = int(os.getenv("METRICS_STRIPES", "16"))
+# 히스토그램 구간(초) - HTTP 요청 / 외부 명령
+HTTP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+COMMAND_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+# /metrics 조회 시 zpool list 제한 시간(초)
+METRICS_ZPOOL_TIMEOUT = float(os.getenv("METRICS_ZPOOL_TIMEOUT", "10"))
+INF_LABEL = 'le="+Inf"'
+ZPOOL_HEALTH_STATES = ('ONLINE', 'DEGRADED', 'FAULTED', 'OFFLINE', 'UNAVAIL', 'REMOVED', 'SUSPENDED')
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _labels(names, values, extra=None):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+# 스레드별 조각 번호 - 스레드 ID 는 정렬된 주소값이라 나머지로 나누면 한쪽에 몰리므로 순서대로 배정
+_stripe_local = threading.local()
+_stripe_counter = itertools.count()
+
+def _stripe_index():
+    index = getattr(_stripe_local, 'index', None)
+    if index is None:
+        index = _stripe_local.index = next(_stripe_counter) % METRICS_STRIPES
+    return index
+
+class _Striped:
+    """라벨 값 -> 값 목록 테이블을 METRICS_STRIPES 개로 나눠 보관
+
+    요청 스레드는 자기 조각의 잠금만 잡고, 조회 시 모든 조각을 합산함
+    """
+
+    def __init__(self, name, help, labelnames, width):
+        self.name = f"{METRICS_PREFIX}_{name}"
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.width = width
+        self._stripes = [({}, threading.Lock()) for _ in range(METRICS_STRIPES)]
+
+    def _stripe(self):
+        return self._stripes[_stripe_index()]
+
+    def _merged(self):
+        merged = {}
+        for values, lock in self._stripes:
+            with lock:
+                items = [(k, list(v)) for k, v in values.items()]
+            for key, row in items:
+                total = merged.setdefault(key, [0] * self.width)
+                for i, v in enumerate(row):
+                    total[i] += v
+        return merged
+
+class Counter(_Striped):
+    def __init__(self, name, help, labelnames=()):
+        super().__init__(name, help, labelnames, 1)
+
+    def inc(self, labels=(), amount=1):
+        values, lock = self._stripe()
+        with lock:
+            row = values.get(labels)
+            if row is None:
+                row = values[labels] = [0]
+            row[0] += amount
+
+    def expose(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for key, row in sorted(self._merged().items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, key)} {_number(row[0])}")
+        return lines
+
+class Gauge(Counter):
+    """inc/dec 로 증감하는 게이지 (진행 중인 요청 수 등) - 같은 조각에서 증가/감소가 짝을 이룸"""
+
+    def dec(self, labels=(), amount=1):
+        self.inc(labels, -amount)
+
+    def expose(self):
+        lines = super().expose()
+        lines[1] = f"# TYPE {self.name} gauge"
+        return lines
+
+class Histogram(_Striped):
+    # 값 목록: 구간별 개수 ..., 합계, 개수
+    def __init__(self, name, help, labelnames=(), buckets=HTTP_BUCKETS):
+        self.buckets = tuple(buckets)
+        super().__init__(name, help, labelnames, len(self.buckets) + 2)
+
+    def observe(self, labels, value):
+        index = bisect_left(self.buckets, value)
+        values, lock = self._stripe()
+        with lock:
+            row = values.get(labels)
+            if row is None:
+                row = values[labels] = [0] * self.width
+            if index < len(self.buckets):
+                row[index] += 1
+            row[-2] += value
+            row[-1] += 1
+
+    def expose(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, row in sorted(self._merged().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, row):
+                cumulative += count
+                le = 'le="%s"' % _number(float(bound))
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, INF_LABEL)} {row[-1]}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(float(row[-2]))}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {row[-1]}")
+        return lines
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics = []
+        self.collectors = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    # 조회 시점에 값을 만드는 함수 (텍스트 줄 목록 반환)
+    def add_collector(self, collector):
+        self.collectors.append(collector)
+
+    def expose(self):
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.expose())
+        for collector in self.collectors:
+            try:
+                lines.extend(collector())
+            except Exception as e:
+                logger.error(f"지표 수집 중 예외 발생 - {getattr(collector, '__name__', collector)}: {str(e)}")
+        return '\n'.join(lines) + '\n'
+
+registry = MetricsRegistry()
+
+http_requests = registry.register(Counter(
+    'http_requests_total', 'HTTP 요청 수', ('namespace', 'route', 'method', 'status')))
+http_duration = registry.register(Histogram(
+    'http_request_duration_seconds', 'HTTP 요청 처리 시간', ('namespace', 'route', 'method'), HTTP_BUCKETS))
+http_in_flight = registry.register(Gauge(
+    'http_requests_in_flight', '처리 중인 HTTP 요청 수', ('namespace',)))
+command_duration = registry.register(Histogram(
+    'command_duration_seconds', '외부 명령 실행 시간', ('command', 'namespace'), COMMAND_BUCKETS))
+command_results = registry.register(Counter(
+    'command_runs_total', '외부 명령 실행 결과 (ok | error | timeout)', ('command', 'namespace', 'result')))
+
+# 경로 첫 부분 (zpool, zfs, nfs, snapshot, user ...) - 없는 경로는 라벨 수가 늘지 않도록 하나로 묶음
+def _namespace():
+    if request.url_rule is None:
+        return 'unmatched'
+    return request.path.strip('/').split('/', 1)[0] or 'root'
+
+def _route():
+    rule = request.url_rule
+    return rule.rule if rule is not None else '<unmatched>'
+
+# command_runner 에서 명령이 끝날 때마다 호출 - 요청 밖(스케줄러 등)은 background
+def observe_command(cmd_class, duration, returncode, timed_out):
+    namespace = g.get('metrics_namespace', 'background') if has_request_context() else 'background'
+    command_duration.observe((cmd_class, namespace), duration)
+    result = 'timeout' if timed_out else ('ok' if returncode == 0 else 'error')
+    command_results.inc((cmd_class, namespace, result))
+
+# zpool 용량/상태 게이지 - /metrics 조회 시 zpool list 한 번으로 생성
+def collect_zpool_metrics():
+    result = run_command(['zpool', 'list', '-Hp', '-o', 'name,size,allocated,free,capacity,health'],
+                         timeout=METRICS_ZPOOL_TIMEOUT)
+    pools = []
+    for line in result.stdout.splitlines():
+        fields = line.split('\t')
+        if len(fields) == 6:
+            pools.append(fields)
+    name = f"{METRICS_PREFIX}_zpool"
+    lines = [f"# HELP {name}_up zpool list 실행 성공 여부", f"# TYPE {name}_up gauge",
+             f"{name}_up {1 if result.returncode == 0 else 0}"]
+    for metric, index, help in (('size_bytes', 1, '전체 용량'), ('allocated_bytes', 2, '사용 용량'),
+                                ('free_bytes', 3, '남은 용량'), ('capacity_ratio', 4, '사용률 (0~1)')):
+        lines += [f"# HELP {name}_{metric} zpool {help}", f"# TYPE {name}_{metric} gauge"]
+        for fields in pools:
+            value = fields[index].rstrip('%')
+            if not value.isdigit():
+                continue
+            value = int(value) / 100 if metric == 'capacity_ratio' else int(value)
+            lines.append(f"{name}_{metric}{_labels(('pool',), (fields[0],))} {_number(value)}")
+    lines += [f"# HELP {name}_health zpool 상태 (현재 상태만 1)", f"# TYPE {name}_health gauge"]
+    for fields in pools:
+        for state in ZPOOL_HEALTH_STATES:
+            lines.append(f"{name}_health{_labels(('pool', 'state'), (fields[0], state))} {int(fields[5] == state)}")
+    return lines
+
+def collect_command_runner():
+    name = f"{METRICS_PREFIX}_command_inflight"
+    return [f"# HELP {name} 실행 중인 읽기 전용 명령 수 (중복 합치기 대상)", f"# TYPE {name} gauge",
+            f"{name} {command_runner.stats()['inflight']}"]
+
+registry.add_collector(collect_zpool_metrics)
+registry.add_collector(collect_command_runner)
+
+# 요청 처리 시간/상태 코드/진행 중 요청 수 기록 및 /metrics 등록
+def configure_metrics(app):
+    command_runner.add_observer(observe_command)
+
+    @app.before_request
+    def start_request_metrics():
+        g.metrics_started = time.perf_counter()
+        g.metrics_namespace = _namespace()
+        http_in_flight.inc((g.metrics_namespace,))
+
+    @app.after_request
+    def record_response_status(response):
+        g.metrics_status = response.status_code
+        return response
+
+    # 처리되지 않은 예외로 응답이 없으면 500 으로 기록
+    @app.teardown_request
+    def finish_request_metrics(exc):
+        started = g.pop('metrics_started', None)
+        if started is None:
+            return
+        namespace, route, method = g.metrics_namespace, _route(), request.method
+        http_in_flight.dec((namespace,))
+        http_duration.observe((namespace, route, method), time.perf_counter() - started)
+        http_requests.inc((namespace, route, method, str(g.get('metrics_status', 500))))
+
+    @app.route('/metrics')
+    def prometheus_metrics():
+        return Response(registry.expose(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+    logger.info("Prometheus 지표 수집 설정 완료")
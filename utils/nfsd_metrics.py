@@ -0,0 +1,193 @@
+import os, threading, time
+from collections import deque
+from utils.logger import get_logger
+
+logger = get_logger("nfs")
+
+# procfs 위치 (테스트 시 가짜 디렉토리 지정 가능), 수집 주기(초), 보관 샘플 수
+NFS_PROC_ROOT = os.getenv("NFS_PROC_ROOT", "/proc")
+NFS_METRICS_INTERVAL = int(os.getenv("NFS_METRICS_INTERVAL", "5"))
+NFS_METRICS_CAPACITY = int(os.getenv("NFS_METRICS_CAPACITY", "720"))
+NFS_METRICS_WINDOWS = [int(w) for w in os.getenv("NFS_METRICS_WINDOWS", "60,300,900").split(',')]
+
+# /proc/net/rpc/nfsd 의 procN 줄 순서대로의 연산 이름
+NFS_PROC_NAMES = {
+    'proc2': ['null', 'getattr', 'setattr', 'root', 'lookup', 'readlink', 'read', 'wrcache', 'write',
+              'create', 'remove', 'rename', 'link', 'symlink', 'mkdir', 'rmdir', 'readdir', 'fsstat'],
+    'proc3': ['null', 'getattr', 'setattr', 'lookup', 'access', 'readlink', 'read', 'write', 'create',
+              'mkdir', 'symlink', 'mknod', 'remove', 'rmdir', 'rename', 'link', 'readdir', 'readdirplus',
+              'fsstat', 'fsinfo', 'pathconf', 'commit'],
+    'proc4': ['null', 'compound'],
+    'proc4ops': ['op0-unused', 'op1-unused', 'op2-future', 'access', 'close', 'commit', 'create',
+                 'delegpurge', 'delegreturn', 'getattr', 'getfh', 'link', 'lock', 'lockt', 'locku',
+                 'lookup', 'lookupp', 'nverify', 'open', 'openattr', 'open_confirm', 'open_downgrade',
+                 'putfh', 'putpubfh', 'putrootfh', 'read', 'readdir', 'readlink', 'remove', 'rename',
+                 'renew', 'restorefh', 'savefh', 'secinfo', 'setattr', 'setclientid',
+                 'setclientid_confirm', 'verify', 'write', 'release_lockowner', 'backchannel_ctl',
+                 'bind_conn_to_session', 'exchange_id', 'create_session', 'destroy_session',
+                 'free_stateid', 'get_dir_delegation', 'getdeviceinfo', 'getdevicelist', 'layoutcommit',
+                 'layoutget', 'layoutreturn', 'secinfo_no_name', 'sequence', 'set_ssv', 'test_stateid',
+                 'want_delegation', 'destroy_clientid', 'reclaim_complete', 'allocate', 'copy',
+                 'copy_notify', 'deallocate', 'io_advise', 'layouterror', 'layoutstats', 'offload_cancel',
+                 'offload_status', 'read_plus', 'seek', 'write_same', 'clone', 'getxattr', 'setxattr',
+                 'listxattrs', 'removexattr'],
+}
+
+# 고정 필드 줄 (이름 순서대로)
+NFSD_STAT_FIELDS = {
+    'rc': ['hits', 'misses', 'nocache'],
+    'io': ['read_bytes', 'write_bytes'],
+    'net': ['count', 'udp', 'tcp', 'tcpconn'],
+    'rpc': ['count', 'badcnt', 'badfmt', 'badauth', 'badclnt'],
+}
+
+# 누적 카운터가 아닌 현재 값 (비율 계산에서 제외)
+NFSD_GAUGES = {'th.threads'}
+
+def nfsd_path(*parts, proc_root=None):
+    return os.path.join(proc_root or NFS_PROC_ROOT, *parts)
+
+# /proc/net/rpc/nfsd 파싱 -> {'rc.hits': n, 'proc3.read': n, ...}
+def parse_nfsd_stats(text):
+    counters = {}
+    for line in text.splitlines():
+        parts = line.split()
+        if len(parts) < 2:
+            continue
+        key, values = parts[0], parts[1:]
+        if key in NFS_PROC_NAMES:
+            # 첫 값은 연산 개수
+            names = NFS_PROC_NAMES[key]
+            for i, value in enumerate(values[1:]):
+                name = names[i] if i < len(names) else f'op{i}'
+                counters[f'{key}.{name}'] = int(value)
+        elif key in NFSD_STAT_FIELDS:
+            for name, value in zip(NFSD_STAT_FIELDS[key], values):
+                counters[f'{key}.{name}'] = int(value)
+        elif key == 'th':
+            # th <스레드 수> <모든 스레드가 사용 중이었던 횟수> <히스토그램(구버전)>
+            counters['th.threads'] = int(values[0])
+            if len(values) > 1:
+                counters['th.fullcnt'] = int(values[1])
+    return counters
+
+def read_nfsd_stats(proc_root=None):
+    with open(nfsd_path('net', 'rpc', 'nfsd', proc_root=proc_root), 'r') as f:
+        return parse_nfsd_stats(f.read())
+
+class NfsdMetrics:
+    """nfsd 통계 수집기 - 주기적으로 샘플을 링 버퍼에 저장하고 구간별 초당 비율을 계산"""
+
+    def __init__(self, interval=NFS_METRICS_INTERVAL, capacity=NFS_METRICS_CAPACITY, proc_root=None):
+        self.interval = interval
+        self.proc_root = proc_root
+        self._samples = deque(maxlen=capacity)  # (monotonic, time, counters)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._unavailable_logged = False
+
+    def start(self):
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='nfsd-metrics', daemon=True)
+            self._thread.start()
+        logger.info(f"nfsd 통계 수집 스레드 시작 - 주기: {self.interval}초, 보관: {self._samples.maxlen}개")
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.sample()
+            self._stop.wait(self.interval)
+
+    def sample(self):
+        try:
+            counters = read_nfsd_stats(self.proc_root)
+        except FileNotFoundError:
+            # nfsd 모듈이 로드되지 않은 상태 - 한 번만 기록
+            if not self._unavailable_logged:
+                logger.warning("nfsd 통계를 읽을 수 없습니다 (nfs-server 미실행)")
+                self._unavailable_logged = True
+            return None
+        except Exception as e:
+            logger.error(f"nfsd 통계 수집 중 예외 발생: {str(e)}", exc_info=True)
+            return None
+        self._unavailable_logged = False
+        with self._lock:
+            self._samples.append((time.monotonic(), time.time(), counters))
+        return counters
+
+    def latest(self):
+        with self._lock:
+            return self._samples[-1] if self._samples else None
+
+    # window 초 이내의 가장 오래된 샘플과 최신 샘플의 차이로 초당 비율 계산
+    def rates(self, window):
+        with self._lock:
+            samples = list(self._samples)
+        if len(samples) < 2:
+            return None
+        newest = samples[-1]
+        oldest = next((s for s in samples if newest[0] - s[0] <= window), samples[-2])
+        if oldest is newest:
+            oldest = samples[-2]
+        elapsed = newest[0] - oldest[0]
+        rates = {}
+        for key, value in newest[2].items():
+            if key in NFSD_GAUGES:
+                continue
+            delta = value - oldest[2].get(key, 0)
+            # 카운터가 줄었으면 nfsd 재시작 - 재시작 이후 값만 반영
+            rates[key] = (value if delta < 0 else delta) / elapsed
+        return elapsed, rates
+
+    def summary(self, window):
+        result = self.rates(window)
+        if result is None:
+            return {'window_seconds': window, 'available': False}
+        elapsed, rates = result
+        latest = self.latest()[2]
+        hits, misses = rates.get('rc.hits', 0), rates.get('rc.misses', 0)
+        ops = {}
+        for key, rate in rates.items():
+            group, _, name = key.partition('.')
+            if group in NFS_PROC_NAMES and rate > 0:
+                ops.setdefault(group, {})[name] = round(rate, 2)
+        top_ops = sorted(((f'{g}.{n}', r) for g, names in ops.items() for n, r in names.items()),
+                         key=lambda item: item[1], reverse=True)[:10]
+        return {
+            'window_seconds': window,
+            'measured_seconds': round(elapsed, 2),
+            'available': True,
+            'rpc_per_sec': round(rates.get('rpc.count', 0), 2),
+            'bad_rpc_per_sec': round(rates.get('rpc.badcnt', 0), 2),
+            'read_bytes_per_sec': round(rates.get('io.read_bytes', 0), 2),
+            'write_bytes_per_sec': round(rates.get('io.write_bytes', 0), 2),
+            'reply_cache': {
+                'hits_per_sec': round(hits, 2),
+                'misses_per_sec': round(misses, 2),
+                'hit_ratio': round(hits / (hits + misses), 4) if hits + misses else None
+            },
+            'threads': {
+                'count': latest.get('th.threads'),
+                # 모든 스레드가 바쁜 상태로 요청이 들어온 빈도 - 0 보다 크면 스레드 부족
+                'saturated_per_sec': round(rates['th.fullcnt'], 4) if 'th.fullcnt' in rates else None
+            },
+            'ops': ops,
+            'top_ops': [{'op': op, 'per_sec': rate} for op, rate in top_ops]
+        }
+
+    def report(self, windows=None):
+        latest = self.latest()
+        return {
+            'interval_seconds': self.interval,
+            'samples': len(self._samples),
+            'sampled_at': latest[1] if latest else None,
+            'windows': [self.summary(w) for w in (windows or NFS_METRICS_WINDOWS)]
+        }
+
+nfsd_metrics = NfsdMetrics()
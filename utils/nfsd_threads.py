@@ -0,0 +1,248 @@
+import os, re, threading, time
+from utils.nfsd_metrics import nfsd_path, read_nfsd_stats
+from utils.file_utils import atomic_write, try_lock_file
+from utils.logger import get_logger
+
+logger = get_logger("nfs")
+
+NFS_CONF_FILE = os.getenv("NFS_CONF_FILE", "/etc/nfs.conf")
+# 커널 최대 nfsd 스레드 수 (NFSD_MAXSERVS)
+NFSD_THREADS_LIMIT = 8192
+
+# 자동 조정 설정 - 범위, 증감 단위, 판단 주기(초)
+NFSD_AUTOSCALE = os.getenv("NFSD_AUTOSCALE", "false").lower() == "true"
+NFSD_AUTOSCALE_MIN = int(os.getenv("NFSD_AUTOSCALE_MIN", "8"))
+NFSD_AUTOSCALE_MAX = int(os.getenv("NFSD_AUTOSCALE_MAX", "128"))
+NFSD_AUTOSCALE_STEP = int(os.getenv("NFSD_AUTOSCALE_STEP", "8"))
+NFSD_AUTOSCALE_INTERVAL = int(os.getenv("NFSD_AUTOSCALE_INTERVAL", "10"))
+# 대기열 적재 비율(sockets-enqueued / packets-arrived) 기준과 연속 판단 횟수 (히스테리시스)
+NFSD_SCALE_UP_RATIO = float(os.getenv("NFSD_SCALE_UP_RATIO", "0.05"))
+NFSD_SCALE_DOWN_RATIO = float(os.getenv("NFSD_SCALE_DOWN_RATIO", "0.001"))
+NFSD_SCALE_UP_INTERVALS = int(os.getenv("NFSD_SCALE_UP_INTERVALS", "2"))
+NFSD_SCALE_DOWN_INTERVALS = int(os.getenv("NFSD_SCALE_DOWN_INTERVALS", "30"))
+# 여러 프로세스에서 동시에 조정하지 않도록 하는 잠금 파일
+NFSD_AUTOSCALE_LOCK = os.getenv("NFSD_AUTOSCALE_LOCK", os.path.join(os.path.dirname(__file__), '../data/nfsd_autoscaler.lock'))
+
+def get_thread_count(proc_root=None):
+    with open(nfsd_path('fs', 'nfsd', 'threads', proc_root=proc_root), 'r') as f:
+        return int(f.read().strip() or 0)
+
+# 실행 중인 nfsd 스레드 수 변경 (0 을 쓰면 nfsd 가 중지되므로 허용하지 않음)
+def set_thread_count(count, proc_root=None):
+    if not 1 <= count <= NFSD_THREADS_LIMIT:
+        raise ValueError(f'스레드 수는 1 ~ {NFSD_THREADS_LIMIT} 사이여야 합니다: {count}')
+    with open(nfsd_path('fs', 'nfsd', 'threads', proc_root=proc_root), 'w') as f:
+        f.write(f'{count}\n')
+    logger.info(f"nfsd 스레드 수 변경: {count}")
+
+# /proc/fs/nfsd/pool_stats 합계
+# 형식: "# pool packets-arrived sockets-enqueued threads-woken threads-timedout"
+def read_pool_stats(proc_root=None):
+    totals = {'pools': 0, 'packets_arrived': 0, 'sockets_enqueued': 0, 'threads_woken': 0, 'threads_timedout': 0}
+    with open(nfsd_path('fs', 'nfsd', 'pool_stats', proc_root=proc_root), 'r') as f:
+        for line in f:
+            parts = line.split()
+            if not parts or parts[0].startswith('#') or len(parts) < 5:
+                continue
+            totals['pools'] += 1
+            totals['packets_arrived'] += int(parts[1])
+            totals['sockets_enqueued'] += int(parts[2])
+            totals['threads_woken'] += int(parts[3])
+            totals['threads_timedout'] += int(parts[4])
+    return totals
+
+# nfs.conf 의 [nfsd] threads= 값 갱신 (주석과 다른 설정은 유지)
+def persist_thread_count(count, conf_file=None):
+    conf_file = conf_file or NFS_CONF_FILE
+    try:
+        with open(conf_file, 'r') as f:
+            lines = f.readlines()
+    except FileNotFoundError:
+        lines = []
+
+    section = None
+    header_index = None
+    for i, line in enumerate(lines):
+        stripped = line.strip()
+        match = re.match(r'^\[(.+)\]$', stripped)
+        if match:
+            section = match.group(1).strip().lower()
+            if section == 'nfsd' and header_index is None:
+                header_index = i
+            continue
+        if section == 'nfsd' and re.match(r'^threads\s*=', stripped):
+            lines[i] = f'threads={count}\n'
+            break
+    else:
+        if header_index is None:
+            if lines and not lines[-1].endswith('\n'):
+                lines[-1] += '\n'
+            lines += ['\n' if lines else '', '[nfsd]\n', f'threads={count}\n']
+        else:
+            lines.insert(header_index + 1, f'threads={count}\n')
+
+    atomic_write(conf_file, ''.join(lines))
+    logger.info(f"{conf_file} 에 nfsd 스레드 수 저장: {count}")
+
+class NfsdAutoscaler:
+    """nfsd 스레드 수 자동 조정
+
+    판단 주기마다 pool_stats 의 대기열 적재 비율과 th 포화 횟수 증가량을 보고,
+    부족 상태가 NFSD_SCALE_UP_INTERVALS 회 연속이면 늘리고
+    여유 상태가 NFSD_SCALE_DOWN_INTERVALS 회 연속이면 줄임 (범위: min ~ max).
+    변경은 실행 중인 값에만 적용하며 nfs.conf 에는 저장하지 않음.
+    """
+
+    def __init__(self, min_threads=NFSD_AUTOSCALE_MIN, max_threads=NFSD_AUTOSCALE_MAX,
+                 step=NFSD_AUTOSCALE_STEP, interval=NFSD_AUTOSCALE_INTERVAL, proc_root=None):
+        self.min_threads = min_threads
+        self.max_threads = max_threads
+        self.step = step
+        self.interval = interval
+        self.proc_root = proc_root
+        self.enabled = False
+        self._previous = None
+        self._up_streak = 0
+        self._down_streak = 0
+        self._last_decision = None
+        self._history = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock_fd = None
+        # start/stop 직렬화 - 조정 스레드는 이 lock 을 쓰지 않으므로 보유한 채 join 가능
+        self._control = threading.Lock()
+
+    def configure(self, enabled=None, min_threads=None, max_threads=None, step=None):
+        min_threads = self.min_threads if min_threads is None else min_threads
+        max_threads = self.max_threads if max_threads is None else max_threads
+        step = self.step if step is None else step
+        if not 1 <= min_threads <= max_threads <= NFSD_THREADS_LIMIT:
+            raise ValueError(f'1 <= min_threads <= max_threads <= {NFSD_THREADS_LIMIT} 이어야 합니다.')
+        if step < 1:
+            raise ValueError('step은 1 이상이어야 합니다.')
+        with self._lock:
+            self.min_threads, self.max_threads, self.step = min_threads, max_threads, step
+            self._up_streak = self._down_streak = 0
+        if enabled is True:
+            self.start()
+        elif enabled is False:
+            self.stop()
+
+    def start(self):
+        with self._control:
+            if self._lock_fd is None:
+                self._lock_fd = try_lock_file(NFSD_AUTOSCALE_LOCK)
+                if self._lock_fd is None:
+                    raise RuntimeError('다른 프로세스에서 nfsd 스레드 자동 조정이 실행 중입니다.')
+            with self._lock:
+                self.enabled = True
+            if self._thread and self._thread.is_alive():
+                if not self._stop.is_set():
+                    return
+                # 중지 요청을 받은 이전 스레드가 끝난 뒤 새로 시작
+                self._thread.join()
+            self._stop.clear()
+            self._previous = None
+            self._thread = threading.Thread(target=self._run, name='nfsd-autoscaler', daemon=True)
+            self._thread.start()
+        logger.info(f"nfsd 스레드 자동 조정 시작 - 범위: {self.min_threads}~{self.max_threads}, 단위: {self.step}")
+
+    # 조정 스레드가 끝날 때까지 대기 (판단 주기 대기 중이면 바로 깨어남)
+    def stop(self):
+        with self._control:
+            with self._lock:
+                was_enabled = self.enabled
+                self.enabled = False
+            self._stop.set()
+            if self._thread and self._thread is not threading.current_thread():
+                self._thread.join()
+        if was_enabled:
+            logger.info("nfsd 스레드 자동 조정 중지")
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.evaluate()
+            except FileNotFoundError:
+                # nfs-server 미실행 - 다음 주기에 다시 확인
+                self._previous = None
+            except Exception as e:
+                logger.error(f"nfsd 스레드 자동 조정 중 예외 발생: {str(e)}", exc_info=True)
+            self._stop.wait(self.interval)
+
+    def _read(self):
+        pool = read_pool_stats(self.proc_root)
+        stats = read_nfsd_stats(self.proc_root)
+        return {
+            'arrived': pool['packets_arrived'],
+            'enqueued': pool['sockets_enqueued'],
+            'fullcnt': stats.get('th.fullcnt', 0)
+        }
+
+    # 한 주기 판단 - 변경한 경우 새 스레드 수 반환
+    def evaluate(self):
+        current = self._read()
+        previous, self._previous = self._previous, current
+        if previous is None:
+            return None
+        arrived = current['arrived'] - previous['arrived']
+        enqueued = current['enqueued'] - previous['enqueued']
+        fullcnt = current['fullcnt'] - previous['fullcnt']
+        if arrived < 0 or enqueued < 0 or fullcnt < 0:
+            # nfsd 재시작으로 카운터 초기화
+            return None
+        ratio = enqueued / arrived if arrived else 0.0
+        threads = get_thread_count(self.proc_root)
+
+        with self._lock:
+            if ratio >= NFSD_SCALE_UP_RATIO or fullcnt > 0:
+                self._up_streak += 1
+                self._down_streak = 0
+            elif ratio <= NFSD_SCALE_DOWN_RATIO:
+                self._down_streak += 1
+                self._up_streak = 0
+            else:
+                # 두 기준 사이 - 현재 상태 유지
+                self._up_streak = self._down_streak = 0
+
+            target = threads
+            if threads < self.min_threads:
+                target = self.min_threads
+            elif threads > self.max_threads:
+                target = self.max_threads
+            elif self._up_streak >= NFSD_SCALE_UP_INTERVALS:
+                target = min(self.max_threads, threads + self.step)
+            elif self._down_streak >= NFSD_SCALE_DOWN_INTERVALS:
+                target = max(self.min_threads, threads - self.step)
+            self._last_decision = {
+                'checked_at': time.time(),
+                'threads': threads,
+                'packets_arrived': arrived,
+                'sockets_enqueued': enqueued,
+                'enqueued_ratio': round(ratio, 4),
+                'saturated': fullcnt,
+                'up_streak': self._up_streak,
+                'down_streak': self._down_streak
+            }
+            if target == threads:
+                return None
+            self._up_streak = self._down_streak = 0
+
+        set_thread_count(target, self.proc_root)
+        logger.info(f"nfsd 스레드 자동 조정: {threads} -> {target} (대기열 비율: {ratio:.4f}, 포화: {fullcnt})")
+        self._history = (self._history + [{'at': time.time(), 'from': threads, 'to': target}])[-20:]
+        return target
+
+    def status(self):
+        return {
+            'enabled': self.enabled,
+            'min_threads': self.min_threads,
+            'max_threads': self.max_threads,
+            'step': self.step,
+            'interval_seconds': self.interval,
+            'last_decision': self._last_decision,
+            'recent_changes': list(self._history)
+        }
+
+nfsd_autoscaler = NfsdAutoscaler()
@@ -0,0 +1,244 @@
+import os, queue, subprocess, threading, time, uuid
+from concurrent.futures import ThreadPoolExecutor
+from utils.zfs_inventory import zfs_inventory
+from utils.command_runner import run_command, popen_command
+from utils.logger import get_logger
+
+logger = get_logger("snapshot")
+
+# 동시 복제 작업 수, send/recv 사이 버퍼 (청크 크기 x 청크 개수)
+REPLICATION_MAX_WORKERS = int(os.getenv("REPLICATION_MAX_WORKERS", "2"))
+REPLICATION_CHUNK_SIZE = int(os.getenv("REPLICATION_CHUNK_SIZE", str(1024 * 1024)))
+REPLICATION_BUFFER_CHUNKS = int(os.getenv("REPLICATION_BUFFER_CHUNKS", "64"))
+
+# 대상 데이터셋의 receive_resume_token 조회 (없으면 None)
+def get_resume_token(target):
+    result = run_command(['zfs', 'get', '-H', '-o', 'value', 'receive_resume_token', target])
+    token = result.stdout.strip()
+    return token if result.returncode == 0 and token not in ('', '-') else None
+
+# 재개 토큰이 이어받는 스냅샷 이름 (zfs send -nvt 출력의 "toname = pool/fs@snap"), 알 수 없으면 None
+def resume_token_snapshot(token):
+    result = run_command(['zfs', 'send', '-nvt', token])
+    for line in (result.stdout + result.stderr).splitlines():
+        key, _, value = line.strip().partition(' = ')
+        if key == 'toname':
+            return value.strip()
+    return None
+
+# zfs send -nvP 로 전송 예상 크기(bytes) 계산
+def estimate_send_size(send_args):
+    result = run_command(['zfs', 'send', '-nvP'] + send_args)
+    # 출력 예: "size\t123456" (stdout 또는 stderr, 버전에 따라 다름)
+    for line in (result.stdout + result.stderr).splitlines():
+        parts = line.split()
+        if len(parts) == 2 and parts[0] == 'size' and parts[1].isdigit():
+            return int(parts[1])
+    return None
+
+class ReplicationJob:
+    """zfs send | zfs recv 복제 작업 - 전송량/속도/ETA 와 재개 토큰을 추적"""
+
+    def __init__(self, snapshot, target, base=None, compressed=True, large_blocks=True, force=False, resume=True):
+        self.id = uuid.uuid4().hex[:12]
+        self.snapshot = snapshot
+        self.target = target
+        self.base = base
+        self.compressed = compressed
+        self.large_blocks = large_blocks
+        self.force = force
+        self.resume = resume
+        self.status = 'pending'
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.bytes_transferred = 0
+        self.estimated_bytes = None
+        self.resumed = False
+        self.resume_token = None
+        self.resumed_snapshot = None
+        self.continued_from = None
+        self.error = None
+        self._recent_rate = None
+
+    # base: 증분 기준 스냅샷 (기본값은 요청한 base)
+    def send_args(self, base=None):
+        base = base or self.base
+        args = []
+        if self.compressed:
+            args.append('-c')
+        if self.large_blocks:
+            args.append('-L')
+        if base:
+            args += ['-i', base]
+        return args + [self.snapshot]
+
+    def recv_args(self):
+        # -s: 중단 시 receive_resume_token 을 남겨 이어받기 가능
+        return ['-s'] + (['-F'] if self.force else []) + [self.target]
+
+    def to_dict(self):
+        now = self.finished_at or time.time()
+        elapsed = now - self.started_at if self.started_at else 0
+        rate = self.bytes_transferred / elapsed if elapsed > 0 else 0
+        eta = None
+        if self.status == 'running' and self.estimated_bytes and rate > 0:
+            eta = max(0, round((self.estimated_bytes - self.bytes_transferred) / (self._recent_rate or rate), 1))
+        return {
+            'id': self.id,
+            'snapshot': self.snapshot,
+            'base': self.base,
+            'target': self.target,
+            'status': self.status,
+            'resumed': self.resumed,
+            'resumed_snapshot': self.resumed_snapshot,
+            'continued_from': self.continued_from,
+            'resume_token': self.resume_token,
+            'bytes_transferred': self.bytes_transferred,
+            'estimated_bytes': self.estimated_bytes,
+            'progress': round(self.bytes_transferred / self.estimated_bytes * 100, 2) if self.estimated_bytes else None,
+            'bytes_per_sec': round(rate, 2),
+            'recent_bytes_per_sec': round(self._recent_rate, 2) if self._recent_rate else None,
+            'eta_seconds': eta,
+            'elapsed_seconds': round(elapsed, 2),
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'error': self.error
+        }
+
+    # send 출력 -> (버퍼 큐) -> recv 입력
+    # 읽기/쓰기 스레드를 분리해 한쪽이 잠시 멈춰도 버퍼가 찰 때까지 다른 쪽은 계속 진행
+    def _pump(self, source, sink):
+        buffer = queue.Queue(maxsize=REPLICATION_BUFFER_CHUNKS)
+        write_error = []
+        stop = threading.Event()
+
+        def writer():
+            try:
+                while True:
+                    chunk = buffer.get()
+                    if chunk is None:
+                        break
+                    sink.write(chunk)
+                    self.bytes_transferred += len(chunk)
+            except (BrokenPipeError, OSError) as e:
+                write_error.append(e)
+                stop.set()
+                # 읽기 쪽이 막히지 않도록 남은 청크를 비움
+                while buffer.get() is not None:
+                    pass
+            finally:
+                try:
+                    sink.close()
+                except OSError:
+                    pass
+
+        thread = threading.Thread(target=writer, name=f'replication-{self.id}', daemon=True)
+        thread.start()
+        window_started, window_bytes = time.monotonic(), 0
+        while not stop.is_set():
+            chunk = source.read(REPLICATION_CHUNK_SIZE)
+            if not chunk:
+                break
+            buffer.put(chunk)
+            window_bytes += len(chunk)
+            window_elapsed = time.monotonic() - window_started
+            if window_elapsed >= 2:
+                self._recent_rate = window_bytes / window_elapsed
+                window_started, window_bytes = time.monotonic(), 0
+        buffer.put(None)
+        thread.join()
+        return write_error[0] if write_error else None
+
+    # send | recv 한 번 실행 - 실패하면 RuntimeError
+    def _transfer(self, send_args):
+        send_cmd = ['zfs', 'send'] + send_args
+        recv_cmd = ['zfs', 'recv'] + self.recv_args()
+        logger.info(f"복제 전송 시작 - 작업: {self.id}, 명령: {' '.join(send_cmd)} | {' '.join(recv_cmd)}")
+
+        recv = popen_command(recv_cmd, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+        send = popen_command(send_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        # stderr 는 별도 스레드에서 읽어 파이프가 가득 차 멈추지 않도록 함
+        stderr = {}
+        readers = [
+            threading.Thread(target=lambda p=p, k=k: stderr.__setitem__(k, p.stderr.read()), daemon=True)
+            for k, p in (('send', send), ('recv', recv))
+        ]
+        for reader in readers:
+            reader.start()
+        write_error = self._pump(send.stdout, recv.stdin)
+        send.stdout.close()
+        send_rc, recv_rc = send.wait(), recv.wait()
+        for reader in readers:
+            reader.join()
+
+        if send_rc != 0 or recv_rc != 0 or write_error:
+            messages = [m.decode(errors='replace').strip() for m in stderr.values() if m]
+            raise RuntimeError('; '.join(messages) or str(write_error) or f'send={send_rc}, recv={recv_rc}')
+
+    # 대상에 중단된 수신이 있으면 먼저 토큰으로 이어받은 뒤,
+    # 이어받은 스냅샷이 요청한 스냅샷과 다르면 그 스냅샷을 기준으로 요청한 스냅샷까지 증분 전송
+    def run(self):
+        self.status = 'running'
+        self.started_at = time.time()
+        try:
+            passes = []
+            if self.resume:
+                self.resume_token = get_resume_token(self.target)
+                self.resumed = self.resume_token is not None
+            if self.resumed:
+                self.resumed_snapshot = resume_token_snapshot(self.resume_token)
+                passes.append(['-t', self.resume_token])
+            if self.resumed_snapshot != self.snapshot:
+                # 이어받은 스냅샷이 같은 원본 데이터셋이면 대상에 이미 있으므로 그 스냅샷부터 증분 전송
+                if self.resumed_snapshot and self.resumed_snapshot.split('@')[0] == self.snapshot.split('@')[0]:
+                    self.continued_from = self.resumed_snapshot
+                passes.append(self.send_args(self.continued_from))
+
+            estimates = [estimate_send_size(args) for args in passes]
+            self.estimated_bytes = sum(estimates) if None not in estimates else None
+            logger.info(f"복제 시작 - 작업: {self.id}, 스냅샷: {self.snapshot}, 대상: {self.target}, "
+                        f"재개: {self.resumed_snapshot or self.resumed}, 전송 횟수: {len(passes)}, 예상 크기: {self.estimated_bytes}")
+            for args in passes:
+                self._transfer(args)
+                if args[0] == '-t':
+                    self.resume_token = None
+                    logger.info(f"복제 재개 완료 - 작업: {self.id}, 이어받은 스냅샷: {self.resumed_snapshot}")
+            self.status = 'completed'
+            logger.info(f"복제 완료 - 작업: {self.id}, 전송량: {self.bytes_transferred} bytes")
+        except Exception as e:
+            self.status = 'failed'
+            self.error = str(e)
+            # 중단된 수신은 토큰으로 이어받을 수 있음
+            self.resume_token = get_resume_token(self.target)
+            logger.error(f"복제 실패 - 작업: {self.id}, 오류: {self.error}, 재개 토큰: {bool(self.resume_token)}")
+        finally:
+            self.finished_at = time.time()
+            zfs_inventory.reload_dataset(self.target)
+
+class ReplicationManager:
+    def __init__(self, max_workers=REPLICATION_MAX_WORKERS):
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='replication')
+
+    def submit(self, job):
+        with self._lock:
+            active = [j for j in self._jobs.values() if j.target == job.target and j.status in ('pending', 'running')]
+            if active:
+                raise ValueError(f'같은 대상으로 진행 중인 복제 작업이 있습니다: {active[0].id}')
+            self._jobs[job.id] = job
+        self._executor.submit(job.run)
+        return job
+
+    def get(self, job_id):
+        job = self._jobs.get(job_id)
+        return job.to_dict() if job else None
+
+    def list(self):
+        with self._lock:
+            jobs = sorted(self._jobs.values(), key=lambda j: j.created_at, reverse=True)
+        return [job.to_dict() for job in jobs]
+
+replication_manager = ReplicationManager()
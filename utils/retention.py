@@ -0,0 +1,154 @@
+import os, subprocess
+from datetime import datetime
+from utils.snapshot_utils import iter_snapshots
+from utils.command_runner import run_command
+from utils.events import publish_event
+from utils.logger import get_logger
+
+logger = get_logger("snapshot")
+
+# 보존 정책 주기별 버킷 키 (같은 버킷 안에서는 가장 최신 스냅샷 하나만 보존)
+RETENTION_PERIODS = {
+    'hourly': '%Y-%m-%d %H',
+    'daily': '%Y-%m-%d',
+    'weekly': '%G-W%V',
+    'monthly': '%Y-%m',
+}
+RETENTION_KEYS = ('keep_last',) + tuple(RETENTION_PERIODS)
+
+# zfs destroy 한 번에 넘길 인자 최대 길이
+DESTROY_BATCH_MAX_CHARS = 64 * 1024
+# 인자 하나의 커널 제한(MAX_ARG_STRLEN) - dry run 을 한 번의 명령으로 합칠 수 있는 최대 길이
+DESTROY_ARG_MAX_CHARS = 128 * 1024 - 1
+# 실제 삭제 명령 제한 시간(초) - 범위 삭제는 오래 걸릴 수 있음
+RETENTION_DESTROY_TIMEOUT = int(os.getenv("RETENTION_DESTROY_TIMEOUT", "3600"))
+
+def validate_policy(policy):
+    if not isinstance(policy, dict) or not policy:
+        raise ValueError('policy는 keep_last, hourly, daily, weekly, monthly 중 하나 이상을 포함해야 합니다.')
+    unknown = set(policy) - set(RETENTION_KEYS)
+    if unknown:
+        raise ValueError(f'알 수 없는 보존 정책 항목입니다: {sorted(unknown)}')
+    for key, value in policy.items():
+        if not isinstance(value, int) or isinstance(value, bool) or value < 0:
+            raise ValueError(f'보존 개수는 0 이상의 정수여야 합니다: {key}={value}')
+    if not any(policy.values()):
+        raise ValueError('모든 보존 개수가 0이면 모든 스냅샷이 삭제되므로 허용하지 않습니다.')
+    return {key: policy.get(key, 0) for key in RETENTION_KEYS}
+
+# 보존 대상 계산 - snapshots는 생성 순서(createtxg 오름차순)
+# prefix 가 주어지면 해당 접두어로 시작하는 스냅샷만 정책 대상이며 나머지는 항상 보존
+# 반환값: (보존 사유 dict {name: [reason, ...]}, 삭제 대상 이름 set)
+def compute_retention(snapshots, policy, prefix=''):
+    candidates = [s for s in snapshots if s['name'].split('@', 1)[1].startswith(prefix)]
+    keep = {}
+    newest_first = list(reversed(candidates))
+    for snapshot in newest_first[:policy['keep_last']]:
+        keep.setdefault(snapshot['name'], []).append('keep_last')
+    for period, fmt in RETENTION_PERIODS.items():
+        count = policy[period]
+        if not count:
+            continue
+        buckets = set()
+        for snapshot in newest_first:
+            bucket = datetime.fromtimestamp(snapshot['creation']).strftime(fmt)
+            if bucket in buckets:
+                continue
+            buckets.add(bucket)
+            keep.setdefault(snapshot['name'], []).append(period)
+            if len(buckets) == count:
+                break
+    prune = {s['name'] for s in candidates if s['name'] not in keep}
+    return keep, prune
+
+# 삭제 대상을 zfs destroy 인자로 변환
+# 생성 순서상 연속된 삭제 대상은 first%last 범위로, 나머지는 쉼표로 묶고 길이 제한마다 배치를 나눔
+# 범위 사이에 보존 대상이 끼지 않도록 전체 스냅샷 목록(생성 순서) 기준으로 연속 구간을 찾음
+def build_destroy_batches(dataset, snapshots, prune, max_chars=DESTROY_BATCH_MAX_CHARS):
+    runs, current = [], []
+    for snapshot in snapshots:
+        if snapshot['name'] in prune:
+            current.append(snapshot['name'].split('@', 1)[1])
+        elif current:
+            runs.append(current)
+            current = []
+    if current:
+        runs.append(current)
+
+    specs = [run[0] if len(run) == 1 else f"{run[0]}%{run[-1]}" for run in runs]
+    batches, batch = [], []
+    prefix_len = len(dataset) + 1
+    for spec in specs:
+        if batch and prefix_len + len(','.join(batch + [spec])) > max_chars:
+            batches.append(f"{dataset}@{','.join(batch)}")
+            batch = []
+        batch.append(spec)
+    if batch:
+        batches.append(f"{dataset}@{','.join(batch)}")
+    return batches
+
+def _reclaim_bytes(stdout):
+    # 출력 예: "destroy\tpool/fs@snap" ... "reclaim\t12345"
+    for line in stdout.splitlines():
+        parts = line.split('\t')
+        if len(parts) == 2 and parts[0] == 'reclaim' and parts[1].isdigit():
+            return int(parts[1])
+    return None
+
+# 배치들을 하나의 dataset@a%b,c,... 인자로 합침 (인자 길이 제한을 넘으면 None)
+def _combine_batches(batches):
+    dataset = batches[0].split('@', 1)[0]
+    combined = f"{dataset}@{','.join(batch.split('@', 1)[1] for batch in batches)}"
+    return combined if len(combined) <= DESTROY_ARG_MAX_CHARS else None
+
+# zfs destroy 실행 -> (명령별 결과, 회수 가능 용량, 회수 용량이 정확한지 여부)
+# dry_run 이면 -nvp 로 회수 가능 용량만 계산 - 배치 사이에 공유된 공간도 포함되도록 가능하면 한 번에 계산하고,
+# 인자 길이 제한으로 나눠야 하면 배치별 합계는 하한값
+def destroy_batches(batches, dry_run=True):
+    if not batches:
+        return [], 0, True
+    if dry_run:
+        combined = _combine_batches(batches)
+        batches = [combined] if combined else batches
+    results = []
+    reclaim = 0
+    for batch in batches:
+        cmd = ['zfs', 'destroy', '-nvp', batch] if dry_run else ['zfs', 'destroy', batch]
+        try:
+            result = run_command(cmd, timeout=None if dry_run else RETENTION_DESTROY_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            logger.error(f"스냅샷 삭제 시간 초과 - 명령: {' '.join(cmd)}, 제한: {RETENTION_DESTROY_TIMEOUT}초")
+            results.append({'command': ' '.join(cmd), 'returncode': None,
+                            'stderr': f'명령 제한 시간({RETENTION_DESTROY_TIMEOUT}초)을 초과했습니다.'})
+            continue
+        entry = {'command': ' '.join(cmd), 'returncode': result.returncode, 'stderr': result.stderr.strip()}
+        if dry_run:
+            entry['reclaim_bytes'] = _reclaim_bytes(result.stdout)
+            reclaim += entry['reclaim_bytes'] or 0
+        results.append(entry)
+    return results, reclaim, len(batches) == 1
+
+# 데이터셋 하나에 보존 정책 적용
+def apply_retention(dataset, policy, prefix='', dry_run=True):
+    snapshots = sorted(iter_snapshots(dataset, sort='name'), key=lambda s: s['createtxg'])
+    keep, prune = compute_retention(snapshots, policy, prefix)
+    batches = build_destroy_batches(dataset, snapshots, prune)
+    commands, reclaim, reclaim_exact = destroy_batches(batches, dry_run)
+    failed = [c for c in commands if c['returncode'] != 0]
+    logger.info(f"스냅샷 보존 정책 적용 - ZFS: {dataset}, 전체: {len(snapshots)}개, 보존: {len(keep)}개, "
+                f"삭제 대상: {len(prune)}개, 명령: {len(batches)}회, dry_run: {dry_run}, 실패: {len(failed)}회")
+    if prune and not dry_run:
+        # 삭제 대상이 많을 수 있으므로 데이터셋 단위로 한 번만 알림
+        publish_event('snapshot.pruned', pool=dataset.split('/')[0], name=dataset, count=len(prune))
+    return {
+        'dataset': dataset,
+        'total': len(snapshots),
+        'kept': {name: reasons for name, reasons in keep.items()},
+        'pruned': [s['name'] for s in snapshots if s['name'] in prune],
+        'commands': commands,
+        'reclaimable_bytes': reclaim if dry_run else None,
+        # False 이면 배치별 합계라 배치 사이에 공유된 공간이 빠진 하한값
+        'reclaimable_exact': reclaim_exact if dry_run else None,
+        'dry_run': dry_run,
+        'success': not failed
+    }
@@ -0,0 +1,100 @@
+import os, threading, time
+from concurrent.futures import ThreadPoolExecutor, wait
+from utils.zpool_utils import get_smart_health, list_physical_disks
+from utils.logger import get_logger
+
+logger = get_logger("zpool")
+
+# 백그라운드 갱신 주기(초), 결과 유효 시간(초), 동시 조회 개수
+SMART_REFRESH_INTERVAL = int(os.getenv("SMART_REFRESH_INTERVAL", "300"))
+SMART_CACHE_TTL = int(os.getenv("SMART_CACHE_TTL", "900"))
+SMART_MAX_WORKERS = int(os.getenv("SMART_MAX_WORKERS", "8"))
+# 즉시 갱신 요청(wait=true)이 결과를 기다릴 최대 시간(초)
+SMART_REFRESH_WAIT_MAX = int(os.getenv("SMART_REFRESH_WAIT_MAX", "60"))
+
+class SmartCache:
+    """SMART 상태 캐시 - 백그라운드 스레드가 주기적으로 갱신하고 요청은 캐시만 읽음"""
+
+    def __init__(self, interval=SMART_REFRESH_INTERVAL, ttl=SMART_CACHE_TTL, max_workers=SMART_MAX_WORKERS):
+        self.interval = interval
+        self.ttl = ttl
+        self.max_workers = max_workers
+        self._entries = {}   # device -> {'health', 'checked_at', 'duration_ms'}
+        self._inflight = {}  # device -> Future (같은 디바이스 조회는 하나로 합침)
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='smart')
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='smart-refresher', daemon=True)
+            self._thread.start()
+        logger.info(f"SMART 캐시 갱신 스레드 시작 - 주기: {self.interval}초, TTL: {self.ttl}초")
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                disks, _ = list_physical_disks()
+                futures = self.refresh([disk['path'] for disk in disks])
+                wait(futures.values())
+            except Exception as e:
+                logger.error(f"SMART 캐시 갱신 중 예외 발생: {str(e)}", exc_info=True)
+            self._stop.wait(self.interval)
+
+    def _probe(self, device):
+        started = time.perf_counter()
+        health = 'UNAVAILABLE'
+        try:
+            health = get_smart_health(device)
+        finally:
+            entry = {
+                'health': health,
+                'checked_at': time.time(),
+                'duration_ms': round((time.perf_counter() - started) * 1000, 2)
+            }
+            with self._lock:
+                self._entries[device] = entry
+                self._inflight.pop(device, None)
+        return entry
+
+    # 지정한 디바이스를 즉시 갱신 요청
+    # 이미 조회 중인 디바이스는 기존 Future를 공유하므로 디바이스당 smartctl은 한 번만 실행됨
+    def refresh(self, devices):
+        # smartctl 옵션으로 해석되지 않도록 디바이스 경로만 허용
+        invalid = [device for device in devices if not isinstance(device, str) or not device.startswith('/dev/')]
+        if invalid:
+            raise ValueError(f'디바이스 경로가 아닙니다: {invalid}')
+        futures = {}
+        with self._lock:
+            for device in devices:
+                future = self._inflight.get(device)
+                if future is None:
+                    future = self._executor.submit(self._probe, device)
+                    self._inflight[device] = future
+                futures[device] = future
+        return futures
+
+    # 캐시된 상태 조회 (smartctl 실행 없음)
+    # 결과가 없거나 TTL이 지나면 stale=True, 없는 디바이스는 백그라운드 조회를 예약
+    def get(self, device):
+        with self._lock:
+            entry = self._entries.get(device)
+            refreshing = device in self._inflight
+        if entry is None:
+            self.refresh([device])
+            return {'health': 'UNKNOWN', 'checked_at': None, 'stale': True, 'refreshing': True}
+        return {
+            'health': entry['health'],
+            'checked_at': entry['checked_at'],
+            'stale': time.time() - entry['checked_at'] > self.ttl,
+            'refreshing': refreshing
+        }
+
+smart_cache = SmartCache()
@@ -0,0 +1,216 @@
+import errno, os, secrets, stat
+from functools import lru_cache
+from utils.zfs_inventory import zfs_inventory
+from utils.logger import get_logger
+
+logger = get_logger("snapshot")
+
+class SnapshotPathError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+# 스냅샷 마운트 경로(<mountpoint>/.zfs/snapshot/<name>)와 데이터셋 마운트 지점 반환
+def snapshot_root(snapshot):
+    dataset, _, name = snapshot.partition('@')
+    info = zfs_inventory.get(dataset)
+    if not info:
+        raise SnapshotPathError(f'해당 ZFS를 찾을 수 없습니다. : {dataset}', 404)
+    mountpoint = info['mountpoint']
+    if not mountpoint.startswith('/'):
+        raise SnapshotPathError(f'마운트되지 않은 ZFS입니다 (mountpoint={mountpoint}): {dataset}')
+    root = os.path.join(mountpoint, '.zfs', 'snapshot', name)
+    # .zfs/snapshot/<name> 접근 시 자동 마운트됨
+    if not os.path.isdir(root):
+        raise SnapshotPathError(f'해당 스냅샷이 존재하지 않습니다: {snapshot}', 404)
+    return os.path.realpath(root), os.path.realpath(mountpoint)
+
+# base 기준 상대 경로를 실제 경로로 변환 - 심볼릭 링크 등으로 base 밖을 가리키면 거부
+# follow=False 이면 상위 디렉토리만 해석하고 마지막 이름은 그대로 둠 (심볼릭 링크 자체를 가리킴)
+def _resolve_under(base, rel_path, follow=True):
+    rel = os.path.normpath('/' + (rel_path or '')).lstrip('/')
+    if follow or not rel:
+        path = os.path.realpath(os.path.join(base, rel))
+        parent = path
+    else:
+        head, name = os.path.split(rel)
+        parent = os.path.realpath(os.path.join(base, head))
+        path = os.path.join(parent, name)
+    if parent != base and not parent.startswith(base + os.sep):
+        raise SnapshotPathError(f'허용되지 않은 경로입니다: {rel_path}')
+    return path
+
+def resolve_snapshot_path(snapshot, rel_path, follow=True):
+    root, _ = snapshot_root(snapshot)
+    path = _resolve_under(root, rel_path, follow)
+    if not os.path.lexists(path):
+        raise SnapshotPathError(f'스냅샷에 해당 경로가 없습니다: {rel_path}', 404)
+    return path
+
+# 디렉토리 목록 캐시 - 스냅샷 내용은 변경되지 않으므로 (경로, mtime) 기준으로 재사용
+@lru_cache(maxsize=256)
+def _scan_directory(path, mtime_ns):
+    entries = []
+    with os.scandir(path) as it:
+        for entry in it:
+            try:
+                st = entry.stat(follow_symlinks=False)
+            except OSError:
+                continue
+            if stat.S_ISDIR(st.st_mode):
+                kind = 'directory'
+            elif stat.S_ISLNK(st.st_mode):
+                kind = 'symlink'
+            elif stat.S_ISREG(st.st_mode):
+                kind = 'file'
+            else:
+                kind = 'other'
+            entries.append({
+                'name': entry.name,
+                'type': kind,
+                'size': st.st_size,
+                'mtime': st.st_mtime,
+                'mode': oct(stat.S_IMODE(st.st_mode))
+            })
+    entries.sort(key=lambda e: (e['type'] != 'directory', e['name']))
+    return tuple(entries)
+
+def list_snapshot_directory(snapshot, rel_path):
+    path = resolve_snapshot_path(snapshot, rel_path)
+    if not os.path.isdir(path):
+        raise SnapshotPathError(f'디렉토리가 아닙니다: {rel_path}')
+    return _scan_directory(path, os.stat(path).st_mtime_ns)
+
+# 마운트 지점부터 한 단계씩 O_NOFOLLOW 로 열어 path 의 상위 디렉토리 fd 반환
+# 중간 경로가 심볼릭 링크로 바뀌어 있으면 따라가지 않고 거부 (realpath 검사 이후의 교체 방지)
+def _open_parent_under(mountpoint, path):
+    rel = os.path.relpath(os.path.dirname(path), mountpoint)
+    fd = os.open(mountpoint, os.O_RDONLY | os.O_DIRECTORY)
+    if rel == os.curdir:
+        return fd
+    for part in rel.split(os.sep):
+        try:
+            next_fd = os.open(part, os.O_RDONLY | os.O_DIRECTORY | os.O_NOFOLLOW, dir_fd=fd)
+        except OSError as e:
+            raise SnapshotPathError(f'복원 대상의 상위 경로가 디렉토리가 아닙니다: {os.path.dirname(path)}', 409) from e
+        finally:
+            os.close(fd)
+        fd = next_fd
+    return fd
+
+def _copy_xattrs(src_fd, dst_fd):
+    try:
+        names = os.listxattr(src_fd)
+    except OSError as e:
+        if e.errno in (errno.ENOTSUP, errno.ENODATA, errno.EINVAL):
+            return
+        raise
+    for name in names:
+        try:
+            os.setxattr(dst_fd, name, os.getxattr(src_fd, name))
+        except OSError as e:
+            if e.errno not in (errno.EPERM, errno.ENOTSUP, errno.ENODATA, errno.EINVAL):
+                raise
+
+# 소유자/권한/시간까지 유지 (fd 기준으로 설정하므로 경로를 다시 따라가지 않음)
+def _apply_metadata(fd, st):
+    os.fchown(fd, st.st_uid, st.st_gid)
+    os.fchmod(fd, stat.S_IMODE(st.st_mode))
+    os.utime(fd, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+def _check_not_directory(current, dst_path):
+    if current is not None and stat.S_ISDIR(current.st_mode):
+        raise SnapshotPathError(f'복원 대상이 디렉토리라 파일로 덮어쓸 수 없습니다: {dst_path}', 409)
+
+# 같은 디렉토리 안의 임시 이름 - 완성된 뒤 rename 으로 대상과 교체
+def _temp_name(name):
+    return f'.{name}.restore-{secrets.token_hex(4)}'
+
+def _copy_file(src_fd, dst_fd):
+    offset = 0
+    while True:
+        sent = os.sendfile(dst_fd, src_fd, offset, 1 << 30)
+        if sent == 0:
+            break
+        offset += sent
+
+# src 를 dir_fd 안의 name 으로 복사 -> 복원한 파일 수
+# 대상 경로는 모두 dir_fd 기준 O_NOFOLLOW 로 열고, 파일/심볼릭 링크는 임시 이름으로 완성한 뒤
+# rename 으로 교체하므로 복사 중 실패(ENOSPC 등)해도 기존 파일은 그대로 남음
+# 파일 데이터는 sendfile 로 커널 내 복사를 수행하므로 Python 메모리를 거치지 않음
+def _restore_entry(src, name, dir_fd, dst_path):
+    st = os.lstat(src)
+    try:
+        current = os.stat(name, dir_fd=dir_fd, follow_symlinks=False)
+    except FileNotFoundError:
+        current = None
+
+    if stat.S_ISDIR(st.st_mode):
+        if current is not None and not stat.S_ISDIR(current.st_mode):
+            os.unlink(name, dir_fd=dir_fd)
+            current = None
+        if current is None:
+            os.mkdir(name, 0o700, dir_fd=dir_fd)
+        fd = os.open(name, os.O_RDONLY | os.O_DIRECTORY | os.O_NOFOLLOW, dir_fd=dir_fd)
+        try:
+            files = 0
+            with os.scandir(src) as it:
+                for entry in it:
+                    files += _restore_entry(entry.path, entry.name, fd, os.path.join(dst_path, entry.name))
+            _apply_metadata(fd, st)
+        finally:
+            os.close(fd)
+        return files
+
+    if not stat.S_ISLNK(st.st_mode) and not stat.S_ISREG(st.st_mode):
+        logger.warning(f"일반 파일이 아니라 복원에서 제외 - 경로: {src}")
+        return 0
+
+    _check_not_directory(current, dst_path)
+    tmp = _temp_name(name)
+    try:
+        if stat.S_ISLNK(st.st_mode):
+            os.symlink(os.readlink(src), tmp, dir_fd=dir_fd)
+            os.chown(tmp, st.st_uid, st.st_gid, dir_fd=dir_fd, follow_symlinks=False)
+            os.utime(tmp, ns=(st.st_atime_ns, st.st_mtime_ns), dir_fd=dir_fd, follow_symlinks=False)
+        else:
+            src_fd = os.open(src, os.O_RDONLY | os.O_NOFOLLOW)
+            try:
+                dst_fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL | os.O_NOFOLLOW, 0o600, dir_fd=dir_fd)
+                try:
+                    _copy_file(src_fd, dst_fd)
+                    _copy_xattrs(src_fd, dst_fd)
+                    _apply_metadata(dst_fd, st)
+                finally:
+                    os.close(dst_fd)
+            finally:
+                os.close(src_fd)
+        os.rename(tmp, name, src_dir_fd=dir_fd, dst_dir_fd=dir_fd)
+    except BaseException:
+        try:
+            os.unlink(tmp, dir_fd=dir_fd)
+        except FileNotFoundError:
+            pass
+        raise
+    return 1
+
+# 스냅샷의 파일/디렉토리를 현재 파일시스템으로 복원 (다른 데이터는 건드리지 않음)
+def restore_from_snapshot(snapshot, rel_path, target_path=None, overwrite=False):
+    _, mountpoint = snapshot_root(snapshot)
+    # 마지막 이름은 따라가지 않음 - 심볼릭 링크는 링크 자체를 복원
+    src = resolve_snapshot_path(snapshot, rel_path, follow=False)
+    dst = _resolve_under(mountpoint, target_path or rel_path, follow=False)
+    if dst == mountpoint or (dst + os.sep).startswith(os.path.join(mountpoint, '.zfs') + os.sep):
+        raise SnapshotPathError(f'복원 대상 경로가 올바르지 않습니다: {target_path or rel_path}')
+    if not os.path.isdir(os.path.dirname(dst)):
+        raise SnapshotPathError(f'복원 대상의 상위 디렉토리가 없습니다: {os.path.dirname(dst)}', 404)
+    if os.path.lexists(dst) and not overwrite:
+        raise SnapshotPathError(f'복원 대상 경로가 이미 존재합니다 (overwrite=true 필요): {dst}', 409)
+
+    parent_fd = _open_parent_under(mountpoint, dst)
+    try:
+        files = _restore_entry(src, os.path.basename(dst), parent_fd, dst)
+    finally:
+        os.close(parent_fd)
+    logger.info(f"스냅샷 파일 복원 완료 - 스냅샷: {snapshot}, 원본: {rel_path}, 대상: {dst}, 파일 수: {files}")
+    return {'source': src, 'target': dst, 'files': files}
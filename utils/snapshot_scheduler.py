@@ -0,0 +1,306 @@
+import heapq, json, os, threading, time, uuid, zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from utils.snapshot_utils import default_snapshot_name, take_snapshots, SNAPSHOT_NAME_PATTERN
+from utils.retention import validate_policy, apply_retention
+from utils.zfs_inventory import zfs_inventory
+from utils.events import publish_event
+from utils.file_utils import atomic_write, try_lock_file
+from utils.logger import get_logger
+
+logger = get_logger("snapshot")
+
+# 동시에 실행할 스냅샷 작업 수, 최대 지연(jitter, 초), 보관할 실행 이력 수
+SCHEDULER_MAX_WORKERS = int(os.getenv("SCHEDULER_MAX_WORKERS", "4"))
+SCHEDULER_JITTER = int(os.getenv("SCHEDULER_JITTER", "30"))
+SCHEDULER_HISTORY_SIZE = int(os.getenv("SCHEDULER_HISTORY_SIZE", "1000"))
+
+# 스케줄 정의와 마지막 실행 시각 저장 파일
+SCHEDULE_FILE = os.path.join(os.path.dirname(__file__), '../data/snapshot_schedules.json')
+
+class CronSpec:
+    """cron 형식(분 시 일 월 요일) 스케줄 - *, */n, a-b, a-b/n, 쉼표 목록 지원"""
+
+    RANGES = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 6)]
+
+    def __init__(self, expr):
+        self.expr = expr
+        parts = expr.split()
+        if len(parts) != 5:
+            raise ValueError(f'cron 형식은 "분 시 일 월 요일" 5개 항목이어야 합니다: {expr}')
+        self.minutes, self.hours, self.days, self.months, self.weekdays = (
+            self._parse(part, low, high) for part, (low, high) in zip(parts, self.RANGES)
+        )
+        # 일/요일이 모두 지정되면 둘 중 하나만 맞아도 실행 (표준 cron 규칙)
+        # vixie cron 과 같이 '*' 로 시작하는 항목(*, */1 등)은 지정하지 않은 것으로 봄
+        self.day_any = parts[2].startswith('*')
+        self.weekday_any = parts[4].startswith('*')
+
+    @staticmethod
+    def _parse(part, low, high):
+        values = set()
+        for item in part.split(','):
+            step = 1
+            if '/' in item:
+                item, step = item.split('/', 1)
+                step = int(step)
+            if item == '*':
+                start, end = low, high
+            elif '-' in item:
+                start, end = (int(v) for v in item.split('-', 1))
+            else:
+                start = end = int(item)
+            # 요일 7은 일요일(0)과 같음
+            limit = 7 if high == 6 else high
+            if start < low or end > limit or start > end or step < 1:
+                raise ValueError(f'cron 값 범위 오류: {part}')
+            values.update(0 if high == 6 and value == 7 else value for value in range(start, end + 1, step))
+        return values
+
+    def _day_matches(self, dt):
+        day_ok = dt.day in self.days
+        weekday_ok = (dt.isoweekday() % 7) in self.weekdays
+        if self.day_any or self.weekday_any:
+            return day_ok and weekday_ok
+        return day_ok or weekday_ok
+
+    # dt 이후(초과) 첫 실행 시각
+    def next_after(self, dt):
+        dt = dt.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = dt + timedelta(days=366 * 5)
+        while dt < limit:
+            if dt.month not in self.months:
+                dt = (dt.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self._day_matches(dt):
+                dt = dt.replace(hour=0, minute=0) + timedelta(days=1)
+            elif dt.hour not in self.hours:
+                dt = dt.replace(minute=0) + timedelta(hours=1)
+            elif dt.minute not in self.minutes:
+                dt += timedelta(minutes=1)
+            else:
+                return dt
+        raise ValueError(f'실행 시각을 찾을 수 없는 cron 형식입니다: {self.expr}')
+
+class SnapshotScheduler:
+    """ZFS 별 cron 스케줄에 따라 스냅샷(및 보존 정책)을 실행하는 프로세스 내 스케줄러"""
+
+    def __init__(self, path=SCHEDULE_FILE, max_workers=SCHEDULER_MAX_WORKERS,
+                 jitter=SCHEDULER_JITTER, history_size=SCHEDULER_HISTORY_SIZE):
+        self.path = path
+        self.jitter = jitter
+        self.max_workers = max_workers
+        self._jobs = {}        # job_id -> 작업 정의
+        self._state = {}       # job_id -> {'last_run': epoch}
+        self._running = set()  # 실행 중인 job_id (같은 작업 중복 실행 방지)
+        self._heap = []        # (실행 시각 epoch, job_id, 예정 시각 epoch)
+        self._history = deque(maxlen=history_size)
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='snapshot-job')
+        self._thread = None
+        self._lock_fd = None
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r') as f:
+                saved = json.load(f)
+            self._jobs = {job['id']: job for job in saved.get('jobs', [])}
+            self._state = saved.get('state', {})
+            logger.info(f"스냅샷 스케줄 로딩 성공 - 작업 수: {len(self._jobs)}")
+        except Exception as e:
+            logger.error(f"스냅샷 스케줄 로딩 실패 - 경로: {self.path}, 오류: {str(e)}", exc_info=True)
+
+    # lock 보유 상태에서 호출
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        atomic_write(self.path, json.dumps({'jobs': list(self._jobs.values()), 'state': self._state}, indent=2))
+
+    # 데이터셋마다 고정된 지연(초) - 같은 시각에 수백 개 작업이 동시에 실행되지 않도록 분산
+    def _jitter_for(self, job):
+        return zlib.crc32(job['dataset'].encode()) % (self.jitter + 1) if self.jitter else 0
+
+    # 다음 실행 예약 - 재시작 중 놓친 실행은 여러 번이 아니라 한 번으로 합쳐 즉시 실행
+    def _schedule(self, job, now):
+        cron = CronSpec(job['cron'])
+        last_run = self._state.get(job['id'], {}).get('last_run')
+        due = cron.next_after(datetime.fromtimestamp(last_run or now))
+        if last_run and due.timestamp() <= now:
+            missed = 0
+            while due.timestamp() <= now and missed < 1000:
+                missed += 1
+                due = cron.next_after(due)
+            logger.info(f"놓친 스냅샷 작업 실행 예약 - 작업: {job['id']}, 놓친 횟수: {missed}회 (1회로 병합)")
+            scheduled = now
+        else:
+            scheduled = due.timestamp()
+        heapq.heappush(self._heap, (scheduled + self._jitter_for(job), job['id'], scheduled))
+
+    # 같은 스케줄 파일을 쓰는 프로세스 중 잠금을 얻은 하나에서만 실행 (중복 스냅샷/삭제 방지)
+    def start(self):
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return True
+            if self._lock_fd is None:
+                self._lock_fd = try_lock_file(f"{self.path}.lock")
+                if self._lock_fd is None:
+                    logger.warning(f"다른 프로세스에서 스냅샷 스케줄러가 실행 중이므로 시작하지 않음 - 경로: {self.path}.lock")
+                    return False
+            now = time.time()
+            for job in self._jobs.values():
+                if job.get('enabled', True):
+                    self._schedule(job, now)
+            self._thread = threading.Thread(target=self._run, name='snapshot-scheduler', daemon=True)
+            self._thread.start()
+        logger.info(f"스냅샷 스케줄러 시작 - 작업 수: {len(self._jobs)}, 동시 실행: {self.max_workers}, jitter: {self.jitter}초")
+        return True
+
+    def _run(self):
+        while True:
+            with self._lock:
+                while not self._heap or self._heap[0][0] > time.time():
+                    timeout = self._heap[0][0] - time.time() if self._heap else None
+                    self._wakeup.wait(timeout)
+                run_at, job_id, scheduled = heapq.heappop(self._heap)
+                job = self._jobs.get(job_id)
+                # 삭제되었거나 비활성화된 작업의 예약은 버림
+                if not job or not job.get('enabled', True):
+                    continue
+                if job_id in self._running:
+                    self._record(job, scheduled, time.time(), 0, 'skipped', error='이전 실행이 아직 진행 중')
+                else:
+                    self._running.add(job_id)
+                    self._executor.submit(self._execute, job, scheduled)
+                cron = CronSpec(job['cron'])
+                next_scheduled = cron.next_after(datetime.fromtimestamp(max(scheduled, time.time()))).timestamp()
+                heapq.heappush(self._heap, (next_scheduled + self._jitter_for(job), job_id, next_scheduled))
+
+    def _execute(self, job, scheduled):
+        started = time.time()
+        snapshot = None
+        try:
+            snap_name = default_snapshot_name(job.get('prefix', ''))
+            result, _ = take_snapshots([job['dataset']], snap_name, recursive=job.get('recursive', False))
+            snapshot = f"{job['dataset']}@{snap_name}"
+            # 재귀 스냅샷은 하위 ZFS 마다 같은 이름의 스냅샷을 만들므로 보존 정책도 각각 적용
+            targets = [job['dataset']]
+            if job.get('recursive'):
+                targets += [n for n in zfs_inventory.datasets(job['dataset'].split('/')[0])
+                            if n.startswith(f"{job['dataset']}/")]
+            for name in targets:
+                zfs_inventory.mark_stale(name)
+            if result.returncode != 0:
+                raise RuntimeError(result.stderr.strip())
+            publish_event('snapshot.created', pool=job['dataset'].split('/')[0], name=snapshot, schedule=job['id'])
+            pruned = 0
+            if job.get('retention'):
+                policy = validate_policy(job['retention'])
+                for name in targets:
+                    retention = apply_retention(name, policy, job.get('prefix', ''), dry_run=False)
+                    pruned += len(retention['pruned'])
+            self._finish(job, scheduled, started, 'success', snapshot=snapshot, pruned=pruned)
+        except Exception as e:
+            logger.error(f"스냅샷 예약 작업 실패 - 작업: {job['id']}, ZFS: {job['dataset']}, 오류: {str(e)}")
+            self._finish(job, scheduled, started, 'failed', snapshot=snapshot, error=str(e))
+
+    def _finish(self, job, scheduled, started, status, **extra):
+        with self._lock:
+            self._running.discard(job['id'])
+            self._state[job['id']] = {'last_run': scheduled, 'last_status': status}
+            self._record(job, scheduled, started, (time.time() - started) * 1000, status, **extra)
+            try:
+                self._save()
+            except OSError as e:
+                logger.error(f"스냅샷 스케줄 저장 실패 - 경로: {self.path}, 오류: {str(e)}", exc_info=True)
+
+    def _record(self, job, scheduled, started, duration_ms, status, **extra):
+        entry = {
+            'job_id': job['id'],
+            'dataset': job['dataset'],
+            'scheduled_at': scheduled,
+            'started_at': started,
+            'delay_ms': round((started - scheduled) * 1000, 2),
+            'duration_ms': round(duration_ms, 2),
+            'status': status,
+        }
+        entry.update(extra)
+        self._history.append(entry)
+        logger.info(f"스냅샷 예약 작업 {status} - 작업: {job['id']}, ZFS: {job['dataset']}, 소요 시간: {entry['duration_ms']}ms")
+
+    def add_job(self, dataset, cron, recursive=False, prefix='auto-', retention=None, enabled=True):
+        CronSpec(cron)  # 형식 검증
+        if prefix and not SNAPSHOT_NAME_PATTERN.match(prefix):
+            raise ValueError(f'스냅샷 이름 접두어 형식이 잘못되었습니다: {prefix}')
+        if retention:
+            validate_policy(retention)
+        job = {
+            'id': uuid.uuid4().hex[:12],
+            'dataset': dataset,
+            'cron': cron,
+            'recursive': bool(recursive),
+            'prefix': prefix or '',
+            'retention': retention,
+            'enabled': bool(enabled),
+            'created_at': time.time()
+        }
+        with self._lock:
+            self._jobs[job['id']] = job
+            self._save()
+            if job['enabled'] and self._thread:
+                self._schedule(job, time.time())
+                self._wakeup.notify()
+        logger.info(f"스냅샷 예약 작업 등록 - 작업: {job['id']}, ZFS: {dataset}, cron: {cron}")
+        return self.get_job(job['id'])
+
+    def _heap_next(self, job_id):
+        return min((s for _, j, s in self._heap if j == job_id), default=None)
+
+    def remove_job(self, job_id):
+        with self._lock:
+            job = self._jobs.pop(job_id, None)
+            self._state.pop(job_id, None)
+            if job:
+                self._save()
+        if job:
+            logger.info(f"스냅샷 예약 작업 삭제 - 작업: {job_id}, ZFS: {job['dataset']}")
+        return job is not None
+
+    def _public(self, job):
+        item = dict(job)
+        item['next_run'] = self._heap_next(job['id'])
+        item['jitter_seconds'] = self._jitter_for(job)
+        item['running'] = job['id'] in self._running
+        item.update(self._state.get(job['id'], {}))
+        return item
+
+    def get_job(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return self._public(job) if job else None
+
+    def list_jobs(self):
+        with self._lock:
+            return [self._public(job) for job in self._jobs.values()]
+
+    # 실행 이력과 작업별 지연 통계 (최신순)
+    def history(self, job_id=None, limit=100):
+        with self._lock:
+            entries = [e for e in self._history if job_id is None or e['job_id'] == job_id]
+        durations = sorted(e['duration_ms'] for e in entries if e['status'] != 'skipped')
+        stats = {
+            'runs': len(entries),
+            'failed': sum(1 for e in entries if e['status'] == 'failed'),
+            'skipped': sum(1 for e in entries if e['status'] == 'skipped'),
+        }
+        if durations:
+            stats.update({
+                'avg_ms': round(sum(durations) / len(durations), 2),
+                'p95_ms': durations[min(len(durations) - 1, int(len(durations) * 0.95))],
+                'max_ms': durations[-1],
+            })
+        return {'history': list(reversed(entries))[:limit], 'stats': stats}
+
+snapshot_scheduler = SnapshotScheduler()
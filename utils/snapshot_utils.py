@@ -0,0 +1,152 @@
+import base64, json, re, subprocess, time
+from datetime import datetime
+from utils.command_runner import run_command, popen_command
+from utils.logger import get_logger
+
+logger = get_logger("snapshot")
+
+SNAPSHOT_SORT_KEYS = ('creation', 'used', 'name')
+
+# CreateSnapshot과 동일한 스냅샷 이름 규칙 (예: pool/zfs@240524-153000)
+SNAPSHOT_TIMESTAMP_FORMAT = '%y%m%d-%H%M%S'
+SNAPSHOT_NAME_PATTERN = re.compile(r'^[\w\-.:]+$')
+
+def default_snapshot_name(prefix=''):
+    return f"{prefix}{datetime.now().strftime(SNAPSHOT_TIMESTAMP_FORMAT)}"
+
+# 여러 데이터셋의 스냅샷을 zfs snapshot 한 번으로 생성
+# 한 번의 명령으로 생성된 스냅샷은 같은 트랜잭션 그룹에서 원자적으로 만들어짐
+# recursive=True 이면 datasets[0]@name 에 -r 을 적용
+def take_snapshots(datasets, snap_name, recursive=False):
+    cmd = ['zfs', 'snapshot']
+    if recursive:
+        cmd += ['-r', f"{datasets[0]}@{snap_name}"]
+    else:
+        cmd += [f"{dataset}@{snap_name}" for dataset in datasets]
+    started = time.perf_counter()
+    result = run_command(cmd)
+    elapsed_ms = round((time.perf_counter() - started) * 1000, 2)
+    logger.info(f"스냅샷 일괄 생성 명령 실행 - 대상 {len(datasets)}개, 재귀: {recursive}, "
+                f"종료 코드: {result.returncode}, 소요 시간: {elapsed_ms}ms")
+    return result, elapsed_ms
+
+class SnapshotCommandError(Exception):
+    def __init__(self, returncode, stderr):
+        super().__init__(stderr)
+        self.returncode = returncode
+        self.stderr = stderr
+
+# 정렬 위치 키
+# zfs list는 -s/-S 키가 같으면 (데이터셋 이름, createtxg) 오름차순으로 정렬하며 이 보조 정렬은 -S여도 뒤집히지 않음
+def sort_position(row, sort='creation', order='asc'):
+    dataset = row['name'].split('@', 1)[0]
+    if sort == 'name':
+        return (dataset, row['createtxg'])
+    value = row[sort] if order == 'asc' else -row[sort]
+    return (value, dataset, row['createtxg'])
+
+def encode_cursor(position):
+    return base64.urlsafe_b64encode(json.dumps(list(position)).encode()).decode()
+
+def decode_cursor(cursor, sort='creation'):
+    try:
+        position = tuple(json.loads(base64.urlsafe_b64decode(cursor.encode())))
+    except (ValueError, TypeError):
+        position = None
+    types = (str, int) if sort == 'name' else (int, str, int)
+    if position is None or len(position) != len(types) or \
+            not all(isinstance(v, t) and not isinstance(v, bool) for v, t in zip(position, types)):
+        raise ValueError(f'잘못된 cursor 값입니다: {cursor}')
+    return position
+
+# zfs list -t snapshot 출력을 한 줄씩 읽어 반환 (전체 출력을 메모리에 올리지 않음)
+# dataset 지정 시 -d 1 (recursive면 -r), pool 지정 시 -r 로 범위를 제한
+def iter_snapshots(dataset=None, pool=None, recursive=False, sort='creation', order='asc', after=None):
+    cmd = ['zfs', 'list', '-Hp', '-t', 'snapshot', '-o', 'name,used,creation,createtxg']
+    if sort != 'name':
+        cmd += ['-s' if order == 'asc' else '-S', sort]
+    if dataset:
+        cmd += ['-r', dataset] if recursive else ['-d', '1', dataset]
+    elif pool:
+        cmd += ['-r', pool]
+
+    logger.debug(f"스냅샷 목록 스트리밍 명령어 실행: {' '.join(cmd)}")
+    proc = popen_command(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    try:
+        for line in proc.stdout:
+            parts = line.rstrip('\n').split('\t')
+            if len(parts) != 4:
+                continue
+            row = {
+                'name': parts[0],
+                'used': int(parts[1]),
+                'creation': int(parts[2]),
+                'createtxg': int(parts[3])
+            }
+            if after is not None and sort_position(row, sort, order) <= after:
+                continue
+            yield row
+        stderr = proc.stderr.read()
+        if proc.wait() != 0:
+            raise SnapshotCommandError(proc.returncode, stderr)
+    finally:
+        # 필요한 만큼만 읽고 중단된 경우 zfs 프로세스 정리
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+        proc.stdout.close()
+        proc.stderr.close()
+
+# zfs diff 변경 유형 / 파일 유형(-F) 표기
+DIFF_CHANGE_TYPES = {'-': 'removed', '+': 'created', 'M': 'modified', 'R': 'renamed'}
+DIFF_FILE_TYPES = {
+    'F': 'file', '/': 'directory', '@': 'symlink', '|': 'fifo', '=': 'socket',
+    'B': 'block', 'C': 'char', '>': 'door', 'P': 'event_port'
+}
+_DIFF_ESCAPE = re.compile(rb'\\(0[0-3][0-7]{2})')
+
+# zfs diff 는 공백, 역슬래시, 출력 불가 문자와 0x80 이상 바이트를 \0NNN(8진수 4자리)로 표기함 (예: 공백 \0040)
+def _unescape_diff_path(raw):
+    return _DIFF_ESCAPE.sub(lambda m: bytes([int(m.group(1), 8)]), raw).decode('utf-8', 'replace')
+
+# prefix 디렉토리 자체 또는 그 하위 경로인지 (/a/doc 는 /a/documents 와 맞지 않음)
+def _under_prefix(path, prefix):
+    prefix = prefix.rstrip('/')
+    return path == prefix or path.startswith(prefix + '/')
+
+# zfs diff -FHt 출력을 한 줄씩 읽어 반환
+# 호출 측이 다음 항목을 요청할 때만 읽으므로, 소비가 느리면 파이프가 차서 zfs 도 대기함 (backpressure)
+def iter_diff(from_snapshot, to=None, path_prefix=None, change_types=None):
+    cmd = ['zfs', 'diff', '-FHt', from_snapshot] + ([to] if to else [])
+    logger.debug(f"zfs diff 스트리밍 명령어 실행: {' '.join(cmd)}")
+    proc = popen_command(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        for line in proc.stdout:
+            parts = line.rstrip(b'\n').split(b'\t')
+            if len(parts) < 4:
+                continue
+            change = parts[1].decode()
+            if change_types and change not in change_types:
+                continue
+            path = _unescape_diff_path(parts[3])
+            new_path = _unescape_diff_path(parts[4]) if len(parts) > 4 else None
+            if path_prefix and not (_under_prefix(path, path_prefix) or (new_path and _under_prefix(new_path, path_prefix))):
+                continue
+            item = {
+                'time': float(parts[0]),
+                'change': DIFF_CHANGE_TYPES.get(change, change),
+                'type': DIFF_FILE_TYPES.get(parts[2].decode(), parts[2].decode()),
+                'path': path
+            }
+            if new_path:
+                item['new_path'] = new_path
+            yield item
+        stderr = proc.stderr.read().decode('utf-8', 'replace')
+        if proc.wait() != 0:
+            raise SnapshotCommandError(proc.returncode, stderr)
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+        proc.stdout.close()
+        proc.stderr.close()
@@ -0,0 +1,152 @@
+import fcntl, json, os, sqlite3, threading
+from contextlib import contextmanager
+from utils.file_utils import atomic_write
+from utils.logger import get_logger
+
+logger = get_logger("user")
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '../data')
+# 사용자 저장소 종류 (json | sqlite)
+USER_STORE_BACKEND = os.getenv("USER_STORE_BACKEND", "json")
+USERS_FILE = os.getenv("USERS_FILE", os.path.join(DATA_DIR, 'users.json'))
+USERS_DB_FILE = os.getenv("USERS_DB_FILE", os.path.join(DATA_DIR, 'users.db'))
+
+class JsonUserStore:
+    """users.json 저장소 - mtime 이 바뀐 경우에만 다시 읽고, 쓰기는 파일 잠금 + 원자적 교체"""
+
+    def __init__(self, path=USERS_FILE):
+        self.path = path
+        self._users = {}
+        self._mtime = None
+        self._lock = threading.Lock()
+
+    def _stat(self):
+        try:
+            st = os.stat(self.path)
+            return (st.st_mtime_ns, st.st_size, st.st_ino)
+        except FileNotFoundError:
+            return None
+
+    def _read(self):
+        with open(self.path, 'r') as f:
+            return json.load(f)
+
+    def _current(self):
+        stat = self._stat()
+        with self._lock:
+            if stat == self._mtime:
+                return self._users
+            if stat is None:
+                logger.warning(f"사용자 정보 파일 없음 - 경로: {self.path}")
+                self._users, self._mtime = {}, None
+                return self._users
+            try:
+                self._users = self._read()
+                self._mtime = stat
+                logger.info(f"사용자 정보 로딩 성공 - 사용자 수: {len(self._users)}")
+            except Exception as e:
+                # 읽기 실패 시 직전 캐시 유지
+                logger.error(f"사용자 정보 로딩 실패 - 경로: {self.path}, 오류: {str(e)}", exc_info=True)
+            return self._users
+
+    # 여러 프로세스(gunicorn worker)가 동시에 수정하지 않도록 잠금 파일 사용
+    @contextmanager
+    def _locked(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with self._lock, open(f"{self.path}.lock", 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _write(self, users):
+        atomic_write(self.path, json.dumps(users, indent=2), mode=0o600)
+        self._users, self._mtime = users, self._stat()
+        logger.info(f"사용자 정보 저장 성공 - 사용자 수: {len(users)}")
+
+    def get(self, username):
+        return self._current().get(username)
+
+    def all(self):
+        return dict(self._current())
+
+    # 이미 존재하면 False - 잠금 안에서 파일을 다시 읽어 다른 프로세스의 변경도 반영
+    def add(self, username, record):
+        with self._locked():
+            users = self._read() if os.path.exists(self.path) else {}
+            if username in users:
+                return False
+            users[username] = record
+            self._write(users)
+        return True
+
+    def replace_all(self, users):
+        with self._locked():
+            self._write(dict(users))
+
+class SqliteUserStore:
+    """SQLite 사용자 저장소 - 사용자 수가 많을 때 사용 (WAL 모드, 스레드별 연결)"""
+
+    def __init__(self, path=USERS_DB_FILE, import_from=USERS_FILE):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._conn() as conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS users (username TEXT PRIMARY KEY, record TEXT NOT NULL)')
+            empty = conn.execute('SELECT 1 FROM users LIMIT 1').fetchone() is None
+        # 처음 생성 시 기존 users.json 을 가져옴
+        if empty and import_from and os.path.exists(import_from):
+            self.import_json(import_from)
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def get(self, username):
+        row = self._conn().execute('SELECT record FROM users WHERE username = ?', (username,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def all(self):
+        return {name: json.loads(record) for name, record in self._conn().execute('SELECT username, record FROM users')}
+
+    def add(self, username, record):
+        try:
+            with self._conn() as conn:
+                conn.execute('INSERT INTO users (username, record) VALUES (?, ?)', (username, json.dumps(record)))
+        except sqlite3.IntegrityError:
+            return False
+        return True
+
+    def replace_all(self, users):
+        with self._conn() as conn:
+            conn.execute('DELETE FROM users')
+            conn.executemany('INSERT INTO users (username, record) VALUES (?, ?)',
+                             [(name, json.dumps(record)) for name, record in users.items()])
+        logger.info(f"사용자 정보 저장 성공 - 사용자 수: {len(users)}")
+
+    # users.json 형식({username: {"password": ...}}) 가져오기 - 이미 있는 사용자는 건너뜀
+    def import_json(self, path):
+        with open(path, 'r') as f:
+            users = json.load(f)
+        with self._conn() as conn:
+            before = conn.total_changes
+            conn.executemany('INSERT OR IGNORE INTO users (username, record) VALUES (?, ?)',
+                             [(name, json.dumps(record)) for name, record in users.items()])
+            imported = conn.total_changes - before
+        logger.info(f"사용자 정보 가져오기 완료 - 경로: {path}, 추가: {imported}명, 전체: {len(users)}명")
+        return imported
+
+def create_user_store(backend=USER_STORE_BACKEND):
+    if backend == 'sqlite':
+        return SqliteUserStore()
+    if backend == 'json':
+        return JsonUserStore()
+    raise ValueError(f'알 수 없는 사용자 저장소 종류입니다: {backend}')
+
+user_store = create_user_store()
@@ -0,0 +1,126 @@
+import os, subprocess, threading, time
+from utils.command_runner import run_command
+from utils.logger import get_logger
+
+logger = get_logger("zfs")
+
+# 외부(CLI)에서 변경된 내용을 반영하기 위한 전체 재구성 주기(초), 0이면 비활성화
+ZFS_INVENTORY_MAX_AGE = int(os.getenv("ZFS_INVENTORY_MAX_AGE", "300"))
+
+INVENTORY_PROPERTIES = ['name', 'type', 'used', 'avail', 'refer', 'mountpoint']
+
+class ZfsInventory:
+    """프로세스 전역 ZFS 데이터셋 목록 - 이름 기반 dict 인덱스와 세대(generation) 카운터로 관리"""
+
+    def __init__(self, max_age=ZFS_INVENTORY_MAX_AGE):
+        self.max_age = max_age
+        self.generation = 0
+        self._index = {}      # name -> 속성 dict
+        self._stale = set()   # 속성 재조회가 필요한 데이터셋 (존재 여부는 유효)
+        self._loaded_at = None
+        self._lock = threading.RLock()
+
+    def _list(self, names=None):
+        cmd = ['zfs', 'list', '-Hp', '-t', 'filesystem,volume', '-o', ','.join(INVENTORY_PROPERTIES)]
+        result = run_command(cmd + (names or []))
+        if result.returncode != 0 and not names:
+            raise subprocess.CalledProcessError(result.returncode, cmd, result.stdout, result.stderr)
+        entries = {}
+        for line in result.stdout.splitlines():
+            values = line.split('\t')
+            if len(values) == len(INVENTORY_PROPERTIES):
+                entries[values[0]] = dict(zip(INVENTORY_PROPERTIES, values))
+        return entries
+
+    # zfs list 한 번으로 전체 인덱스 재구성
+    # 목록 조회 중 reload_dataset()/remove() 등으로 세대가 바뀌면 그 변경이 빠진 결과일 수 있으므로 다시 조회
+    def refresh(self, attempts=3):
+        for attempt in range(attempts):
+            with self._lock:
+                generation = self.generation
+            entries = self._list()
+            with self._lock:
+                if self.generation != generation and attempt < attempts - 1:
+                    logger.debug(f"ZFS 인벤토리 재구성 중 변경 발생, 다시 조회 - 세대: {generation} -> {self.generation}")
+                    continue
+                self._index = entries
+                self._stale.clear()
+                self._loaded_at = time.monotonic()
+                self.generation += 1
+                break
+        logger.info(f"ZFS 인벤토리 재구성 - 데이터셋 {len(entries)}개, 세대: {self.generation}")
+
+    def _ensure_loaded(self):
+        with self._lock:
+            expired = self._loaded_at is None or (
+                self.max_age and time.monotonic() - self._loaded_at > self.max_age
+            )
+            if expired:
+                self.refresh()
+
+    # 다음 조회 시 전체 재구성
+    def invalidate(self):
+        with self._lock:
+            self._loaded_at = None
+            self.generation += 1
+
+    # 데이터셋 하나만 다시 조회해 인덱스에 반영 (생성 직후 등)
+    def reload_dataset(self, name):
+        entries = self._list([name])
+        with self._lock:
+            if name in entries:
+                self._index[name] = entries[name]
+            else:
+                self._index.pop(name, None)
+            self._stale.discard(name)
+            self.generation += 1
+
+    # 데이터셋과 하위 데이터셋 제거 (삭제 직후)
+    def remove(self, name):
+        prefix = f"{name}/"
+        with self._lock:
+            for key in [k for k in self._index if k == name or k.startswith(prefix)]:
+                del self._index[key]
+                self._stale.discard(key)
+            self.generation += 1
+
+    # 존재 여부는 그대로 두고 속성만 다음 get() 때 재조회 (스냅샷 생성/롤백 후)
+    def mark_stale(self, name):
+        with self._lock:
+            if name in self._index:
+                self._stale.add(name)
+                self.generation += 1
+
+    # 인덱스에 없으면 해당 데이터셋만 다시 조회해 확인 (다른 프로세스/CLI 에서 방금 생성된 경우 등)
+    def exists(self, name):
+        self._ensure_loaded()
+        if name in self._index:
+            return True
+        if not name or name.startswith('-'):
+            return False
+        self.reload_dataset(name)
+        return name in self._index
+
+    # 풀은 최상위 데이터셋으로 존재
+    def pool_exists(self, pool_name):
+        return bool(pool_name) and '/' not in pool_name and self.exists(pool_name)
+
+    def get(self, name):
+        self._ensure_loaded()
+        with self._lock:
+            stale = name in self._stale
+        if stale:
+            self.reload_dataset(name)
+        with self._lock:
+            entry = self._index.get(name)
+            return dict(entry) if entry else None
+
+    def datasets(self, pool_name=None):
+        self._ensure_loaded()
+        with self._lock:
+            names = sorted(self._index)
+        if pool_name:
+            names = [n for n in names if n == pool_name or n.startswith(f"{pool_name}/")]
+        return names
+
+zfs_inventory = ZfsInventory()
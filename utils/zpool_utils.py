@@ -1,61 +1,121 @@
 import subprocess, os, re
+from utils.zfs_inventory import zfs_inventory
+from utils.command_runner import run_command
 from utils.logger import get_logger
 
 logger = get_logger("zpool")
 
-# 해당 디스크가 다른 zpool에 사용 중인지 확인
-def is_device_in_use(device):
-   # 절대 경로 기반 (심볼릭 링크 해석 포함)
+# SMART 조회 디바이스당 제한 시간(초)
+SMART_TIMEOUT = int(os.getenv("SMART_TIMEOUT", "15"))
+
+# OS 디스크를 제외한 물리 디스크 목록 조회
+# 반환값: (디스크 목록, lsblk 실행 결과)
+def list_physical_disks():
+    # 루트가 마운트된 디스크명 추출
+    os_disk = ''
+    result = run_command(['findmnt', '-n', '-o', 'SOURCE', '/boot'])
+    match = re.findall(r'/dev/([a-z]+)', result.stdout.strip())
+    if match:
+        os_disk = match[0]
+    logger.debug(f"OS Disk: {os_disk}")
+
+    # 이름, 사이즈(GB), 모델명, 타입 출력
+    lsblk_result = run_command(['lsblk', '-dn', '-o', 'NAME,SIZE,MODEL,TYPE', '-P'])
+    disks = []
+    for line in lsblk_result.stdout.strip().split('\n'):
+        attrs = dict(re.findall(r'(\w+)="(.*?)"', line))
+        if attrs.get('TYPE') != 'disk':
+            continue
+        if attrs.get('NAME') == os_disk:
+            continue
+        disks.append({
+            'name': attrs['NAME'],
+            'path': f"/dev/{attrs['NAME']}",
+            'size': attrs.get('SIZE'),
+            'model': attrs.get('MODEL'),
+        })
+    return disks, lsblk_result
+
+# 파티션 이름에서 상위 디스크 이름 추출 (예: sdb1 -> sdb, nvme0n1p1 -> nvme0n1)
+def _parent_disk(name):
+    sys_path = f"/sys/class/block/{name}"
+    if os.path.exists(os.path.join(sys_path, 'partition')):
+        return os.path.basename(os.path.dirname(os.path.realpath(sys_path)))
+    match = re.fullmatch(r'((?:nvme|mmcblk)\d+(?:n\d+)?)p\d+', name) or re.fullmatch(r'([a-z]+)\d+', name)
+    return match.group(1) if match else None
+
+# zpool status -P 를 한 번만 실행해 사용 중인 디바이스 경로 집합 생성
+# 원본 경로, 실경로(/dev/disk/by-id 등 심볼릭 링크 해석), 상위 디스크 경로를 모두 포함
+def get_in_use_devices():
     try:
-        device_realpath = os.path.realpath(device)
-        logger.debug(f"디바이스 경로 확인 - 원본: {device}, 실경로: {device_realpath}")
-        result = subprocess.run(
+        result = run_command(
             ['zpool', 'status', '-P'],
-            capture_output=True,
-            encoding='utf-8',
             check=True
         )
-        lines = result.stdout.splitlines()
-
-        for line in lines:
-            if device_realpath in line:
-                logger.info(f"디바이스 사용 중 - 경로: {device_realpath}, 관련 라인: {line.strip()}")
-                return device
-        logger.info(f"디바이스 미사용 - 경로: {device_realpath}")
-        return False
-    except subprocess.CalledProcessError:
-        logger.error(f"디바이스 사용 여부 확인 실패 - 경로: {device}, 오류: {e.stderr or str(e)}", exc_info=True)
-        return False
+    except subprocess.CalledProcessError as e:
+        logger.error(f"zpool 디바이스 목록 조회 실패 - 오류: {e.stderr or str(e)}", exc_info=True)
+        return set()
+
+    in_use = set()
+    for line in result.stdout.splitlines():
+        columns = line.split()
+        if not columns or not columns[0].startswith('/'):
+            continue
+        path = columns[0]
+        realpath = os.path.realpath(path)
+        in_use.update((path, realpath))
+        parent = _parent_disk(os.path.basename(realpath))
+        if parent:
+            in_use.add(f"/dev/{parent}")
+    logger.info(f"zpool 사용 중 디바이스 조회 성공 - 총 {len(in_use)}개 경로")
+    return in_use
+
+# 해당 디스크가 다른 zpool에 사용 중인지 확인
+# 여러 디바이스를 확인할 때는 get_in_use_devices() 결과를 in_use로 넘겨 재사용
+def is_device_in_use(device, in_use=None):
+    if in_use is None:
+        in_use = get_in_use_devices()
+    # 절대 경로 기반 (심볼릭 링크 해석 포함)
+    device_realpath = os.path.realpath(device)
+    logger.debug(f"디바이스 경로 확인 - 원본: {device}, 실경로: {device_realpath}")
+    if device in in_use or device_realpath in in_use:
+        logger.info(f"디바이스 사용 중 - 경로: {device_realpath}")
+        return device
+    logger.info(f"디바이스 미사용 - 경로: {device_realpath}")
+    return False
     
 # 주어진 zpool 이름이 이미 존재하는지 확인
+# ZFS 인벤토리 조회로 대체 (명령 실행 없음)
 def is_pool_name_exists(pool_name):
     try:
-        result = subprocess.run(
-            ['zpool', 'list', '-H', '-o', 'name'],
-            capture_output=True,
-            encoding='utf-8',
-            check=True
-        )
-        existing_pools = result.stdout.strip().splitlines()
-        exists = pool_name in existing_pools
+        exists = zfs_inventory.pool_exists(pool_name)
         logger.info(f"풀 이름 중복 확인 - 입력 이름: {pool_name}, 존재 여부: {exists}")
         return exists
-    except subprocess.CalledProcessError:
+    except subprocess.CalledProcessError as e:
         logger.error(f"풀 이름 중복 확인 실패 - 이름: {pool_name}, 오류: {e.stderr or str(e)}", exc_info=True)
         return False  # 오류 발생 시 존재하지 않는 것으로 처리
 
 def get_smart_health(device):
     try:
         # -A 옵션으로 세부 확인 가능
-        result = subprocess.run(['smartctl', '-H', device], capture_output=True, encoding='utf-8', check=True)
+        # smartctl은 디스크 상태에 따라 0이 아닌 종료 코드를 반환하므로 출력으로 판단
+        result = run_command(['smartctl', '-H', device], timeout=SMART_TIMEOUT)
         for line in result.stdout.splitlines():
             if "SMART overall-health self-assessment test result" in line:
                 # 예: "SMART overall-health self-assessment test result: PASSED"
                 # PASSED: 디스크 정상 상태 / FAILED: 디스크 위험 상태
+                health = line.split(":")[-1].strip()
                 logger.info(f"SMART 상태 확인 성공 - 디바이스: {device}, 상태: {health}")
-                return line.split(":")[-1].strip()
+                return health
+        if result.returncode != 0:
+            logger.error(f"SMART 상태 확인 실패 - 디바이스: {device}, 오류: {result.stderr.strip()}")
+            return "UNAVAILABLE" # SMART 기능이 없거나 명령 실행 실패
         logger.warning(f"SMART 상태 결과 없음 - 디바이스: {device}")
         return "UNKNOWN" # 결과 문구를 찾을 수 없음
-    except subprocess.CalledProcessError:
-        logger.error(f"SMART 상태 확인 실패 - 디바이스: {device}, 오류: {e.stderr or str(e)}", exc_info=True)
-        return "UNAVAILABLE" # SMART 기능이 없거나 명령 실행 실패
\ No newline at end of file
+    except subprocess.TimeoutExpired:
+        logger.error(f"SMART 상태 확인 시간 초과 - 디바이스: {device}, 제한: {SMART_TIMEOUT}초")
+        return "UNAVAILABLE"
+    except OSError as e:
+        logger.error(f"SMART 상태 확인 실패 - 디바이스: {device}, 오류: {str(e)}", exc_info=True)
+        return "UNAVAILABLE"
+